@@ -3,6 +3,7 @@ from proto.game_proto import ACT, OK, CHAL, BLOCK, SHOW, LOSE, COINS, DECK, CHOO
 from .game.state_machine import PlayerState, Tag
 from .game.core import *
 from .player import InformedPlayer
+from terminal.terminal import Terminal
 import random
 from loguru import logger
 
@@ -23,10 +24,11 @@ class CoupBot(InformedPlayer):
         is_root (bool): Flag for whether the player is the root player or not.
         msg (GameMessage): Message to be sent to the server.
         players (dict[str, PlayerSim]): Dictionary of players in the game.
-        possible_messages (list[str]): List of possible messages the player can send.
+        possible_messages (tuple[str, ...]): Possible messages the player can send.
         history (list[GameMessage]): History of received messages.
         ready (bool): Flag for whether the player is ready or not.
         replied (bool): Flag for whether the player has replied to the last message or not.
+        rng (Random): Random number generator used to make decisions. Seed it to replay a game.
         state (PlayerState): State of the player.
         tag (Tag): Tag for the player. Used to identify the player in the game.
         term (Terminal): Terminal used to write messages manually.
@@ -38,8 +40,8 @@ class CoupBot(InformedPlayer):
         
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, terminal: Terminal | None = None, rng: random.Random | None = None):
+        super().__init__(terminal, rng)
 
     def choose_message(self) -> None:
         if len(self.possible_messages) == 0:
@@ -47,31 +49,31 @@ class CoupBot(InformedPlayer):
         
         # Implement your bot here
         # Example: choose a random message from possible messages
-        self.msg = GameMessage(random.choice(self.possible_messages))
+        self.msg = GameMessage.cached(self.rng.choice(self.possible_messages))
 
 class RandomBot(InformedPlayer):
     """RandomBot player class."""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, terminal: Terminal | None = None, rng: random.Random | None = None):
+        super().__init__(terminal, rng)
 
     def choose_message(self):
         if len(self.possible_messages) == 0:
             raise IndexError("No possible messages.")
-        self.msg = GameMessage(random.choice(self.possible_messages)) # choose random
+        self.msg = GameMessage.cached(self.rng.choice(self.possible_messages)) # choose random
 
 class HonestBot(InformedPlayer):
     """HonestBot player class."""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, terminal: Terminal | None = None, rng: random.Random | None = None):
+        super().__init__(terminal, rng)
 
-    def pick_random(self, possible_messages: list[str]):
+    def pick_random(self, possible_messages: list[str] | tuple[str, ...]):
         """Pick a random message from the possible messages."""
         if len(possible_messages) == 0:
             raise IndexError("No possible messages.")
         
-        self.msg = GameMessage(random.choice(possible_messages))
+        self.msg = GameMessage.cached(self.rng.choice(possible_messages))
 
     def choose_message(self):
         current_msg = self.history[-1]
@@ -215,19 +217,19 @@ class HonestBot(InformedPlayer):
 class TestBot(InformedPlayer):    
     """TestBot player class."""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, terminal: Terminal | None = None, rng: random.Random | None = None):
+        super().__init__(terminal, rng)
 
     def choose_message(self):
         if len(self.possible_messages) == 0:
             raise IndexError("No possible messages.")
-        self.msg = GameMessage(random.choice(self.possible_messages)) # choose random
+        self.msg = GameMessage.cached(self.rng.choice(self.possible_messages)) # choose random
         # self.msg = GameMessage(self.possible_messages[-1]) # choose last
         
         # test with priority choices
         msgs: list[GameMessage] = []
         for m in self.possible_messages:
-            msgs.append(GameMessage(m))
+            msgs.append(GameMessage.cached(m))
         for m in msgs:
             if m.command == ACT and m.action == ASSASSINATE:
                 self.msg = m
@@ -245,8 +247,8 @@ import ollama
 class AICoupBot(InformedPlayer):
     """TestBot player class."""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, terminal: Terminal | None = None, rng: random.Random | None = None):
+        super().__init__(terminal, rng)
         try:
             self.ollama_client = ollama.Client(host="http://localhost:11434")
         except Exception as e:
@@ -405,7 +407,7 @@ Return ONLY the exact raw message string (the part in quotes)."""})
         selected_message = find_message_in_response(model_response, self.possible_messages)
         
         if selected_message:
-            self.msg = GameMessage(selected_message)
+            self.msg = GameMessage.cached(selected_message)
             logger.info(f"AI selected message: {selected_message}")
             return
                 # TODO: If not rechat with the model to get a valid message, try gleaning times.
@@ -433,7 +435,7 @@ Return ONLY the exact raw message string (the part in quotes)."""})
                     selected_message = find_message_in_response(retry_model_response, self.possible_messages)
                     
                     if selected_message:
-                        self.msg = GameMessage(selected_message)
+                        self.msg = GameMessage.cached(selected_message)
                         logger.info(f"AI selected message after retry: {selected_message}")
                         return
                     else:
@@ -442,7 +444,7 @@ Return ONLY the exact raw message string (the part in quotes)."""})
                     logger.error(f"Error during retry: {str(e)}")
             retry_llm()
         # Fallback to a strategic selection if AI failed to provide a valid message
-        msgs = [GameMessage(m) for m in self.possible_messages]
+        msgs = [GameMessage.cached(m) for m in self.possible_messages]
         
         # Strategic priority-based fallback
         def priority_based_fallback():
@@ -483,7 +485,16 @@ Return ONLY the exact raw message string (the part in quotes)."""})
         
         priority_based_fallback()
         # Last resort: random choice
-        self.msg = GameMessage(random.choice(self.possible_messages))
+        self.msg = GameMessage.cached(self.rng.choice(self.possible_messages))
         logger.info(f"Fallback: Using random message: {self.msg}")
         return
 
+
+BOTS: dict[str, type[InformedPlayer]] = {
+    "CoupBot": CoupBot,
+    "TestBot": TestBot,
+    "RandomBot": RandomBot,
+    "HonestBot": HonestBot,
+    "AICoupBot": AICoupBot,
+}
+"""Available bot classes, indexed by name."""
@@ -1,3 +1,8 @@
+from proto import binary_proto
+from proto.framing import FrameDecoder
+from proto.transport import Transport, TCPTransport
+import queue
+import selectors
 import socket
 import threading
 import sys
@@ -5,13 +10,62 @@ from loguru import logger
 
 
 DEFAULT_ADDR = True  # Use default address for messages
+READ_SIZE = 4096  # Maximum number of wake-up bytes discarded at once
+
+
+class WakeupQueue(queue.SimpleQueue):
+    """
+    SimpleQueue that can be watched by a selector.
+
+    Every put() also writes a byte to a socket pair, so an event loop waiting on the reader end
+    wakes up as soon as there is something in the queue, without polling it.
+    """
+
+    def __init__(self):
+        self.reader, self.writer = socket.socketpair()
+        self.reader.setblocking(False)
+        self.writer.setblocking(False)
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        self.wake()
+
+    def wake(self):
+        """Wakes up the event loop watching the queue."""
+        try:
+            self.writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # The socket pair is full, the loop is already due to wake up
+
+    def clear_wakeups(self):
+        """Discards the pending wake-up bytes. Call it before emptying the queue."""
+        try:
+            while self.reader.recv(READ_SIZE):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
 
 class Client:
-    def __init__(self, host="localhost", port=12345):
+    def __init__(self, host="localhost", port=12345, binary=False, selector=False, transport: Transport | None = None):
         self.host = host
         self.port = port
+        self.transport = TCPTransport(host, port) if transport is None else transport
+        """Opens the connection to the server."""
         self.socket = None
         self.signal = True
+        self.selector = selector
+        """Run the client on a single-thread selector loop instead of a receiver thread and a sender loop."""
+        self.outbox: WakeupQueue | None = None
+        """Queue of outgoing messages watched by the selector loop. Emptied by flush()."""
+        self.binary = binary
+        """Ask the server for binary frames instead of text messages."""
+        self.decoder = FrameDecoder(negotiate=binary)
+        """Splits the received data into messages, switching to binary frames once the server has accepted them."""
 
     def sender(self):
         """
@@ -39,6 +93,17 @@ class Client:
 
         print(message)
 
+    def flush(self):
+        """
+        Sends every message waiting in the outbox. Called by the selector loop when the outbox wakes it up.
+        """
+
+        while self.signal:
+            try:
+                self.send(self.outbox.get_nowait())
+            except queue.Empty:
+                break
+
     # -- Wrappers --
 
     def send(self, message: str):
@@ -51,12 +116,40 @@ class Client:
 
         self.__handle_send__(message)
 
+    def send_data(self, data: bytes):
+        """
+        Sends data already in the wire format of the connection, e.g. a binary frame
+
+        Arguments:
+            data {bytes} -- data to be sent
+        """
+
+        self.__send_data__(data)
+
+    def frame_receiver(self, frame: bytes):
+        """
+        Handles a binary frame received from the server. By default, passes it to receiver as a text message
+
+        Arguments:
+            frame {bytes} -- binary frame
+        """
+
+        try:
+            message = binary_proto.decode_text(frame)
+        except SyntaxError:
+            logger.warning("Invalid message received.")
+            return
+        self.receiver(message)
+
     def run(self):
         """
         runs the client
         """
 
-        self.__run__()
+        if self.selector:
+            self.__run_selector__()
+        else:
+            self.__run__()
 
     # -- Private methods --
 
@@ -68,9 +161,25 @@ class Client:
             message {str} -- message to be sent
         """
 
+        try:
+            data = binary_proto.encode_text(message) if self.binary else message.encode("utf-8")
+        except SyntaxError as e:
+            logger.error(f"Error sending message: {e}")
+            self.signal = False
+            return
+        self.__send_data__(data)
+
+    def __send_data__(self, data: bytes):
+        """
+        Sends data to the server
+
+        Arguments:
+            data {bytes} -- data to be sent
+        """
+
         try:
             if self.socket is not None:
-                self.socket.sendall(message.encode("utf-8"))
+                self.socket.sendall(data)
             else:
                 logger.warning("You are not connected to the server.")
                 self.signal = False
@@ -84,9 +193,10 @@ class Client:
         """
 
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.host, self.port))
-            logger.success(f"Connected to server at {self.host}:{self.port}")
+            self.socket = self.transport.connect()
+            logger.success(f"Connected to server at {self.transport}")
+            if self.binary:
+                self.socket.sendall(binary_proto.BINARY_HELLO)
             self.socket.settimeout(1)
         except Exception as e:
             logger.error(f"Could not make a connection to the server: {e}")
@@ -97,16 +207,12 @@ class Client:
         Continuously receives messages from the server and calls receiver with any new message
         """
 
-        buffer = ""
         while self.signal:
             try:
                 if self.socket is not None:
-                    data = self.socket.recv(256)
+                    data = self.decoder.receive(self.socket)
                     if data:
-                        buffer += data.decode("utf-8")
-                        while "\n" in buffer:
-                            message, buffer = buffer.split("\n", 1)
-                            self.receiver(message)
+                        self.__handle_data__(data)
                         continue
                 logger.error("Server has closed the connection.")
                 self.signal = False
@@ -118,13 +224,51 @@ class Client:
                 self.signal = False
                 break
 
+    def __handle_data__(self, data: bytes):
+        """
+        Splits the received data into messages and calls receiver with each complete one
+        """
+
+        decoder = self.decoder
+        decoder.feed(data)
+        binary = decoder.binary
+        self.__dispatch__(decoder.frames(), binary)
+        if decoder.binary and not binary:
+            # The server answered the binary preamble with its own, everything after it is framed
+            self.__dispatch__(decoder.frames(), True)
+
+    def __dispatch__(self, frames: list[bytes], binary: bool):
+        """
+        Calls receiver with each complete text message, or frame_receiver with each binary frame
+
+        Arguments:
+            frames {list[bytes]} -- complete frames
+            binary {bool} -- whether the frames are binary frames or text messages
+        """
+
+        if binary:
+            for frame in frames:
+                self.frame_receiver(frame)
+            return
+        for frame in frames:
+            try:
+                message = frame.decode("utf-8")
+            except UnicodeDecodeError:
+                logger.warning("Invalid message received.")
+                continue
+            self.receiver(message)
+
     def __start_receiving__(self):
         """
         Starts a thread for receiving messages from the server
+
+        Returns:
+            Thread -- receiving thread
         """
 
         receive_thread = threading.Thread(target=self.__handle_receive__)
         receive_thread.start()
+        return receive_thread
 
     def __run__(self):
         """
@@ -132,8 +276,48 @@ class Client:
         """
 
         self.__connect__()
-        self.__start_receiving__()
+        receive_thread = self.__start_receiving__()
         self.sender()
+        receive_thread.join()
+        self.socket.close()
+
+    def __run_selector__(self):
+        """
+        Initializes the server connection and runs the client on a single thread.
+        The loop sleeps until the server sends data or a message is put in the outbox.
+        """
+
+        self.__connect__()
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.socket, selectors.EVENT_READ, self.__selector_receive__)
+            if self.outbox is not None:
+                selector.register(self.outbox.reader, selectors.EVENT_READ, self.__selector_send__)
+                self.__selector_send__()  # Messages queued before connecting
+            while self.signal:
+                for key, _ in selector.select():
+                    key.data()
+                    if not self.signal:
+                        break
+        self.socket.close()
+
+    def __selector_receive__(self):
+        try:
+            data = self.decoder.receive(self.socket)
+        except socket.timeout:
+            return
+        except OSError:
+            logger.error("You have been disconnected from the server.")
+            self.signal = False
+            return
+        if data:
+            self.__handle_data__(data)
+        else:
+            logger.error("Server has closed the connection.")
+            self.signal = False
+
+    def __selector_send__(self):
+        self.outbox.clear_wakeups()
+        self.flush()
 
 
 if __name__ == "__main__":
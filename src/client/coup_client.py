@@ -1,8 +1,10 @@
-from .client import Client
+from .client import Client, WakeupQueue
 from .player import Player
 from .human import Human
 from proto.network_proto import SINGLE, EXCEPT, ALL
 from proto.network_proto import network_proto, NetworkMessage
+from proto import binary_proto
+from proto.transport import Transport
 from loguru import logger
 
 
@@ -10,17 +12,37 @@ DEFAULT_ADDR = True  # Use default address for messages
 ROOT_ADDR = 0
 
 class CoupClient(Client):
-    def __init__(self, host, port, player: Player):
-        super().__init__(host, port)
+    def __init__(self, host, port, player: Player, binary=False, table: str | None = None, selector=False,
+                 transport: Transport | None = None):
+        super().__init__(host, port, binary, selector, transport)
 
         # Get console configuration from player
         self.player = player
+        if selector:
+            self.attach_outbox()
+        self.table = table
+        """Table to join after connecting: a table name, "" for an auto-assigned table or None to stay at the default table."""
+
+    def __connect__(self):
+        super().__connect__()
+        if self.table is not None:
+            self.send(network_proto.JOIN(self.table or None))
+
+    def attach_outbox(self):
+        """Replaces the player's checkout with an outbox watched by the selector loop, keeping the queued messages."""
+        self.outbox = WakeupQueue()
+        pending = self.player.checkout
+        while not pending.empty():
+            self.outbox.put(pending.get_nowait())
+        self.player.checkout = self.outbox
+        if getattr(self.player.term, "fifo", None) is pending:
+            self.player.term.fifo = self.outbox
 
     def addr_root(self, message: str):
         return network_proto.SINGLE(ROOT_ADDR, message)
 
     def addr_strip(self, message: str):
-        net = NetworkMessage(message)
+        net = NetworkMessage.cached(message)
         if net.msg is not None:
             return str(net.msg)
         raise SyntaxError(f"Invalid message format for message: \"{message}\"")
@@ -32,10 +54,7 @@ class CoupClient(Client):
 
                 # Send the move to the server
                 if message:
-                    if not self.player.is_root:
-                        # Add the root address
-                        message = self.addr_root(message)
-                    self.send(message)
+                    self.send_move(message)
                     
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt detected, closing connection.")
@@ -45,6 +64,32 @@ class CoupClient(Client):
             logger.error(f"Error in sender: {e}")
         self.signal = False
 
+    def send_move(self, message: str):
+        if self.player.is_root:
+            self.send(message)
+        elif self.binary:
+            # Build the frame straight from the game message, addressed to the root
+            self.send_data(binary_proto.encode(SINGLE, ROOT_ADDR, message))
+        else:
+            # Add the root address
+            self.send(self.addr_root(message))
+
+    def flush(self):
+        try:
+            while self.signal:
+                message = self.player.sender(timeout=0)
+                if message is None:
+                    break
+                if message:
+                    self.send_move(message)
+
+        except KeyboardInterrupt:
+            logger.info("Keyboard interrupt detected, closing connection.")
+            self.signal = False
+        except Exception as e:
+            logger.error(f"Error in sender: {e}")
+            self.signal = False
+
     def receiver(self, message: str):
         try:
             # Strip message address
@@ -63,6 +108,31 @@ class CoupClient(Client):
             logger.exception(f"Error in receiver: {e}")
             self.signal = False
 
+    def frame_receiver(self, frame: bytes):
+        """
+        Passes the game message of a binary frame straight to the player, without going through its text form.
+        The root also gets the address of the player that sent it.
+        """
+        message = frame
+        try:
+            _, addr, message = binary_proto.decode(frame)
+            if self.player.is_root:
+                stop = self.player.receive_decoded(str(addr), message)
+            else:
+                stop = self.player.receive(message)
+            if stop:
+                self.signal = False
+
+        except SyntaxError:
+            logger.warning(f"Invalid message format for message: \"{message}\"")
+            
+        except NotImplementedError:
+            logger.warning("Method not implemented yet!")
+            self.signal = False
+        except Exception as e:
+            logger.exception(f"Error in receiver: {e}")
+            self.signal = False
+
 
 def main():
     # Get host and port
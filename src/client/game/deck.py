@@ -0,0 +1,148 @@
+from .core import CHARACTERS
+import random
+
+
+CARDS_PER_CHARACTER = 3
+_CARD_INDEX = {card: i for i, card in enumerate(CHARACTERS)}
+
+
+class CourtDeck:
+    """
+    Court deck stored as the number of cards left of each character.
+
+    The order of the cards in the deck is never relevant, since cards are always drawn at random,
+    so a count per character is enough to represent it.
+    """
+
+    __slots__ = ("counts", "size")
+
+    def __init__(self, copies: int = CARDS_PER_CHARACTER):
+        """
+        __init__ method for CourtDeck class.
+
+        Keyword Arguments:
+            copies {int} -- number of cards of each character (default: 3)
+        """
+        self.counts: list[int] = [copies] * len(CHARACTERS)
+        """Number of cards of each character, in the order of CHARACTERS."""
+        self.size: int = copies * len(CHARACTERS)
+        """Total number of cards in the deck."""
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, card: str) -> bool:
+        return self.counts[_CARD_INDEX[card]] > 0
+
+    def __repr__(self) -> str:
+        return str(self.composition())
+
+    def count(self, card: str) -> int:
+        """
+        Number of cards of a character left in the deck.
+
+        Arguments:
+            card {str} -- character of the card
+
+        Returns:
+            int -- number of cards
+        """
+        return self.counts[_CARD_INDEX[card]]
+
+    def composition(self) -> dict[str, int]:
+        """Returns the number of cards left of each character."""
+        return {card: self.counts[i] for i, card in enumerate(CHARACTERS)}
+
+    def put(self, card: str) -> None:
+        """
+        Returns a card to the deck.
+
+        Arguments:
+            card {str} -- character of the card
+        """
+        self.counts[_CARD_INDEX[card]] += 1
+        self.size += 1
+
+    def remove(self, card: str) -> None:
+        """
+        Takes a given card out of the deck, e.g. a card known to be held by a player.
+
+        Arguments:
+            card {str} -- character of the card
+
+        Raises:
+            ValueError: If the deck has no card of this character.
+        """
+        i = _CARD_INDEX[card]
+        if self.counts[i] == 0:
+            raise ValueError(f"No {card} left in the deck.")
+        self.counts[i] -= 1
+        self.size -= 1
+
+    def take(self, rng: random.Random) -> str:
+        """
+        Draws a random card from the deck. Every card has the same chance of being drawn.
+
+        Arguments:
+            rng {Random} -- random number generator
+
+        Raises:
+            IndexError: If the deck is empty.
+
+        Returns:
+            str -- character of the card
+        """
+        if self.size == 0:
+            raise IndexError("Deck is empty, cannot take card.")
+        i = _pick(self.counts, self.size, rng)
+        self.counts[i] -= 1
+        self.size -= 1
+        return CHARACTERS[i]
+
+    def sample(self, k: int, rng: random.Random) -> list[str]:
+        """
+        Draws k random cards without taking them out of the deck, e.g. to guess the hidden cards of the other players.
+
+        Arguments:
+            k {int} -- number of cards
+            rng {Random} -- random number generator
+
+        Raises:
+            ValueError: If the deck has fewer than k cards.
+
+        Returns:
+            list[str] -- characters of the cards, in the order they were drawn
+        """
+        if k > self.size:
+            raise ValueError(f"Cannot draw {k} cards from a deck of {self.size}.")
+        counts = self.counts.copy()
+        size = self.size
+        cards = []
+        for _ in range(k):
+            i = _pick(counts, size, rng)
+            counts[i] -= 1
+            size -= 1
+            cards.append(CHARACTERS[i])
+        return cards
+
+    def copy(self) -> "CourtDeck":
+        """Returns an independent copy of the deck."""
+        deck = CourtDeck.__new__(CourtDeck)
+        deck.counts = self.counts.copy()
+        deck.size = self.size
+        return deck
+
+
+def _pick(counts: list[int], size: int, rng: random.Random) -> int:
+    """
+    Picks a random card among size cards, counted per character. Takes one random number and at most one step per character.
+
+    Returns:
+        int -- index of the character of the card in CHARACTERS
+    """
+    pick = rng.randrange(size)
+    for i, count in enumerate(counts):
+        if pick < count:
+            return i
+        pick -= count
+    raise IndexError("Deck is empty, cannot take card.")
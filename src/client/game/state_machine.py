@@ -2,6 +2,7 @@ from enum import Enum, auto
 from proto.game_proto import game_proto, GameMessage
 from .core import *
 from itertools import permutations
+from functools import lru_cache
 
 
 class PlayerState(Enum):
@@ -52,8 +53,13 @@ class Tag(Enum):
 class PlayerSim:
     """
     Player state class.
+
+    Attributes are stored in slots, so simulating many players (or copying them) stays cheap.
     """
 
+    __slots__ = ("id", "players", "coins", "deck", "exchange_cards", "ready", "alive", "turn", "replied",
+                 "was_announced", "tag", "state", "possible_messages", "msg")
+
     def __init__(self, id: str, players: dict[str, "PlayerSim"]):
         self.id: str = id
         """Player ID. Represents the player name, which uniquely identifies it in the game."""
@@ -79,192 +85,287 @@ class PlayerSim:
         """Tag for the player. Used inside the player state machine."""
         self.state: PlayerState = PlayerState.IDLE
         """Current state of the player."""
-        self.possible_messages: list[str] = []
-        """List of possible messages to send."""
-        self.msg: GameMessage = GameMessage("OK")
+        self.possible_messages: tuple[str, ...] = ()
+        """Possible messages to send."""
+        self.msg: GameMessage = GameMessage.cached("OK")
         """Message to send."""
     
+    def clone(self, players: dict[str, "PlayerSim"]) -> "PlayerSim":
+        """
+        Returns an independent copy of the player, attached to another dictionary of players.
+
+        Arguments:
+            players {dict[str, PlayerSim]} -- dictionary of players the copy belongs to
+
+        Returns:
+            PlayerSim -- copy of the player
+        """
+        player = PlayerSim.__new__(PlayerSim)
+        player.id = self.id
+        player.players = players
+        player.coins = self.coins
+        player.deck = self.deck.copy()
+        player.exchange_cards = self.exchange_cards.copy()
+        player.ready = self.ready
+        player.alive = self.alive
+        player.turn = self.turn
+        player.replied = self.replied
+        player.was_announced = self.was_announced
+        player.tag = self.tag
+        player.state = self.state
+        player.possible_messages = self.possible_messages
+        player.msg = self.msg
+        return player
+
     def set_state(self, state: PlayerState):
         """Sets the state of the player and generates possible messages for that state."""
         self.state = state
         self.possible_messages = self.generate_responses()
     
-    def generate_responses(self):
-        """Generates a list of possible messages to send."""
-        messages = []
-
+    def generate_responses(self) -> tuple[str, ...]:
+        """Returns the possible messages to send, read from the cached move tables."""
         # If the player is dead or can't reply, they can't send any messages
         if not self.alive or self.state == PlayerState.IDLE:
-            return messages
-            
-        # Wait for all players to be ready
-        if self.state == PlayerState.START:
-            messages.append(game_proto.READY())
-        
-        elif self.state == PlayerState.R_MY_TURN:
-            if self.coins < COUP_COINS_THRESHOLD:
-                
-                messages.append(game_proto.ACT(self.id, INCOME))
-                messages.append(game_proto.ACT(self.id, FOREIGN_AID))
-                messages.append(game_proto.ACT(self.id, TAX))
-                messages.append(game_proto.ACT(self.id, EXCHANGE))
-                
-                for target in self.players.values():
-                    if target != self and target.alive:
-                        messages.append(game_proto.ACT(self.id, STEAL, target.id))
-                
-                if self.coins >= ASSASSINATION_COST:
-                    for target in self.players.values():
-                        if target != self and target.alive:
-                            messages.append(game_proto.ACT(self.id, ASSASSINATE, target.id))
-            
-            if self.coins >= COUP_COST:
-                for target in self.players.values():
-                    if target != self and target.alive:
-                        messages.append(game_proto.ACT(self.id, COUP, target.id))
-                
-        elif self.state == PlayerState.R_OTHER_TURN:
-            messages.append(game_proto.OK())
-                
-        elif self.state == PlayerState.R_FAID:
-            messages.append(game_proto.OK())
-            messages.append(game_proto.BLOCK(self.id, DUKE))
-                
-        elif self.state == PlayerState.R_INCOME:
-            messages.append(game_proto.OK())
+            return ()
 
-        elif self.state == PlayerState.R_EXCHANGE:
-            messages.append(game_proto.OK())
-            messages.append(game_proto.CHAL(self.id))
-                
-        elif self.state == PlayerState.R_TAX:
-            messages.append(game_proto.OK())
-            messages.append(game_proto.CHAL(self.id))
-                
-        elif self.state == PlayerState.R_ASSASS_ME:
-            messages.append(game_proto.CHAL(self.id))
-            messages.append(game_proto.BLOCK(self.id, CONTESSA))
-            messages.append(game_proto.OK())
-                
-        elif self.state == PlayerState.R_ASSASS:
-            messages.append(game_proto.OK())
-            messages.append(game_proto.CHAL(self.id))
-                
-        elif self.state == PlayerState.R_STEAL_ME:
-            messages.append(game_proto.OK())
-            messages.append(game_proto.BLOCK(self.id, CAPTAIN))
-            messages.append(game_proto.BLOCK(self.id, AMBASSADOR))
-            messages.append(game_proto.CHAL(self.id))
-                
-        elif self.state == PlayerState.R_STEAL:
-            messages.append(game_proto.OK())
-            messages.append(game_proto.CHAL(self.id))
-                
-        elif self.state == PlayerState.R_COUP_ME:
-            for card in self.deck:
-                messages.append(game_proto.LOSE(self.id, card))
-                
-        elif self.state == PlayerState.R_COUP:
-            messages.append(game_proto.OK())
-                
-        elif self.state == PlayerState.R_BLOCK_FAID:
-            messages.append(game_proto.OK())
-            messages.append(game_proto.CHAL(self.id))
-                
-        elif self.state == PlayerState.R_BLOCK_ASSASS:
-            messages.append(game_proto.OK())
-            messages.append(game_proto.CHAL(self.id))
-                
-        elif self.state == PlayerState.R_BLOCK_STEAL_B:
-            messages.append(game_proto.OK())
-            messages.append(game_proto.CHAL(self.id))
-                
-        elif self.state == PlayerState.R_BLOCK_STEAL_C:
-            messages.append(game_proto.OK())
-            messages.append(game_proto.CHAL(self.id))
-                
-        elif self.state == PlayerState.R_CHAL_A:
-            messages.append(game_proto.OK())
-                
-        elif self.state == PlayerState.R_CHAL_B:
-            messages.append(game_proto.OK())
-                
-        elif self.state == PlayerState.R_CHAL_C:
-            messages.append(game_proto.OK())
-                
-        elif self.state == PlayerState.R_CHAL_D:
-            messages.append(game_proto.OK())
-                
-        elif self.state == PlayerState.R_CHAL_E:
-            messages.append(game_proto.OK())
-                
-        elif self.state == PlayerState.R_CHAL_MY_A:
-            for card in self.deck:
-                if card == ASSASSIN:
-                    messages.append(game_proto.SHOW(self.id, card))
-                else:
-                    messages.append(game_proto.LOSE(self.id, card))
-                
-        elif self.state == PlayerState.R_CHAL_MY_B:
-            for card in self.deck:
-                if card == AMBASSADOR:
-                    messages.append(game_proto.SHOW(self.id, card))
-                else:
-                    messages.append(game_proto.LOSE(self.id, card))
-                
-        elif self.state == PlayerState.R_CHAL_MY_C:
-            for card in self.deck:
-                if card == CAPTAIN:
-                    messages.append(game_proto.SHOW(self.id, card))
-                else:
-                    messages.append(game_proto.LOSE(self.id, card))
-                
-        elif self.state == PlayerState.R_CHAL_MY_D:
-            for card in self.deck:
-                if card == DUKE:
-                    messages.append(game_proto.SHOW(self.id, card))
-                else:
-                    messages.append(game_proto.LOSE(self.id, card))
-                
-        elif self.state == PlayerState.R_CHAL_MY_E:
-            for card in self.deck:
-                if card == CONTESSA:
-                    messages.append(game_proto.SHOW(self.id, card))
-                else:
-                    messages.append(game_proto.LOSE(self.id, card))
-                
-        elif self.state == PlayerState.R_LOSE:
-            messages.append(game_proto.OK())
-            
-        elif self.state == PlayerState.R_LOSE_ME:
-            for card in self.deck:
-                messages.append(game_proto.LOSE(self.id, card))
-                
+        if self.state == PlayerState.R_MY_TURN:
+            targets = tuple(target.id for target in self.players.values() if target is not self and target.alive)
+            return move_table(self.state, self.id, coin_bracket(self.coins), targets)
+        elif self.state == PlayerState.R_CHOOSE:
+            return move_table(self.state, self.id, hand=tuple(self.deck), exchange=tuple(self.exchange_cards))
         elif self.state == PlayerState.R_SHOW:
-            if self.tag == Tag.T_CHALLENGING:
-                for card in self.deck:
-                    messages.append(game_proto.LOSE(self.id, card)) 
+            return move_table(self.state, self.id, hand=tuple(self.deck), challenging=self.tag == Tag.T_CHALLENGING)
+        elif self.state in HAND_STATES:
+            return move_table(self.state, self.id, hand=tuple(self.deck))
+        return move_table(self.state, self.id)
+
+
+def clone_players(players: dict[str, PlayerSim]) -> dict[str, PlayerSim]:
+    """
+    Copies a dictionary of players. The copies reference the new dictionary instead of the original one.
+
+    Arguments:
+        players {dict[str, PlayerSim]} -- players to copy
+
+    Returns:
+        dict[str, PlayerSim] -- copied players, indexed by ID
+    """
+    clones: dict[str, PlayerSim] = {}
+    for id, player in players.items():
+        clones[id] = player.clone(clones)
+    return clones
+
+
+MOVE_TABLE_SIZE = 4096  # Maximum number of cached move tables
+
+HAND_STATES = frozenset((PlayerState.R_COUP_ME, PlayerState.R_LOSE_ME,
+                         PlayerState.R_CHAL_MY_A, PlayerState.R_CHAL_MY_B, PlayerState.R_CHAL_MY_C,
+                         PlayerState.R_CHAL_MY_D, PlayerState.R_CHAL_MY_E))
+"""States whose possible messages depend on the cards in the player's hand."""
+
+
+def coin_bracket(coins: int) -> int:
+    """
+    Returns the smallest number of coins that allows the same actions as _coins_.
+    Players in the same bracket have the same possible actions on their turn.
+    """
+    if coins >= COUP_COINS_THRESHOLD:
+        return COUP_COINS_THRESHOLD
+    if coins >= COUP_COST:
+        return COUP_COST
+    if coins >= ASSASSINATION_COST:
+        return ASSASSINATION_COST
+    return 0
+
+
+@lru_cache(maxsize=MOVE_TABLE_SIZE)
+def move_table(state: PlayerState, id: str, coins: int = 0, targets: tuple[str, ...] = (),
+               hand: tuple[str, ...] = (), exchange: tuple[str, ...] = (), challenging: bool = False) -> tuple[str, ...]:
+    """
+    Generates the possible messages a player can send.
+    Tables are cached, the least recently used ones are evicted once MOVE_TABLE_SIZE tables are stored.
+
+    Arguments:
+        state {PlayerState} -- state of the player
+        id {str} -- player ID
+
+    Keyword Arguments:
+        coins {int} -- coin bracket of the player, see coin_bracket() (default: 0)
+        targets {tuple[str, ...]} -- IDs of the other players that are alive (default: ())
+        hand {tuple[str, ...]} -- cards in the player's hand (default: ())
+        exchange {tuple[str, ...]} -- cards presented during an exchange (default: ())
+        challenging {bool} -- whether the player is challenging (default: False)
+
+    Returns:
+        tuple[str, ...] -- possible messages
+    """
+    messages = []
+
+    # Wait for all players to be ready
+    if state == PlayerState.START:
+        messages.append(game_proto.READY())
+
+    elif state == PlayerState.R_MY_TURN:
+        if coins < COUP_COINS_THRESHOLD:
+
+            messages.append(game_proto.ACT(id, INCOME))
+            messages.append(game_proto.ACT(id, FOREIGN_AID))
+            messages.append(game_proto.ACT(id, TAX))
+            messages.append(game_proto.ACT(id, EXCHANGE))
+
+            for target in targets:
+                messages.append(game_proto.ACT(id, STEAL, target))
+
+            if coins >= ASSASSINATION_COST:
+                for target in targets:
+                    messages.append(game_proto.ACT(id, ASSASSINATE, target))
+
+        if coins >= COUP_COST:
+            for target in targets:
+                messages.append(game_proto.ACT(id, COUP, target))
+
+    elif state == PlayerState.R_OTHER_TURN:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_FAID:
+        messages.append(game_proto.OK())
+        messages.append(game_proto.BLOCK(id, DUKE))
+
+    elif state == PlayerState.R_INCOME:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_EXCHANGE:
+        messages.append(game_proto.OK())
+        messages.append(game_proto.CHAL(id))
+
+    elif state == PlayerState.R_TAX:
+        messages.append(game_proto.OK())
+        messages.append(game_proto.CHAL(id))
+
+    elif state == PlayerState.R_ASSASS_ME:
+        messages.append(game_proto.CHAL(id))
+        messages.append(game_proto.BLOCK(id, CONTESSA))
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_ASSASS:
+        messages.append(game_proto.OK())
+        messages.append(game_proto.CHAL(id))
+
+    elif state == PlayerState.R_STEAL_ME:
+        messages.append(game_proto.OK())
+        messages.append(game_proto.BLOCK(id, CAPTAIN))
+        messages.append(game_proto.BLOCK(id, AMBASSADOR))
+        messages.append(game_proto.CHAL(id))
+
+    elif state == PlayerState.R_STEAL:
+        messages.append(game_proto.OK())
+        messages.append(game_proto.CHAL(id))
+
+    elif state == PlayerState.R_COUP_ME:
+        for card in hand:
+            messages.append(game_proto.LOSE(id, card))
+
+    elif state == PlayerState.R_COUP:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_BLOCK_FAID:
+        messages.append(game_proto.OK())
+        messages.append(game_proto.CHAL(id))
+
+    elif state == PlayerState.R_BLOCK_ASSASS:
+        messages.append(game_proto.OK())
+        messages.append(game_proto.CHAL(id))
+
+    elif state == PlayerState.R_BLOCK_STEAL_B:
+        messages.append(game_proto.OK())
+        messages.append(game_proto.CHAL(id))
+
+    elif state == PlayerState.R_BLOCK_STEAL_C:
+        messages.append(game_proto.OK())
+        messages.append(game_proto.CHAL(id))
+
+    elif state == PlayerState.R_CHAL_A:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_CHAL_B:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_CHAL_C:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_CHAL_D:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_CHAL_E:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_CHAL_MY_A:
+        for card in hand:
+            if card == ASSASSIN:
+                messages.append(game_proto.SHOW(id, card))
             else:
-                messages.append(game_proto.OK())
+                messages.append(game_proto.LOSE(id, card))
 
-        elif self.state == PlayerState.R_COINS:
-            messages.append(game_proto.OK())
+    elif state == PlayerState.R_CHAL_MY_B:
+        for card in hand:
+            if card == AMBASSADOR:
+                messages.append(game_proto.SHOW(id, card))
+            else:
+                messages.append(game_proto.LOSE(id, card))
 
-        elif self.state == PlayerState.R_DECK:
-            messages.append(game_proto.OK())
-            
-        elif self.state == PlayerState.R_CHOOSE:
-            options = self.deck + self.exchange_cards
-            
-            if len(self.deck) == 1:
-                for card in options:
-                    messages.append(game_proto.KEEP(card))
-            
-            elif len(self.deck) == 2:
-                for card1, card2 in permutations(options, 2):
-                    messages.append(game_proto.KEEP(card1, card2))
-        
-        elif self.state == PlayerState.R_PLAYER:
+    elif state == PlayerState.R_CHAL_MY_C:
+        for card in hand:
+            if card == CAPTAIN:
+                messages.append(game_proto.SHOW(id, card))
+            else:
+                messages.append(game_proto.LOSE(id, card))
+
+    elif state == PlayerState.R_CHAL_MY_D:
+        for card in hand:
+            if card == DUKE:
+                messages.append(game_proto.SHOW(id, card))
+            else:
+                messages.append(game_proto.LOSE(id, card))
+
+    elif state == PlayerState.R_CHAL_MY_E:
+        for card in hand:
+            if card == CONTESSA:
+                messages.append(game_proto.SHOW(id, card))
+            else:
+                messages.append(game_proto.LOSE(id, card))
+
+    elif state == PlayerState.R_LOSE:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_LOSE_ME:
+        for card in hand:
+            messages.append(game_proto.LOSE(id, card))
+
+    elif state == PlayerState.R_SHOW:
+        if challenging:
+            for card in hand:
+                messages.append(game_proto.LOSE(id, card))
+        else:
             messages.append(game_proto.OK())
-        
-        return messages
+
+    elif state == PlayerState.R_COINS:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_DECK:
+        messages.append(game_proto.OK())
+
+    elif state == PlayerState.R_CHOOSE:
+        options = hand + exchange
+
+        if len(hand) == 1:
+            for card in options:
+                messages.append(game_proto.KEEP(card))
+
+        elif len(hand) == 2:
+            for card1, card2 in permutations(options, 2):
+                messages.append(game_proto.KEEP(card1, card2))
+
+    elif state == PlayerState.R_PLAYER:
+        messages.append(game_proto.OK())
+
+    return tuple(messages)
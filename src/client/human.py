@@ -15,16 +15,16 @@ class Human(InformedPlayer):
         
     def choose_message(self):
         if len(self.possible_messages) == 1:
-            self.msg = GameMessage(self.possible_messages[0])
+            self.msg = GameMessage.cached(self.possible_messages[0])
             return
         print("Choose a reply: ", end="")
-        print(str(self.possible_messages).strip("[]").replace("'", ""))
+        print(", ".join(self.possible_messages))
         msg = input("> ").strip()
         while msg not in self.possible_messages:
             print("Invalid reply. Choose again:")
-            print(str(self.possible_messages).strip("[]").replace("'", ""))
+            print(", ".join(self.possible_messages))
             msg = input("> ").strip()
-        self.msg = GameMessage(msg)
+        self.msg = GameMessage.cached(msg)
 
 
 class KeepAlive(Terminal):
@@ -1,9 +1,11 @@
 from proto.game_proto import game_proto, GameMessage
-from proto.game_proto import ACT, OK, CHAL, BLOCK, SHOW, LOSE, COINS, DECK, CHOOSE, KEEP, HELLO, PLAYER, START, READY, TURN, EXIT, DEAD, ILLEGAL
-from .game.state_machine import PlayerState, Tag, PlayerSim
+from proto.game_proto import ACT, OK, CHAL, BLOCK, SHOW, LOSE, COINS, DECK, CHOOSE, KEEP, HELLO, PLAYER, START, READY, TURN, EXIT, DEAD, ILLEGAL, RESET
+from .game.state_machine import PlayerState, Tag, PlayerSim, clone_players
 from .game.core import INCOME, FOREIGN_AID, COUP, TAX, ASSASSINATE, STEAL, EXCHANGE, ACTIONS, TARGET_ACTIONS  # Actions
 from .game.core import ASSASSIN, AMBASSADOR, CAPTAIN, DUKE, CONTESSA, CHARACTERS  # Characters
 from terminal.terminal import Terminal
+from utils.latency import latency
+from utils.hotlog import hotlog
 import queue, random
 from loguru import logger
 
@@ -22,10 +24,13 @@ class Player:
         self.term = Terminal(self.checkout) if terminal is None else terminal
         """Terminal used to write messages manually."""
     
-    def sender(self):
+    def sender(self, timeout: float | None = CHECKOUT_TIMEOUT):
         """
         Gets a message from checkout and returns it.
 
+        Keyword Arguments:
+            timeout {float | None} -- maximum time to wait for a message, 0 to only take a queued one (default: CHECKOUT_TIMEOUT)
+
         Returns:
             _str_ | None -- message
         """
@@ -35,7 +40,7 @@ class Player:
                 logger.info("Terminal closed.")
                 raise KeyboardInterrupt
             
-            return self.checkout.get(timeout=CHECKOUT_TIMEOUT)
+            return self.checkout.get(timeout=timeout)
         except queue.Empty:
             print(end="")   # weird way to update the console buffer
             return None
@@ -70,31 +75,40 @@ class InformedPlayer(Player, PlayerSim):
         is_root (bool): Flag for whether the player is the root player or not.
         msg (GameMessage): Message to be sent to the server.
         players (dict[str, PlayerSim]): Dictionary of players in the game.
-        possible_messages (list[str]): List of possible messages the player can send.
+        possible_messages (tuple[str, ...]): Possible messages the player can send.
         history (list[GameMessage]): History of received messages.
         ready (bool): Flag for whether the player is ready or not.
         replied (bool): Flag for whether the player has replied to the last message or not.
         state (PlayerState): State of the player.
         tag (Tag): Tag for the player. Used to identify the player in the game.
+        rng (Random): Random number generator used to make decisions. Seed it to replay a game.
         term (Terminal): Terminal used to write messages manually.
         terminate_after_death (bool): Flag for whether the player should terminate after its own death.
         turn (bool): Flag for whether it is the player's turn or not.
     """
 
-    def __init__(self, terminal: Terminal | None = None):
+    def __init__(self, terminal: Terminal | None = None, rng: random.Random | None = None):
         Player.__init__(self, terminal)
         PlayerSim.__init__(self, '0', {})
+        self.rng = rng if rng is not None else random.Random()
+        """Random number generator used to make decisions. Seed it to replay a game."""
         self.terminate_after_death = False
         """Flag for whether the player should terminate after its own death. \n\n- True: The player will terminate when dead. \n- False: The player will continue to receive messages without replying."""
-        self.history: list[GameMessage] = [GameMessage(OK)]
+        self.history: list[GameMessage] = [GameMessage.cached(OK)]
         """History of received messages. Current received message is always the last one."""
-        self.msg = GameMessage(HELLO)
+        self.sent = 0.0
+        """Time the last message was sent, 0.0 when latency is not recorded."""
+        self.msg = GameMessage.cached(HELLO)
         self.send_message(self.msg)
 
     def receive(self, message: str) -> int:
+        start = latency.start()
+        latency.stop("bot.wait", self.sent)
+        self.sent = 0.0
         try:
-            logger.success("RECV - " + str(message))
-            self.history.append(GameMessage(message))
+            if hotlog.enabled:
+                logger.success("RECV - {}", message)
+            self.history.append(GameMessage.cached(message))
             self.pre_update_state()
             if self.state == PlayerState.IDLE or self.history[-1].command == DEAD:
                 pass
@@ -102,16 +116,22 @@ class InformedPlayer(Player, PlayerSim):
                 logger.info("Game Over, terminating bot.")
                 return 1
             else:
-                logger.debug(f"State: {self.state}")
-                logger.debug(f"Possible messages: {self.possible_messages}")
+                if hotlog.enabled:
+                    logger.debug("State: {}", self.state)
+                    logger.debug("Possible messages: {}", self.possible_messages)
+                choice = latency.start()
                 self.choose_message()
+                latency.stop("bot.choose", choice)
                 self.post_update_state()
                 self.send_message(self.msg)
-                logger.success("SEND - " + str(self.msg))
+                if hotlog.enabled:
+                    logger.success("SEND - {}", self.msg)
         except IndexError:
             logger.error(f"No possible messages.")
         except Exception as e:
             logger.exception(f"Error in receive: " + str(e))
+        finally:
+            latency.stop("bot.receive", start)
         return 0
 
     def pre_update_state(self) -> None:
@@ -128,6 +148,10 @@ class InformedPlayer(Player, PlayerSim):
             self.set_state(PlayerState.END)
             logger.info(f"Received EXIT message.")
         
+        elif current_msg.command == RESET:
+            self.reset_game()
+            logger.info(f"Received RESET message.")
+        
         elif current_msg.command == DEAD:
             # Don't change state
             if current_msg.ID1 is not None:
@@ -350,14 +374,42 @@ class InformedPlayer(Player, PlayerSim):
         elif current_msg.command == ILLEGAL:
             # keep in the same state
             logger.warning(f"Received ILLEGAL message.")
-            for msg in self.possible_messages:
-                if msg == str(self.msg):
-                    self.possible_messages.remove(msg)
+            illegal = str(self.msg)
+            self.possible_messages = tuple(msg for msg in self.possible_messages if msg != illegal)
             
         else:
             self.set_state(PlayerState.IDLE)
             logger.error(f"Invalid command: {current_msg.command}")
     
+    def fork(self) -> "InformedPlayer":
+        """
+        Returns an independent copy of the bot, in the same state and with a copy of its random number generator,
+        so both make the same decisions from now on. The copy has its own, empty, checkout queue.
+
+        Returns:
+            InformedPlayer -- copy of the bot, of the same class
+        """
+        bot = type(self).__new__(type(self))
+        bot.__dict__.update(self.__dict__)
+        for name in PlayerSim.__slots__:
+            setattr(bot, name, getattr(self, name))
+        bot.players = clone_players(self.players)
+        bot.deck = self.deck.copy()
+        bot.exchange_cards = self.exchange_cards.copy()
+        bot.history = self.history.copy()
+        bot.rng = random.Random.__new__(random.Random)  # Not seeded, the state is copied right away
+        bot.rng.setstate(self.rng.getstate())
+        bot.checkout = queue.SimpleQueue()
+        return bot
+
+    def reset_game(self) -> None:
+        """
+        Forgets the state of the finished game, to play the next game of a series over the same connection.
+        The player waits in IDLE until the root sends its ID again.
+        """
+        PlayerSim.__init__(self, '0', {})
+        self.history = [GameMessage.cached(OK), self.history[-1]]
+    
     def choose_message(self) -> None:
         """
         Called when the player is in a state where it can choose a message to send. 
@@ -401,4 +453,5 @@ class InformedPlayer(Player, PlayerSim):
         """
         self.msg = message
         self.checkout.put(str(self.msg))
+        self.sent = latency.start()
  
@@ -1,16 +1,61 @@
-from proto.network_proto import network_proto, NetworkMessage
+from proto.network_proto import trusted_network_proto, NetworkMessage
 from proto.network_proto import ALL, SINGLE, EXCEPT, DISCONNECT
-from proto.game_proto import game_proto, GameMessage
+from proto.game_proto import trusted_game_proto, GameMessage
 from proto.game_proto import ACT, OK, CHAL, BLOCK, SHOW, LOSE, COINS, DECK, CHOOSE, KEEP, HELLO, PLAYER, START, READY, TURN, EXIT, ILLEGAL
 from .game.core import *
-from .game.state_machine import PlayerState, Tag, PlayerSim
+from .game.state_machine import PlayerState, Tag, PlayerSim, clone_players
+from .game.deck import CourtDeck
 from .player import Player
-from state_machine.state import State, StateMachine
+from state_machine.state import State, StateMachine, MAX_STEPS
+from terminal.terminal import Terminal
+from utils.latency import latency
+from utils.hotlog import hotlog
 import random
-import itertools
 from loguru import logger
 
 
+# Families of the root states, as bit flags of the states, so the state of the game is tested with a single AND
+S_SETUP = 1  # IDLE and START: players register and get ready
+S_ACTION = 2  # Players reply to an action that can be blocked or challenged
+S_BLOCK = 4  # Players reply to a block
+S_CHOOSE = 8  # The exchanging player chooses the cards to keep
+ACTION_STATES = ("FAID", "TAX", "EXCHANGE", "ASSASS", "STEAL")
+
+
+def state_family(name: str) -> int:
+    """
+    Returns the family flags of a root state.
+
+    Arguments:
+        name {str} -- name of the state
+
+    Returns:
+        int -- S_* flags, 0 if the state is in no family
+    """
+    if name in ("IDLE", "START"):
+        return S_SETUP
+    if name in ACTION_STATES:
+        return S_ACTION
+    if name.endswith("BLOCK"):
+        return S_BLOCK
+    if name == "EXCHANGE_CHOOSE":
+        return S_CHOOSE
+    return 0
+
+
+class RootSnapshot:
+    """
+    State of the game played by a Root, taken by Root.snapshot() and brought back by Root.restore().
+
+    The snapshot owns its copies of the players and of the deck, so it can be restored any number of times,
+    into the root it was taken from or into another one. Players are referenced by ID and states by their
+    compiled ID, so no object of the original root is shared.
+    """
+
+    __slots__ = ("players", "deck", "waiting", "turn_id", "turn_msg", "turn_blocker", "turn_challenger", "blocker_challenger",
+                 "player_order", "turn_index", "state_id", "previous_state_id", "games_played", "seated", "rng_state")
+
+
 class Root(Player):
     """
     Root player class.
@@ -18,22 +63,42 @@ class Root(Player):
     This player sends and receives addressed messages, e.g. orig@message
     """
 
-    def __init__(self, mode: str = "manual"):
-        super().__init__()
+    def __init__(self, mode: str = "manual", terminal: Terminal | None = None, num_players: int = MAX_PLAYERS, rng: random.Random | None = None,
+                 series: int = 1):
+        super().__init__(terminal)
         self.is_root = True
+        self.rng = rng if rng is not None else random.Random()
+        """Random number generator used to shuffle the player order and draw cards. Seed it to replay a game."""
         self.players: dict[str, PlayerSim] = {}
+        self.waiting = 0
+        """Players whose reply is expected, as a bit mask with bit int(ID) set for each player. 0 once every player replied."""
         self.turn_id = None
-        self.deck = [*CHARACTERS, *CHARACTERS, *CHARACTERS]
+        self.deck = CourtDeck()
+        """Court deck, 3 cards of each character at the start of the game."""
         self.sm = RootStateMachine(self)
         self.turn_challenger = None
         self.turn_blocker = None
         self.blocker_challenger = None
         self.turn_msg = None
         self.mode = mode
+        self.num_players = num_players
+        """Number of registered players needed to start the game in auto mode."""
+        self.series = series
+        """Number of games played back to back over the same connections. Players are sent RESET between games and EXIT after the last one."""
+        self.games_played = 0
+        self.seated = 0
+        """Number of players seated when the current game started. The series goes on only if they are all still there."""
         self.player_order: list[str] = []
-        self.players_cycle = itertools.cycle(self.player_order)
+        """IDs of the players, in the order they take their turns."""
+        self.turn_index = -1
+        """Position in player_order of the last player who took a turn, -1 before the first turn."""
+        self.batch: list[str] | None = None
+        """Envelopes sent while handling the received messages, put in checkout as a single write. None outside receive()."""
+        self.flushed = 0.0
+        """Time the last batch was put in checkout, 0.0 when latency is not recorded."""
     
     def receive(self, net_msg: str) -> int:
+        self.start_batch()
         try:
             nets = NetworkMessage.from_string(net_msg)
             for net in nets:
@@ -41,19 +106,77 @@ class Root(Player):
                     return 1
         except SyntaxError:
             logger.warning(f"Invalid message format.")
+        finally:
+            self.flush_batch()
         return 0
+
+    def receive_decoded(self, addr: str, msg: str) -> int:
+        """
+        Handles a game message already taken out of its network message, e.g. decoded from a binary frame.
+
+        Arguments:
+            addr {str} -- ID of the player that sent the message
+            msg {str} -- game message
+
+        Returns:
+            int -- 1 if the root wants to terminate, 0 otherwise.
+        """
+        self.start_batch()
+        start = latency.start()
+        try:
+            return self.receive_from(addr, msg)
+        finally:
+            latency.stop("root.receive", start)
+            self.flush_batch()
+
+    def start_batch(self):
+        """Starts a batch of envelopes, for the messages received now."""
+        latency.stop("root.wait", self.flushed)
+        self.flushed = 0.0
+        self.batch = []
+
+    def flush_batch(self):
+        """Puts the envelopes of the current batch in checkout, joined into a single write, and ends the batch."""
+        if self.batch:
+            self.checkout.put("".join(self.batch))
+            self.flushed = latency.start()
+        self.batch = None
+
+    def put_envelope(self, envelope: str):
+        """Adds an envelope to the current batch, or puts it in checkout if there is no batch."""
+        if self.batch is None:
+            self.checkout.put(envelope)
+        else:
+            self.batch.append(envelope)
        
     def receive_single(self, net: NetworkMessage) -> int:
         if net.msg is None or net.addr is None:
             logger.warning(f"Received {net}")
             return 0
-        
+        start = latency.start()
+        try:
+            return self.receive_from(net.addr, net.msg)
+        finally:
+            latency.stop("root.receive", start)
+    
+    def receive_from(self, addr: str, msg: str) -> int:
+        """
+        Handles a game message sent by a player.
+
+        Arguments:
+            addr {str} -- ID of the player that sent the message
+            msg {str} -- game message (without the network address)
+
+        Returns:
+            int -- 1 if the root wants to terminate, 0 otherwise.
+        """
         # Check for disconnection message
-        if net.msg == DISCONNECT:
+        if msg == DISCONNECT:
             # Remove player from the game
-            logger.info(f"Player {net.addr} disconnected.")
-            self.players[net.addr].alive = False
-            self.players.pop(net.addr, None)
+            logger.info(f"Player {addr} disconnected.")
+            self.players[addr].alive = False
+            self.players.pop(addr, None)
+            self.waiting &= ~(1 << int(addr))
             if self.game_over() and self.sm.current_state.name != "IDLE":
                 if self.sm.current_state.name == "END":
                     if sum([player.alive for player in self.players.values()]) == 0:
@@ -65,39 +188,44 @@ class Root(Player):
         
         # Parse the message
         try:
-            game = GameMessage(net.msg)
+            game = GameMessage.cached(msg)
         except SyntaxError:
             # Player message breaks Protocol
-            logger.warning(f"Player {net.addr}: {net.msg}")
+            logger.warning(f"Player {addr}: {msg}")
             
-            self.send_illegal(net.addr)
+            self.send_illegal(addr)
             return 0
         
-        logger.success(f"Player {net.addr}: {net.msg}")
+        if hotlog.enabled:
+            logger.success("Player {}: {}", addr, msg)
         
         # Create player state
         if game.command == HELLO:
-            if net.addr in self.players.keys() or len(self.players) == MAX_PLAYERS or self.sm.current_state.name not in ["IDLE", "START"]:
+            if addr in self.players.keys() or len(self.players) == MAX_PLAYERS or not self.sm.current_state.flags & S_SETUP:
                 # Player already exists or game is full
-                self.send_illegal(net.addr)
+                self.send_illegal(addr)
             else:
                 # Add new player
                 # TODO: assign first unused ID instead of using the address
-                self.players[net.addr] = (PlayerSim(net.addr, self.players))
+                self.players[addr] = (PlayerSim(addr, self.players))
                 self.update_player_order()
-                self.send_single_and_update(game_proto.PLAYER(str(net.addr)), net.addr, PlayerState.R_PLAYER)
+                self.send_single_and_update(trusted_game_proto.PLAYER(str(addr)), addr, PlayerState.R_PLAYER)
             return 0
         
         # Top-level state machine
-        self.update_player_state(net.addr, game)
-        if self.all_players_replied():
-            self.sm.update()
-            logger.debug(f"Current state: {self.sm.current_state.name}")
+        self.update_player_state(addr, game)
+        # Follow the transitions until the machine waits for replies again
+        steps = self.sm.run(self.all_players_replied)
+        if steps == MAX_STEPS:
+            logger.error(f"State machine did not settle, stopped in state {self.sm.current_state.name}.")
+        elif steps and hotlog.enabled:
+            logger.debug("Current state: {}", self.sm.current_state.name)
 
         # self.debug_player_states()
         # self.debug_player_tags()
         # self.debug_player_possible_messages()
-        self.debug_players()
+        if hotlog.enabled:
+            self.debug_players()
         return 0
     
 ### Player States
@@ -107,22 +235,23 @@ class Root(Player):
         if player is None:
             return
         
-        if str(m) not in player.possible_messages or self.sm.current_state.name not in ["IDLE", "START"] and player.replied:
+        family = self.sm.current_state.flags
+        if str(m) not in player.possible_messages or not family & S_SETUP and player.replied:
             self.send_illegal(orig)
             return
-        player.replied = True
+        self.dont_expect_reply_from(orig)
         
         # Store the message
         player.msg = m
 
-        if self.sm.current_state.name in ["IDLE", "START"]:  # Initial state
+        if family & S_SETUP:  # Initial state
             if m.command == READY:
                 player.ready = True
             if player.state == PlayerState.R_PLAYER:
                 player.set_state(PlayerState.START)
                 return
             
-        elif self.sm.current_state.name in ("FAID", "TAX", "EXCHANGE", "ASSASS", "STEAL"):  # Waiting for players to reply to the action
+        elif family & S_ACTION:  # Waiting for players to reply to the action
             player.tag = Tag.T_NONE
             if m.command == BLOCK:
                 if self.turn_blocker is None:
@@ -143,7 +272,7 @@ class Root(Player):
                 else:
                     player.tag = Tag.T_NONE
             
-        elif self.sm.current_state.name.endswith("BLOCK"):   # Waiting for players to reply to the block
+        elif family & S_BLOCK:   # Waiting for players to reply to the block
             if m.command == CHAL:
                 if self.blocker_challenger is None:
                     player.tag = Tag.T_CHALLENGING
@@ -151,7 +280,7 @@ class Root(Player):
                 else:
                     player.tag = Tag.T_NONE
                                 
-        elif self.sm.current_state.name == "EXCHANGE_CHOOSE":
+        elif family & S_CHOOSE:
             if player.state == PlayerState.R_CHOOSE:
                 hand = player.deck + player.exchange_cards
                 if m.card1 is not None:
@@ -175,19 +304,19 @@ class Root(Player):
         for player in self.players.values():
             if player.alive:
                 player.replied = False
+                self.waiting |= 1 << int(player.id)
     
     def expect_reply_from(self, id: str):
         if self.players[id].alive:
             self.players[id].replied = False
+            self.waiting |= 1 << int(id)
     
     def dont_expect_reply_from(self, id: str):
         self.players[id].replied = True
+        self.waiting &= ~(1 << int(id))
     
     def all_players_replied(self):
-        for player in self.players.values():
-            if not player.replied:
-                return False
-        return True
+        return not self.waiting
     
     def set_all_states(self, state: PlayerState):
         for player in self.players.values():
@@ -213,6 +342,10 @@ class Root(Player):
                 logger.debug(f"ID{player.id}: {player.tag}")
 
     def debug_players(self):
+        # Built only if a sink takes debug messages
+        logger.opt(lazy=True).debug("{}", self.describe_players)
+
+    def describe_players(self) -> str:
         string: str = ""
         for player in self.players.values():
             if player.alive:
@@ -223,12 +356,12 @@ class Root(Player):
     Coins: {player.coins}\n\
     Msg: {player.msg}\n\
     Possible messages: {player.possible_messages}\n")
-        logger.debug(string)
+        return string
 
 ### State Machine Conditions
     
     def auto_start(self):
-        return self.mode == "auto" and len(self.players) == MAX_PLAYERS
+        return self.mode == "auto" and len(self.players) == self.num_players
     
     def all_players_ready(self):
         return all([player.alive and player.ready for player in self.players.values()])
@@ -287,23 +420,24 @@ class Root(Player):
 ### State Machine Actions
     
     def send_start(self):
-        self._send_all(game_proto.START())
+        self._send_all(trusted_game_proto.START())
     
     def setup_decks(self):
+        self.seated = len(self.players)
         for player in self.players.values():
             self.generate_player_cards(player)
-            self.send_single_and_update(game_proto.DECK(player.deck[0], player.deck[1]), player.id, PlayerState.R_DECK)
+            self.send_single_and_update(trusted_game_proto.DECK(player.deck[0], player.deck[1]), player.id, PlayerState.R_DECK)
     
     def setup_coins(self):
         for player in self.players.values():
             player.coins = STARTING_COINS
-            self.send_single_and_update(game_proto.COINS(player.id, player.coins), player.id, PlayerState.R_COINS)
+            self.send_single_and_update(trusted_game_proto.COINS(player.id, player.coins), player.id, PlayerState.R_COINS)
     
     def setup_players(self):
         for player in self.players.values():
             if not player.was_announced:
                 player.was_announced = True
-                self.send_except_and_update(game_proto.PLAYER(player.id), player.id, PlayerState.R_PLAYER)
+                self.send_except_and_update(trusted_game_proto.PLAYER(player.id), player.id, PlayerState.R_PLAYER)
                 break
     
     def send_turn(self):
@@ -313,7 +447,7 @@ class Root(Player):
             return
         
         self.set_all_states(PlayerState.R_OTHER_TURN)
-        self.send_all_and_update(game_proto.TURN(self.turn_id), PlayerState.R_OTHER_TURN)
+        self.send_all_and_update(trusted_game_proto.TURN(self.turn_id), PlayerState.R_OTHER_TURN)
         self.players[self.turn_id].set_state(PlayerState.R_MY_TURN)
         logger.success(f"New Turn: Player {self.turn_id}")
     
@@ -380,11 +514,11 @@ class Root(Player):
     def steal_take_coins(self):
         if self.turn_id is not None and self.turn_msg is not None and self.turn_msg.ID2 is not None:
             self.players[self.turn_msg.ID2].coins -= min(MAX_COIN_STEAL, self.players[self.turn_msg.ID2].coins)
-            self.send_all_and_update(game_proto.COINS(self.turn_msg.ID2, self.players[self.turn_msg.ID2].coins), PlayerState.R_COINS)
+            self.send_all_and_update(trusted_game_proto.COINS(self.turn_msg.ID2, self.players[self.turn_msg.ID2].coins), PlayerState.R_COINS)
     
     def send_turn_coins(self):
         if self.turn_id is not None:
-            self.send_all_and_update(game_proto.COINS(self.turn_id, self.players[self.turn_id].coins), PlayerState.R_COINS)
+            self.send_all_and_update(trusted_game_proto.COINS(self.turn_id, self.players[self.turn_id].coins), PlayerState.R_COINS)
     
     def send_foreign_aid_block(self):
         if self.turn_blocker is not None:
@@ -438,7 +572,7 @@ class Root(Player):
     def send_choose(self):
         if self.turn_id is not None:
             self.players[self.turn_id].exchange_cards = [self.take_card(self.deck), self.take_card(self.deck)]
-            self.send_single_and_update(game_proto.CHOOSE(*self.players[self.turn_id].exchange_cards), self.turn_id, PlayerState.R_CHOOSE)
+            self.send_single_and_update(trusted_game_proto.CHOOSE(*self.players[self.turn_id].exchange_cards), self.turn_id, PlayerState.R_CHOOSE)
     
     def assassinate_pay(self):
         if self.turn_id is not None:
@@ -450,7 +584,7 @@ class Root(Player):
     
     def assassinate_kill(self):
         if self.turn_msg is not None and self.turn_msg.ID2 is not None:
-            self.send_single_and_update(game_proto.LOSE(self.turn_msg.ID2), self.turn_msg.ID2, PlayerState.R_LOSE_ME)
+            self.send_single_and_update(trusted_game_proto.LOSE(self.turn_msg.ID2), self.turn_msg.ID2, PlayerState.R_LOSE_ME)
     
     def target_lose(self):
         if self.turn_msg is not None and self.turn_msg.ID2 is not None:
@@ -484,17 +618,94 @@ class Root(Player):
     
     def turn_replace_deck(self):
         if self.turn_id is not None:
-            self.send_single_and_update(game_proto.DECK(*self.players[self.turn_id].deck), self.turn_id, PlayerState.R_DECK)
+            self.send_single_and_update(trusted_game_proto.DECK(*self.players[self.turn_id].deck), self.turn_id, PlayerState.R_DECK)
     
     def blocker_replace_deck(self):
         if self.turn_blocker is not None:
-            self.send_single_and_update(game_proto.DECK(*self.turn_blocker.deck), self.turn_blocker.id, PlayerState.R_DECK)
+            self.send_single_and_update(trusted_game_proto.DECK(*self.turn_blocker.deck), self.turn_blocker.id, PlayerState.R_DECK)
     
     def end_game(self):
-        self.send_all_and_update(game_proto.EXIT(), PlayerState.END)
+        self.games_played += 1
+        rematch = self.games_played < self.series and len(self.players) == self.seated
+        self.send_all_and_update(trusted_game_proto.RESET() if rematch else trusted_game_proto.EXIT(), PlayerState.END)
         for player in self.players.values():
             if player.alive:
                 logger.success(f"🏆 Player {player.id} wins!")
+        if latency.enabled:
+            latency.dump(reset=True)
+        if rematch:
+            self.new_game()
+
+    def new_game(self):
+        """
+        Starts the next game of the series with the same players.
+        The players, the deck, the turn and the state machine are reset, then every player is sent its ID again, as after HELLO.
+        """
+        logger.info(f"Starting game {self.games_played + 1}/{self.series}.")
+        addrs = list(self.players.keys())
+        self.players = {}
+        self.waiting = 0
+        for addr in addrs:
+            self.players[addr] = PlayerSim(addr, self.players)
+        self.deck = CourtDeck()
+        self.turn_id = None
+        self.turn_msg = None
+        self.reset_turn()
+        self.sm.reset()
+        self.update_player_order()
+        for addr in addrs:
+            self.send_single_and_update(trusted_game_proto.PLAYER(str(addr)), addr, PlayerState.R_PLAYER)
+
+    def snapshot(self) -> RootSnapshot:
+        """
+        Takes a snapshot of the game: players, deck, turn order, pending replies, state machine and random generator.
+        Messages already sent are not part of it.
+
+        Returns:
+            RootSnapshot -- snapshot, to be passed to restore()
+        """
+        snapshot = RootSnapshot()
+        snapshot.players = clone_players(self.players)
+        snapshot.deck = self.deck.copy()
+        snapshot.waiting = self.waiting
+        snapshot.turn_id = self.turn_id
+        snapshot.turn_msg = self.turn_msg
+        snapshot.turn_blocker = None if self.turn_blocker is None else self.turn_blocker.id
+        snapshot.turn_challenger = None if self.turn_challenger is None else self.turn_challenger.id
+        snapshot.blocker_challenger = None if self.blocker_challenger is None else self.blocker_challenger.id
+        snapshot.player_order = self.player_order  # Replaced, never modified, by update_player_order()
+        snapshot.turn_index = self.turn_index
+        snapshot.state_id = self.sm.current_state.id
+        snapshot.previous_state_id = None if self.sm.previous_state is None else self.sm.previous_state.id
+        snapshot.games_played = self.games_played
+        snapshot.seated = self.seated
+        snapshot.rng_state = self.rng.getstate()
+        return snapshot
+
+    def restore(self, snapshot: RootSnapshot):
+        """
+        Brings the game back to a snapshot, without executing any state entry or exit action.
+        The snapshot is left untouched, so it can be restored again, e.g. to play several continuations of the same game.
+        Reseed the random generator after restoring to play a different continuation.
+
+        Arguments:
+            snapshot {RootSnapshot} -- snapshot taken by snapshot(), on this root or on another one
+        """
+        self.players = clone_players(snapshot.players)
+        self.deck = snapshot.deck.copy()
+        self.waiting = snapshot.waiting
+        self.turn_id = snapshot.turn_id
+        self.turn_msg = snapshot.turn_msg
+        self.turn_blocker = self.players.get(snapshot.turn_blocker)
+        self.turn_challenger = self.players.get(snapshot.turn_challenger)
+        self.blocker_challenger = self.players.get(snapshot.blocker_challenger)
+        self.player_order = snapshot.player_order
+        self.turn_index = snapshot.turn_index
+        self.sm.current_state = self.sm.by_id[snapshot.state_id]
+        self.sm.previous_state = None if snapshot.previous_state_id is None else self.sm.by_id[snapshot.previous_state_id]
+        self.games_played = snapshot.games_played
+        self.seated = snapshot.seated
+        self.rng.setstate(snapshot.rng_state)
     
 ### Game methods
 
@@ -506,7 +717,7 @@ class Root(Player):
             return
         player.deck = [card1, card2]
         
-    def replace_card(self, deck: list[str], card: str):
+    def replace_card(self, deck: CourtDeck, card: str):
         self.put_card(deck, card)
         return self.take_card(deck)
     
@@ -519,13 +730,11 @@ class Root(Player):
         if new_card is not None:
             player.deck.append(new_card)
     
-    def put_card(self, deck: list[str], card: str):
-        deck.append(card)
+    def put_card(self, deck: CourtDeck, card: str):
+        deck.put(card)
 
-    def take_card(self, deck: list[str]):
-        if deck:  # Check if deck is not empty
-            return deck.pop(random.randint(0, len(deck) - 1))
-        raise IndexError("Deck is empty, cannot take card.")
+    def take_card(self, deck: CourtDeck):
+        return deck.take(self.rng)
     
     def next_player_turn(self):
         # Find current player
@@ -538,7 +747,7 @@ class Root(Player):
         if current_player_id is None:
             # no current turn, just pick the next in cycle
             while True:
-                next_id = next(self.players_cycle)
+                next_id = self.next_in_order()
                 if self.players[next_id].alive:
                     self.turn_id = next_id
                     self.players[next_id].turn = True
@@ -549,12 +758,17 @@ class Root(Player):
 
         # find next alive player
         while True:
-            next_id = next(self.players_cycle)
+            next_id = self.next_in_order()
             if self.players[next_id].alive:
                 self.turn_id = next_id
                 self.players[next_id].turn = True
                 return
 
+    def next_in_order(self) -> str:
+        """Moves the turn pointer to the next player in the turn order, dead or alive, and returns its ID."""
+        self.turn_index = (self.turn_index + 1) % len(self.player_order)
+        return self.player_order[self.turn_index]
+
 
     def do_action(self, msg: GameMessage, turn: PlayerSim, target: PlayerSim | None):
         if turn is None or msg is None:
@@ -563,22 +777,22 @@ class Root(Player):
         
         if msg.action == INCOME:
             turn.coins += INCOME_COINS
-            self.send_all_and_update(game_proto.COINS(self.turn_id, turn.coins), PlayerState.R_COINS)
+            self.send_all_and_update(trusted_game_proto.COINS(self.turn_id, turn.coins), PlayerState.R_COINS)
             
         elif msg.action == FOREIGN_AID:
             turn.coins += FOREIGN_AID_COINS
-            self.send_all_and_update(game_proto.COINS(self.turn_id, turn.coins), PlayerState.R_COINS)
+            self.send_all_and_update(trusted_game_proto.COINS(self.turn_id, turn.coins), PlayerState.R_COINS)
         
         elif msg.action == TAX:
             turn.coins += TAX_COINS
-            self.send_all_and_update(game_proto.COINS(self.turn_id, turn.coins), PlayerState.R_COINS)
+            self.send_all_and_update(trusted_game_proto.COINS(self.turn_id, turn.coins), PlayerState.R_COINS)
             
         elif msg.action == EXCHANGE:
             if len(turn.deck) == 1:
                 turn.exchange_cards = [self.take_card(self.deck)]
             else:
                 turn.exchange_cards = [self.take_card(self.deck), self.take_card(self.deck)]
-            self.send_single_and_update(game_proto.CHOOSE(*turn.exchange_cards), turn.id, PlayerState.R_CHOOSE)
+            self.send_single_and_update(trusted_game_proto.CHOOSE(*turn.exchange_cards), turn.id, PlayerState.R_CHOOSE)
             
         elif msg.action == ASSASSINATE:
             if target is None:
@@ -591,7 +805,7 @@ class Root(Player):
                 logger.error("Error doing action: No target for stealing.")
                 return True
             turn.coins += min(MAX_COIN_STEAL, target.coins)
-            self.send_all_and_update(game_proto.COINS(self.turn_id, turn.coins), PlayerState.R_COINS)
+            self.send_all_and_update(trusted_game_proto.COINS(self.turn_id, turn.coins), PlayerState.R_COINS)
             
         elif msg.action == COUP:
             if target is None:
@@ -609,12 +823,12 @@ class Root(Player):
 
     def update_player_order(self):
         self.player_order = list(self.players.keys())
-        random.shuffle(self.player_order)
-        self.players_cycle = itertools.cycle(self.player_order)
+        self.rng.shuffle(self.player_order)
+        self.turn_index = -1
         logger.debug(f"Updated player order: {self.player_order}")
 
     def broadcast_dead(self, exclude: str):
-        self._send_except(game_proto.DEAD(exclude), exclude)
+        self._send_except(trusted_game_proto.DEAD(exclude), exclude)
         
     def broadcast_lose(self, target: PlayerSim):
         if target is not None:
@@ -624,25 +838,28 @@ class Root(Player):
                 logger.success(f"💀 Player {target.id} dead!")
             else:
                 logger.success(f"🎯 Player {target.id} hit!")
-            self.send_single_and_update(game_proto.DECK(*target.deck), target.id, PlayerState.R_DECK)
+            self.send_single_and_update(trusted_game_proto.DECK(*target.deck), target.id, PlayerState.R_DECK)
             if len(target.deck) == 0:
                 target.alive = False
                 self.broadcast_dead(target.id)
     
     def _send_single(self, game_msg: str, dest: str):
-        logger.info(f"Sent to player {dest}: {game_msg}")
-        self.checkout.put(network_proto.SINGLE(dest, game_msg))
+        if hotlog.enabled:
+            logger.info("Sent to player {}: {}", dest, game_msg)
+        self.put_envelope(trusted_network_proto.SINGLE(dest, game_msg))
     
     def _send_all(self, game_msg: str):
-        logger.info(f"Sent to ALL players: {game_msg}")
-        self.checkout.put(network_proto.ALL(game_msg))
+        if hotlog.enabled:
+            logger.info("Sent to ALL players: {}", game_msg)
+        self.put_envelope(trusted_network_proto.ALL(game_msg))
     
     def _send_except(self, game_msg: str, exclude: str):
-        logger.info(f"Sent to all except player {exclude}: {game_msg}")
-        self.checkout.put(network_proto.EXCEPT(exclude, game_msg))
+        if hotlog.enabled:
+            logger.info("Sent to all except player {}: {}", exclude, game_msg)
+        self.put_envelope(trusted_network_proto.EXCEPT(exclude, game_msg))
 
     def send_illegal(self, dest: str):
-        self._send_single(game_proto.ILLEGAL(), dest)
+        self._send_single(trusted_game_proto.ILLEGAL(), dest)
     
     def send_single_and_update(self, game_msg: str, dest: str, state):
         self._send_single(game_msg, dest)
@@ -652,8 +869,10 @@ class Root(Player):
 
     def send_all_and_update(self, game_msg: str, state):
         self._send_all(game_msg)
-        self.set_all_states(state)
-        self.expect_reply_from_everyone()
+        for player in self.players.values():
+            if player.alive:
+                player.set_state(state)
+                self.expect_reply_from(player.id)
     
     def send_except_and_update(self, game_msg: str, exclude: str, state):
         self._send_except(game_msg, exclude)
@@ -667,7 +886,7 @@ class RootStateMachine(StateMachine):
     def __init__(self, root: Root):
         auto = lambda: True
         
-        super().__init__(State("IDLE", entry_action=None))
+        super().__init__(State("IDLE", entry_action=None, flags=S_SETUP))
         self.add_transition("IDLE", "SETUP_DECK", root.all_players_ready)
         self.add_transition("IDLE", "START", root.auto_start)
         
@@ -924,9 +1143,11 @@ class RootStateMachine(StateMachine):
                         entry_action=root.end_game,
                         transitions={})
 
+        self.compile()
+
         
     def new_state(self, name: str, entry_action = None, exit_action = None, transitions = {}):
-        self.add_state(State(name, entry_action, exit_action))
+        self.add_state(State(name, entry_action, exit_action, state_family(name)))
         for to_state, condition in transitions.items():
             self.add_transition(name, to_state, condition)
             
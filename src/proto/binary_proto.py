@@ -0,0 +1,228 @@
+from .game_proto import game_proto, trusted_game_proto
+from .network_proto import trusted_network_proto, NetworkMessage
+from .network_proto import ALL, SINGLE, EXCEPT, JOIN
+from client.game.core import ACTIONS, CHARACTERS
+import struct
+
+
+BINARY_HELLO = b"\x00"  # Preamble sent by a peer that wants to switch the connection to binary frames
+HEADER = struct.Struct(">HBH")  # Frame length (not counting this field), network opcode, address
+LENGTH_SIZE = 2  # Size of the frame length field
+RAW = 0xFF  # Game opcode of a message carried as UTF-8 text
+CACHE_SIZE = 1024  # Maximum number of cached encodings per direction
+
+# Network opcodes
+NET_OPS = {ALL: 1, SINGLE: 2, EXCEPT: 3, JOIN: 4}
+NET_TYPES = {op: net_type for net_type, op in NET_OPS.items()}
+
+# Game opcodes, in the order the message types are declared in the game protocol
+GAME_OPS = {msg_type.name: op for op, msg_type in enumerate(game_proto.msg_types)}
+GAME_TYPES = {op: msg_type for op, msg_type in enumerate(game_proto.msg_types)}
+
+# Each argument is a single byte: the ID or coin count itself, or the index of the card or action
+_ARG_ENCODERS = {
+    "ID1": int, "ID2": int, "coins": int,
+    "card1": CHARACTERS.index, "card2": CHARACTERS.index,
+    "action": ACTIONS.index,
+}
+_ARG_DECODERS = {
+    "ID1": str, "ID2": str, "coins": str,
+    "card1": CHARACTERS.__getitem__, "card2": CHARACTERS.__getitem__,
+    "action": ACTIONS.__getitem__,
+}
+
+_encoded: dict[str, bytes] = {}
+_decoded: dict[bytes, str] = {}
+_frames: dict[tuple[str, int, str], bytes] = {}
+_text_frames: dict[str, bytes] = {}
+
+
+def encode_game(msg: str) -> bytes:
+    """
+    Encodes a game message into its binary payload: the game opcode followed by one byte per argument.
+    Messages that can't be encoded exactly (unknown type, values over 255, ...) are carried as text.
+
+    Arguments:
+        msg {str} -- game message
+
+    Returns:
+        bytes -- binary payload
+    """
+    payload = _encoded.get(msg)
+    if payload is not None:
+        return payload
+
+    try:
+        msg_type, args = game_proto.parse(msg)
+        payload = bytes([GAME_OPS[msg_type], *(_ARG_ENCODERS[name](value) for name, value in args.items())])
+        if decode_game(payload) != msg:
+            raise ValueError("Binaryproto: Message is not in canonical form.")
+    except (SyntaxError, ValueError):
+        payload = bytes([RAW]) + msg.encode("utf-8")
+
+    if len(_encoded) >= CACHE_SIZE:
+        _encoded.clear()
+    _encoded[msg] = payload
+    return payload
+
+
+def decode_game(payload: bytes) -> str:
+    """
+    Decodes a binary payload into a game message.
+
+    Arguments:
+        payload {bytes} -- binary payload
+
+    Raises:
+        SyntaxError: If the payload is not valid.
+
+    Returns:
+        str -- game message
+    """
+    msg = _decoded.get(payload)
+    if msg is not None:
+        return msg
+
+    try:
+        if payload[0] == RAW:
+            msg = payload[1:].decode("utf-8")
+        else:
+            msg_type = GAME_TYPES[payload[0]]
+            args = {arg.name: _ARG_DECODERS[arg.name](value) for arg, value in zip(msg_type.args, payload[1:])}
+            msg = trusted_game_proto.serialize(msg_type.name, args)
+    except (IndexError, KeyError, UnicodeDecodeError):
+        raise SyntaxError("Binaryproto: Invalid payload.")
+
+    if len(_decoded) >= CACHE_SIZE:
+        _decoded.clear()
+    _decoded[payload] = msg
+    return msg
+
+
+def encode(net_type: str, addr: int, msg: str) -> bytes:
+    """
+    Encodes a network message into a binary frame. Frames are cached, like the payloads.
+
+    Arguments:
+        net_type {str} -- network message type (ALL, SINGLE or EXCEPT)
+        addr {int} -- address of the message (ignored for ALL)
+        msg {str} -- game message (table name for JOIN)
+
+    Returns:
+        bytes -- binary frame
+    """
+    key = (net_type, addr, msg)
+    frame = _frames.get(key)
+    if frame is None:
+        payload = encode_game(msg)
+        frame = HEADER.pack(len(payload) + HEADER.size - LENGTH_SIZE, NET_OPS[net_type], addr) + payload
+        if len(_frames) >= CACHE_SIZE:
+            _frames.clear()
+        _frames[key] = frame
+    return frame
+
+
+def encode_text(text: str) -> bytes:
+    """
+    Encodes one or more text network messages into binary frames.
+    The frame of each message is cached, so messages sent again are not parsed again.
+
+    Arguments:
+        text {str} -- text network messages
+
+    Raises:
+        SyntaxError: If a message is not valid.
+
+    Returns:
+        bytes -- binary frames
+    """
+    term = trusted_network_proto.term
+    frames = []
+    for line in text.strip(term).split(term):
+        frame = _text_frames.get(line)
+        if frame is None:
+            net = NetworkMessage.cached(line)
+            if net.msg_type == JOIN:
+                frame = encode(JOIN, 0, net.table or "")
+            else:
+                frame = encode(net.msg_type, int(net.addr or 0), net.msg)
+            if len(_text_frames) >= CACHE_SIZE:
+                _text_frames.clear()
+            _text_frames[line] = frame
+        frames.append(frame)
+    return frames[0] if len(frames) == 1 else b"".join(frames)
+
+
+def decode(frame: bytes) -> tuple[str, int, str]:
+    """
+    Decodes a binary frame, as returned by FrameDecoder.
+
+    Arguments:
+        frame {bytes} -- binary frame
+
+    Raises:
+        SyntaxError: If the frame is not valid.
+
+    Returns:
+        tuple[str, int, str] -- network message type, address and game message (table name for JOIN)
+    """
+    try:
+        _, net_op, addr = HEADER.unpack_from(frame)
+        net_type = NET_TYPES[net_op]
+    except (struct.error, KeyError):
+        raise SyntaxError("Binaryproto: Invalid frame header.")
+    return net_type, addr, decode_game(frame[HEADER.size:])
+
+
+def split_frame(frame: bytes) -> tuple[str, int, memoryview]:
+    """
+    Reads the header of a binary frame, without decoding or copying the payload.
+
+    Arguments:
+        frame {bytes} -- binary frame, as returned by FrameDecoder
+
+    Raises:
+        SyntaxError: If the header is not valid.
+
+    Returns:
+        tuple[str, int, memoryview] -- network message type, address and binary payload
+    """
+    try:
+        _, net_op, addr = HEADER.unpack_from(frame)
+        net_type = NET_TYPES[net_op]
+    except (struct.error, KeyError):
+        raise SyntaxError("Binaryproto: Invalid frame header.")
+    return net_type, addr, memoryview(frame)[HEADER.size:]
+
+
+def forward_frame(origin: int, payload: bytes | memoryview) -> bytes:
+    """
+    Builds the frame that forwards a binary payload, stamped with its origin address, without decoding it.
+
+    Arguments:
+        origin {int} -- address of the client that sent the payload
+        payload {bytes | memoryview} -- binary payload
+
+    Returns:
+        bytes -- binary frame
+    """
+    return HEADER.pack(len(payload) + HEADER.size - LENGTH_SIZE, NET_OPS[SINGLE], origin) + payload
+
+
+def decode_text(frame: bytes) -> str:
+    """
+    Decodes a binary frame into the equivalent text network message, without terminator.
+
+    Arguments:
+        frame {bytes} -- binary frame
+
+    Raises:
+        SyntaxError: If the frame is not valid.
+
+    Returns:
+        str -- text network message
+    """
+    net_type, addr, msg = decode(frame)
+    args = {"table": msg or None} if net_type == JOIN else {"addr": addr, "msg": msg}
+    return trusted_network_proto.serialize(net_type, args).strip(trusted_network_proto.term)
+
@@ -0,0 +1,111 @@
+from .binary_proto import BINARY_HELLO, LENGTH_SIZE
+import socket
+
+
+MIN_READ_SIZE = 256  # Smallest number of bytes read from a socket at once
+MAX_READ_SIZE = 65536  # Largest number of bytes read from a socket at once
+TEXT_TERM = b"\n"  # Terminator of text messages
+
+
+class FrameDecoder:
+    """
+    Incremental decoder that turns the chunks read from a stream socket into complete frames.
+
+    A frame is a text message without its terminator or, after switching to binary mode, a binary frame with its
+    header. Incomplete data is kept in a reusable buffer until the rest of the frame arrives.
+
+    The read size adapts to the traffic: it doubles when a read fills the chunk and halves when reads are small.
+    """
+
+    def __init__(self, binary: bool = False, negotiate: bool = False):
+        """
+        __init__ method for FrameDecoder class.
+
+        Keyword Arguments:
+            binary {bool} -- start in binary mode (default: False)
+            negotiate {bool} -- switch to binary mode when a text frame starts with the binary preamble (default: False)
+        """
+        self.buffer = bytearray()
+        """Received data that is not part of a returned frame yet."""
+        self.binary = binary
+        """Whether the next frames are binary frames."""
+        self.negotiate = negotiate
+        self.read_size = MIN_READ_SIZE
+        """Number of bytes asked for in the next read."""
+        self.chunk = bytearray(self.read_size)
+        """Reusable buffer the socket reads into."""
+
+    def receive(self, sock: socket.socket) -> memoryview:
+        """
+        Reads the available data from a socket into the reusable chunk, without decoding it.
+
+        Arguments:
+            sock {socket} -- connected socket
+
+        Raises:
+            OSError: If the socket fails (socket.timeout if no data arrived in time).
+
+        Returns:
+            memoryview -- data read, empty if the peer closed the connection. Only valid until the next read.
+        """
+        if len(self.chunk) != self.read_size:
+            self.chunk = bytearray(self.read_size)
+        size = sock.recv_into(self.chunk)
+        self.adapt(size)
+        return memoryview(self.chunk)[:size]
+
+    def adapt(self, size: int):
+        """
+        Adjusts the read size after a read.
+
+        Arguments:
+            size {int} -- number of bytes the read returned
+        """
+        if size >= self.read_size and self.read_size < MAX_READ_SIZE:
+            self.read_size *= 2
+        elif size < self.read_size // 4 and self.read_size > MIN_READ_SIZE:
+            self.read_size //= 2
+
+    def feed(self, data: bytes | memoryview):
+        """
+        Adds received data to the buffer.
+
+        Arguments:
+            data {bytes | memoryview} -- received data
+        """
+        self.buffer += data
+
+    def frames(self) -> list[bytes]:
+        """
+        Removes the complete frames from the buffer and returns them.
+
+        When the binary preamble is found (negotiate mode), decoding stops right after it and the decoder switches to
+        binary mode, so the caller can tell the text frames before the switch from the binary frames after it.
+
+        Returns:
+            list[bytes] -- complete frames, in the mode the decoder was in when it was called
+        """
+        buffer = self.buffer
+        frames = []
+        start = 0
+        while True:
+            if self.binary:
+                if len(buffer) - start < LENGTH_SIZE:
+                    break
+                end = start + LENGTH_SIZE + int.from_bytes(buffer[start:start + LENGTH_SIZE], "big")
+                if end > len(buffer):
+                    break
+                frames.append(bytes(buffer[start:end]))
+                start = end
+            else:
+                if self.negotiate and buffer.startswith(BINARY_HELLO, start):
+                    self.binary = True
+                    start += len(BINARY_HELLO)
+                    break
+                end = buffer.find(TEXT_TERM, start)
+                if end < 0:
+                    break
+                frames.append(bytes(buffer[start:end]))
+                start = end + len(TEXT_TERM)
+        del buffer[:start]
+        return frames
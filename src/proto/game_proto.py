@@ -1,7 +1,10 @@
-from .protobase import MsgType, MsgArg, Proto, BaseMsg
+from .protobase import MsgType, MsgArg, Proto, BaseMsg, MessageCache
 from client.game.core import ACTIONS, CHARACTERS
 
 
+CACHE_SIZE = 1024  # Maximum number of cached game messages
+
+
 # Message types
 ACT = "ACT"
 OK = "OK"
@@ -21,6 +24,7 @@ TURN = "TURN"
 EXIT = "EXIT"
 DEAD = "DEAD"
 ILLEGAL = "ILLEGAL"
+RESET = "RESET"
 
 def _check_action(action):
     return str(action).isalpha() and action in ACTIONS
@@ -35,7 +39,7 @@ def _check_id(id):
     return str(id).isnumeric()
 
 class GameProto(Proto):
-    def __init__(self):
+    def __init__(self, trusted: bool = False):
         super().__init__(
             MsgType(ACT, 
                 MsgArg("ID1", _check_id), 
@@ -92,7 +96,10 @@ class GameProto(Proto):
             MsgType(DEAD,
                     MsgArg("ID1", _check_id)),
             
-            MsgType(ILLEGAL)
+            MsgType(ILLEGAL),
+
+            MsgType(RESET),
+            trusted=trusted
         )
         self.sep = ' '
         self.term = ''
@@ -153,9 +160,15 @@ class GameProto(Proto):
     def ILLEGAL(self):
         return self.serialize(ILLEGAL, {})
 
+    def RESET(self):
+        return self.serialize(RESET, {})
+
 game_proto = GameProto()
+trusted_game_proto = GameProto(trusted=True)  # Skips the argument checks, for messages built from known-good data
 
 class GameMessage(BaseMsg):
+    cache = MessageCache(CACHE_SIZE)
+
     def __init__(self, msg: str):
         super().__init__(game_proto, msg)
         self.ID1 = self.args.get("ID1", None)
@@ -168,5 +181,5 @@ class GameMessage(BaseMsg):
 
     @classmethod
     def from_string(cls, msg: str):
-        return [cls(part) for part in msg.strip(game_proto.term).split(game_proto.term)]
+        return [cls.cached(part) for part in msg.strip(game_proto.term).split(game_proto.term)]
         
\ No newline at end of file
@@ -1,19 +1,29 @@
-from .protobase import MsgType, MsgArg, Proto, BaseMsg
+from .protobase import MsgType, MsgArg, Proto, BaseMsg, MessageCache
 
 ALL = "ALL"
 SINGLE = "SINGLE"
 EXCEPT = "EXCEPT"
 
+JOIN = "JOIN"
+
 DISCONNECT = "DISCONNECT"
 
+CACHE_SIZE = 4096  # Maximum number of cached network messages
+
+_HEADER_TYPES = {ALL.encode(): ALL, SINGLE.encode(): SINGLE, EXCEPT.encode(): EXCEPT, JOIN.encode(): JOIN}
+_origin_headers: dict[int, bytes] = {}
+
 def _check_game_msg(msg):
     return len(msg) > 0
 
 def _check_addr(addr):
     return str(addr).isnumeric()
 
+def _check_table(table):
+    return len(str(table)) > 0 and all(c.isalnum() or c in "-_" for c in str(table))
+
 class NetworkProto(Proto):
-    def __init__(self):
+    def __init__(self, trusted: bool = False):
         super().__init__(
             MsgType(ALL,
                     MsgArg("msg", _check_game_msg)),
@@ -24,7 +34,11 @@ class NetworkProto(Proto):
             
             MsgType(EXCEPT,
                     MsgArg("addr", _check_addr),
-                    MsgArg("msg", _check_game_msg))
+                    MsgArg("msg", _check_game_msg)),
+
+            MsgType(JOIN,
+                    MsgArg("table", _check_table, False)),
+            trusted=trusted
         )
         self.sep = '@'
     
@@ -39,18 +53,77 @@ class NetworkProto(Proto):
     def EXCEPT(self, addr, msg):
         return self.serialize(EXCEPT, {"addr": addr, "msg": msg})
 
+    def JOIN(self, table=None):
+        return self.serialize(JOIN, {"table": table})
+
 network_proto = NetworkProto()
+trusted_network_proto = NetworkProto(trusted=True)  # Skips the argument checks, for messages built from known-good data
 
 class NetworkMessage(BaseMsg):
+    cache = MessageCache(CACHE_SIZE)
+
     def __init__(self, msg: str):
         super().__init__(network_proto, msg)
         self.addr = self.args.get("addr", None)
         self.msg = self.args.get("msg", None)
+        self.table = self.args.get("table", None)
 
     @classmethod
     def from_string(cls, msg: str):
-        return [cls(part) for part in msg.strip(network_proto.term).split(network_proto.term)]
-    
+        return [cls.cached(part) for part in msg.strip(network_proto.term).split(network_proto.term)]
+
+
+def split_frame(frame: bytes) -> tuple[str, int | None, memoryview]:
+    """
+    Reads the header of a text network message, without decoding or copying the game message.
+
+    Arguments:
+        frame {bytes} -- text network message, without terminator
+
+    Raises:
+        SyntaxError: If the header is not valid or the game message is empty.
+
+    Returns:
+        tuple[str, int | None, memoryview] -- network message type, address (None for ALL and JOIN) and game message
+            (table name for JOIN)
+    """
+    sep = frame.find(b"@")
+    net_type = _HEADER_TYPES.get(frame if sep < 0 else frame[:sep])
+    if net_type == JOIN:
+        return JOIN, None, memoryview(frame)[len(frame) if sep < 0 else sep + 1:]
+    if net_type is None or sep < 0:
+        raise SyntaxError(f"Networkproto: Invalid message header: {bytes(frame[:16])}")
+
+    addr = None
+    if net_type != ALL:
+        end = frame.find(b"@", sep + 1)
+        if end < 0 or not frame[sep + 1:end].isdigit():
+            raise SyntaxError(f"Networkproto: Invalid message address: {bytes(frame[:16])}")
+        addr = int(frame[sep + 1:end])
+        sep = end
+    if sep + 1 == len(frame):
+        raise SyntaxError("Networkproto: Empty game message.")
+    return net_type, addr, memoryview(frame)[sep + 1:]
+
+
+def origin_header(origin: int) -> bytes:
+    """
+    Returns the header that stamps a forwarded game message with its origin address, i.e. "SINGLE@origin@".
+    Headers are built once per address.
+
+    Arguments:
+        origin {int} -- address of the client that sent the message
+
+    Returns:
+        bytes -- text header
+    """
+    header = _origin_headers.get(origin)
+    if header is None:
+        sep = trusted_network_proto.sep
+        header = _origin_headers[origin] = f"{SINGLE}{sep}{origin}{sep}".encode("utf-8")
+    return header
+
+
 if __name__ == "__main__":
     msg = "EXCEPT@2@LOSE 2 B\nSINGLE@2@DECK"
     net = NetworkMessage(msg)
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+from types import MappingProxyType
 
 
 class MsgArg:
@@ -23,10 +25,17 @@ class MsgType:
                 raise SyntaxError("Protobase: Optional argument before required argument.")
         
 class Proto:
-    def __init__(self, *msg_types: MsgType):
+    def __init__(self, *msg_types: MsgType, trusted: bool = False):
         self.msg_types = msg_types
         self.sep = ','  # default separator
         self.term = '\n'  # default terminator
+        self.trusted = trusted
+        """Skip the argument checks when serializing. Only for messages built from known-good data."""
+
+        # compile each message type once, indexed by name
+        self.parsers = {msg_type.name: self._compile_parser(msg_type) for msg_type in msg_types}
+        self.serializers = {msg_type.name: self._compile_serializer(msg_type, True) for msg_type in msg_types}
+        self.trusted_serializers = {msg_type.name: self._compile_serializer(msg_type, False) for msg_type in msg_types}
     
     def parse(self, msg: str):
         """
@@ -40,63 +49,170 @@ class Proto:
         """
         msg = msg.strip(self.term)
         msg_type, *args = msg.split(self.sep)
-        return msg_type, self._parse_args(self._get_msg_type(msg_type), args)
-    
-    def _parse_args(self, msg_type: MsgType, args: list[str]):
-        if len(args) < msg_type.min_size:
-            raise SyntaxError("Protobase: Not enough arguments.")
-        parsed_args = {}
-        for i in range(min(len(args), len(msg_type.args))):
-            if not msg_type.args[i].check(args[i]):
-                raise SyntaxError(f"Protobase: Invalid argument for {msg_type.args[i].name}.")
-            parsed_args[msg_type.args[i].name] = args[i]
-        return parsed_args
+        parser = self.parsers.get(msg_type)
+        if parser is None:
+            raise SyntaxError("Protobase: Invalid message type.")
+        return msg_type, parser(args)
     
-    def serialize(self, msg_type: str, args: dict):
+    def serialize(self, msg_type: str, args: dict, trusted: bool | None = None):
         """
         serialize a message type and arguments into a message string
         
         Arguments:
             msg_type {str} -- the message type
             args {dict{str | Any}} -- a dictionary of arguments
+
+        Keyword Arguments:
+            trusted {bool | None} -- skip the argument checks, None to use the proto default (default: None)
         
         Returns:
             str -- the message string
         """
-        return self._serialize_args(self._get_msg_type(msg_type), args)
-    
-    def _serialize_args(self, msg_type: MsgType, args: dict):
-        parts = [msg_type.name]
-        for arg in msg_type.args:
-            if arg.required:
-                if arg.name not in args:
-                    raise SyntaxError(f"Protobase: Missing required argument {arg.name}.")
-                if not arg.check(args[arg.name]):
-                    raise SyntaxError(f"Protobase: Invalid argument for {arg.name}.")
-                parts.append(str(args[arg.name]))
-            else:
-                if arg.name in args and args[arg.name] is not None:
-                    if not arg.check(args[arg.name]):
-                        raise SyntaxError(f"Protobase: Invalid argument for {arg.name}.")
-                    parts.append(str(args[arg.name]))
-
-        return self.sep.join(parts) + self.term
-
-    def _get_msg_type(self, name: str):
-        for msg_type in self.msg_types:
-            if msg_type.name == name:
-                return msg_type
-        raise SyntaxError("Protobase: Invalid message type.")
+        if trusted is None:
+            trusted = self.trusted
+        serializer = (self.trusted_serializers if trusted else self.serializers).get(msg_type)
+        if serializer is None:
+            raise SyntaxError("Protobase: Invalid message type.")
+        return self.sep.join(serializer(args)) + self.term
+
+    @staticmethod
+    def _compile_parser(msg_type: MsgType):
+        min_size = msg_type.min_size
+        fields = tuple((arg.name, arg.check) for arg in msg_type.args)
+
+        def parse_args(args: list[str]):
+            if len(args) < min_size:
+                raise SyntaxError("Protobase: Not enough arguments.")
+            parsed_args = {}
+            for (name, check), arg in zip(fields, args):
+                if not check(arg):
+                    raise SyntaxError(f"Protobase: Invalid argument for {name}.")
+                parsed_args[name] = arg
+            return parsed_args
+
+        return parse_args
+
+    @staticmethod
+    def _compile_serializer(msg_type: MsgType, validate: bool):
+        name = msg_type.name
+        fields = tuple((arg.name, arg.check, arg.required) for arg in msg_type.args)
+
+        def serialize_args(args: dict):
+            parts = [name]
+            for arg_name, check, required in fields:
+                value = args.get(arg_name)
+                if value is None:
+                    if not required:
+                        continue
+                    if arg_name not in args:
+                        raise SyntaxError(f"Protobase: Missing required argument {arg_name}.")
+                    raise SyntaxError(f"Protobase: Invalid argument for {arg_name}.")
+                if validate and not check(value):
+                    raise SyntaxError(f"Protobase: Invalid argument for {arg_name}.")
+                parts.append(str(value))
+            return parts
+
+        return serialize_args
+
 
 class BaseMsg:
+    cache: "MessageCache | None" = None
+    """Cache of parsed messages shared by the subclass. Used by cached()."""
+
     def __init__(self, proto: Proto, msg: str):
         self.proto = proto
         self.msg_type, self.args = proto.parse(msg)
 
+    def __setattr__(self, name, value):
+        if self.__dict__.get("frozen", False):
+            raise AttributeError("Protobase: Cached messages are read-only.")
+        object.__setattr__(self, name, value)
+
     @classmethod
     def from_string(cls, proto: Proto, msg: str):
         return [cls(proto, part) for part in msg.strip(proto.term).split(proto.term)]
 
+    @classmethod
+    def cached(cls, msg: str):
+        """
+        Returns the parsed message for a message string, parsing it only if it is not in the cache.
+        The returned message is shared and read-only. Only for subclasses built from the message string alone.
+
+        Arguments:
+            msg {str} -- the message string
+
+        Returns:
+            BaseMsg -- the parsed message
+        """
+        if cls.cache is None:
+            return cls(msg)
+        return cls.cache.get(msg, cls)
+
+    def freeze(self):
+        """Makes the message read-only, so it can be shared."""
+        self.args = MappingProxyType(self.args)
+        self.frozen = True
+
     def __str__(self):
-        return self.proto.serialize(self.msg_type, self.args)
+        # the arguments were already checked when the message was parsed
+        return self.proto.serialize(self.msg_type, self.args, trusted=True)
+
+
+class MessageCache:
+    """
+    Bounded cache of parsed messages, indexed by message string.
+
+    When full, the least recently used message is evicted. Invalid messages are never cached.
+    """
+
+    def __init__(self, size: int):
+        """
+        __init__ method for MessageCache class.
+
+        Arguments:
+            size {int} -- maximum number of cached messages
+        """
+        self.size = size
+        self.messages: OrderedDict[str, BaseMsg] = OrderedDict()
+        self.hits = 0
+        """Number of messages found in the cache."""
+        self.misses = 0
+        """Number of messages that had to be parsed."""
+
+    def get(self, msg: str, parse) -> BaseMsg:
+        """
+        Returns the cached message for a message string, or parses and caches it.
+
+        Arguments:
+            msg {str} -- the message string
+            parse {(str) -> BaseMsg} -- function that parses the message string
+
+        Raises:
+            SyntaxError: If the message is not valid.
+
+        Returns:
+            BaseMsg -- the shared, read-only parsed message
+        """
+        parsed = self.messages.get(msg)
+        if parsed is not None:
+            self.messages.move_to_end(msg)
+            self.hits += 1
+            return parsed
+
+        self.misses += 1
+        parsed = parse(msg)
+        parsed.freeze()
+        self.messages[msg] = parsed
+        if len(self.messages) > self.size:
+            self.messages.popitem(last=False)
+        return parsed
+
+    def clear(self):
+        """Removes all messages from the cache and resets the counters."""
+        self.messages.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f"MessageCache(hits={self.hits}, misses={self.misses}, size={len(self.messages)}/{self.size})"
        
\ No newline at end of file
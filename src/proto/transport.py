@@ -0,0 +1,180 @@
+import os
+import queue
+import socket
+import tempfile
+
+
+DEFAULT_UNIX_PATH = os.path.join(tempfile.gettempdir(), "coup.sock")  # Socket file of the unix transport
+TRANSPORTS = ("tcp", "unix", "socketpair")  # Names accepted by make_transport
+
+
+class Transport:
+    """
+    Abstract stream transport between the server and its clients.
+
+    The server only calls listen() and the clients only call connect(), so they work the same way whatever
+    the sockets are made of.
+    """
+
+    def listen(self, backlog: int):
+        """
+        Creates the listening end of the transport.
+
+        Arguments:
+            backlog {int} -- maximum number of pending connections
+
+        Returns:
+            socket | PairListener -- listener with the accept(), settimeout(), fileno() and close() socket methods
+        """
+        raise NotImplementedError
+
+    def connect(self) -> socket.socket:
+        """
+        Opens a connection to the listening end.
+
+        Returns:
+            socket -- connected stream socket
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Releases what the listening end left behind. Called by the server when it shuts down."""
+
+
+class TCPTransport(Transport):
+    """TCP sockets, the only transport for players on other hosts."""
+
+    def __init__(self, host="localhost", port=12345):
+        self.host = host
+        self.port = port
+
+    def __str__(self):
+        return f"{self.host}:{self.port}"
+
+    def listen(self, backlog: int) -> socket.socket:
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  # Games run back to back on the same port
+        listener.bind((self.host, self.port))
+        listener.listen(backlog)
+        return listener
+
+    def connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.connect((self.host, self.port))
+        return sock
+
+
+class UnixTransport(Transport):
+    """Unix domain sockets bound to a path, for processes on the same host. Skips the loopback TCP stack and ports."""
+
+    def __init__(self, path=DEFAULT_UNIX_PATH):
+        self.path = path
+
+    def __str__(self):
+        return f"unix:{self.path}"
+
+    def listen(self, backlog: int) -> socket.socket:
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # Left behind by a server that did not shut down
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        listener.listen(backlog)
+        return listener
+
+    def connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        return sock
+
+    def close(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class PairListener:
+    """
+    Listening end of the socketpair transport.
+
+    Hands out the server ends of the socket pairs created by connect(). Each pending connection also writes a byte
+    to an internal socket pair, so accept() can block with a timeout and event loops can watch fileno().
+    """
+
+    def __init__(self):
+        self.pending = queue.SimpleQueue()  # Server ends of the connections not accepted yet
+        self.reader, self.writer = socket.socketpair()
+
+    def push(self, sock: socket.socket):
+        """Queues the server end of a new connection."""
+        self.pending.put(sock)
+        self.writer.send(b"\0")
+
+    def accept(self) -> tuple[socket.socket, str]:
+        """
+        Takes a pending connection, like socket.accept().
+
+        Raises:
+            OSError: If the listener is closed, or no connection is pending before the timeout (socket.timeout) or
+                at all in non-blocking mode (BlockingIOError).
+        """
+        if not self.reader.recv(1):
+            raise OSError("Listener is closed.")
+        return self.pending.get_nowait(), "socketpair"
+
+    def settimeout(self, timeout: float | None):
+        self.reader.settimeout(timeout)
+
+    def fileno(self) -> int:
+        return self.reader.fileno()
+
+    def close(self):
+        self.reader.close()
+        self.writer.close()
+
+
+class PairTransport(Transport):
+    """
+    Socket pairs, for clients running in the server's process.
+
+    There is no address to bind or connect to: connect() creates a pair and queues one end to the listener, so
+    clients may connect before the server starts accepting.
+    """
+
+    def __init__(self):
+        self.listener = PairListener()
+
+    def __str__(self):
+        return "socketpair"
+
+    def listen(self, backlog: int) -> PairListener:
+        return self.listener
+
+    def connect(self) -> socket.socket:
+        client_end, server_end = socket.socketpair()
+        self.listener.push(server_end)
+        return client_end
+
+
+def make_transport(name: str, host="localhost", port=12345, path=DEFAULT_UNIX_PATH) -> Transport:
+    """
+    Creates a transport from its command line name.
+
+    Arguments:
+        name {str} -- one of TRANSPORTS
+
+    Keyword Arguments:
+        host {str} -- address of the tcp transport (default: "localhost")
+        port {int} -- port of the tcp transport (default: 12345)
+        path {str} -- socket file of the unix transport (default: DEFAULT_UNIX_PATH)
+
+    Returns:
+        Transport -- new transport
+    """
+    if name == "tcp":
+        return TCPTransport(host, port)
+    if name == "unix":
+        return UnixTransport(path)
+    if name == "socketpair":
+        return PairTransport()
+    raise ValueError(f"Unknown transport: {name}")
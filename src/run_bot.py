@@ -1,19 +1,16 @@
 #!/usr/bin/env python3.12
 
 from client.coup_client import CoupClient
-from client.bots import CoupBot, TestBot, RandomBot, HonestBot, AICoupBot
+from client.bots import BOTS
+from terminal.terminal import NullTerminal
+from proto.transport import DEFAULT_UNIX_PATH, make_transport
+from utils.latency import latency
+from utils.hotlog import hotlog
 from loguru import logger
 import argparse
+import random
 import sys, os
 
-BOTS = {
-    "CoupBot": CoupBot,
-    "TestBot": TestBot,
-    "RandomBot": RandomBot,
-    "HonestBot": HonestBot,
-    "AICoupBot": AICoupBot,
-}
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('-p', type=int, default=12345, help='Port number (default: 12345)')
@@ -21,6 +18,14 @@ if __name__ == "__main__":
     parser.add_argument('-i', type=str, default='None', help="Player ID (default: None)")
     parser.add_argument('-v', action='store_false', help='Verbose mode (default: True)')
     parser.add_argument('-b', type=str, default='TestBot', help='Bot type (default: TestBot)', choices=BOTS.keys())
+    parser.add_argument('-s', type=int, default=None, help='Seed for the bot decisions (default: random)')
+    parser.add_argument('-t', type=str, nargs='?', const='', default=None, help='Table joined by the bot, auto-assigned if no name is given (default: the default table)')
+    parser.add_argument('-e', action='store_true', help='Run the client on a single-thread selector loop (default: False)')
+    parser.add_argument('-f', choices=['text', 'binary'], default='text', help="Wire format: 'text' or 'binary' (default: text)")
+    parser.add_argument('-l', action='store_true', help='Record per-hop latency histograms, logged when the bot exits (default: False)')
+    parser.add_argument('-x', choices=['tcp', 'unix'], default='tcp', help="Transport: 'tcp' or 'unix' sockets (default: tcp)")
+    parser.add_argument('-u', type=str, default=DEFAULT_UNIX_PATH, help=f'Socket file of the unix transport (default: {DEFAULT_UNIX_PATH})')
+    parser.add_argument('-q', action='store_true', help='Quiet mode: skip the per-message logs, keep warnings, errors and game events (default: False)')
     args = parser.parse_args()
     
     logger.remove()  # Remove default logger
@@ -37,7 +42,14 @@ if __name__ == "__main__":
                    level="TRACE", 
                    format="<green>{time:HH:mm:ss:SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | <level>{message}</level>")
 
+    if args.l:
+        latency.enable()
+    if args.q:
+        hotlog.quiet()
+
     # Create client
-    player = BOTS[args.b]()
-    client = CoupClient(args.a, args.p, player)
+    terminal = NullTerminal() if args.e else None  # Bots on the selector loop don't read the console
+    player = BOTS[args.b](terminal, rng=random.Random(args.s))
+    transport = make_transport(args.x, args.a, args.p, args.u)
+    client = CoupClient(args.a, args.p, player, args.f == 'binary', args.t, args.e, transport)
     client.run()
\ No newline at end of file
@@ -4,6 +4,7 @@ import subprocess
 import time
 import argparse
 import sys
+from proto.transport import TRANSPORTS
 
 SLEEP_TIME = 0.5  # seconds
 
@@ -15,17 +16,24 @@ process_calls = ["python run_server.py -m auto",
                  "python run_bot.py -i 5 -v", 
                  "python run_bot.py -i 6 -v"]
 
-def game(terminal: bool):
+def game(terminal: bool, wire_format: str, selector: bool, transport: str, series: int, timing: bool, quiet: bool):
     # Determine where to send subprocess output
     output = None if terminal else subprocess.DEVNULL
     # print("Starting server and bots...")
-    server_process = subprocess.Popen(process_calls[0].split(" "), stdout=output, stderr=output)
+    options = ["-f", wire_format, "-x", transport] + (["-e"] if selector else []) + (["-l"] if timing else []) + (["-q"] if quiet else [])
+    bot_calls = process_calls[1:]
+    server_options = ["-n", str(series)]
+    if transport == "socketpair":
+        # Socket pairs only connect threads of the same process, so the server runs the bots itself
+        server_options += ["-b"] + ["TestBot"] * len(bot_calls)
+        bot_calls = []
+    server_process = subprocess.Popen(process_calls[0].split(" ") + options + server_options, stdout=output, stderr=output)
     # print("Starting server...")
 
     bot_processes: list[subprocess.Popen[bytes]] = []
     time.sleep(SLEEP_TIME)
-    for i in range(1,7):
-        bot_processes.append(subprocess.Popen(process_calls[i].split(" "), stdout=output, stderr=output))
+    for bot_call in bot_calls:
+        bot_processes.append(subprocess.Popen(bot_call.split(" ") + options, stdout=output, stderr=output))
         # print(f"Starting bot {i}...")
     
     start_time = time.time()
@@ -51,12 +59,18 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('-j', type=int, default=1, help='Number of games to run (default: 1)')
     parser.add_argument('-o', action='store_true', help='Output to terminal (default: False)')
+    parser.add_argument('-e', action='store_true', help='Run the root and the bots on a single-thread selector loop (default: False)')
+    parser.add_argument('-f', choices=['text', 'binary'], default='text', help="Wire format used by the server and bots: 'text' or 'binary' (default: text)")
+    parser.add_argument('-n', type=int, default=1, help='Number of games played by each set of processes, over the same connections (default: 1)')
+    parser.add_argument('-l', action='store_true', help='Record per-hop latency histograms in the server and bot logs (default: False)')
+    parser.add_argument('-q', action='store_true', help='Quiet mode: the server and bots skip the per-message logs (default: False)')
+    parser.add_argument('-x', choices=TRANSPORTS, default='tcp', help="Transport: 'tcp', 'unix' sockets or 'socketpair' with the bots in the server process (default: tcp)")
     args = parser.parse_args()
     
     start_time = time.time()
     for i in range(args.j):
         print(f"Game {i+1}/{args.j}: ", end="")
-        game(args.o)
+        game(args.o, args.f, args.e, args.x, args.n, args.l, args.q)
         time.sleep(SLEEP_TIME)
     end_time = time.time()
     print(f"All games completed in {end_time - start_time:.2f} seconds.")
\ No newline at end of file
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3.12
+
+from simulation.headless import HeadlessGame
+from client.bots import BOTS
+from utils.hotlog import hotlog
+from loguru import logger
+import argparse
+import time
+import sys, os
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-j', type=int, default=1, help='Number of games to run (default: 1)')
+    parser.add_argument('-b', type=str, nargs='+', default=['TestBot'] * 6, help='Bot types, one per seat (default: 6 TestBot)', choices=BOTS.keys())
+    parser.add_argument('-o', action='store_true', help='Output game messages to terminal (default: False)')
+    parser.add_argument('-l', action='store_true', help='Write the game summary to ../log/game_summary.log (default: False)')
+    parser.add_argument('-s', type=int, default=None, help='Seed of the first game, game i uses seed + i (default: random)')
+    args = parser.parse_args()
+
+    logger.remove()  # Remove default logger
+    if args.o:
+        logger.add(sys.stderr, level="SUCCESS", format="<level>{message}</level>", colorize=False, filter=lambda record: record['level'].name == 'SUCCESS')
+        logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>", colorize=True)
+
+    # Configure Short game summary logging
+    if args.l:
+        if not os.path.exists("../log"):
+            os.makedirs("../log")
+        open("../log/game_summary.log", "w").close()  # Clear log file
+        logger.add(f"../log/game_summary.log", level="SUCCESS", format="<level>{message}</level>", filter=lambda record: "Player" in record["message"] and "OK" not in record["message"])
+
+    if not (args.o or args.l):
+        hotlog.quiet()  # Nothing would take the per-message logs
+
+    bots = [BOTS[name] for name in args.b]
+    wins: dict[str, int] = {}
+    unfinished = 0
+
+    start_time = time.time()
+    for i in range(args.j):
+        game = HeadlessGame(bots, None if args.s is None else args.s + i)
+        winner = game.run()
+        winner_class = game.winner_class()
+        if winner is None or winner_class is None:
+            unfinished += 1
+            print(f"Game {i+1}/{args.j}: no winner")
+            continue
+        wins[winner_class.__name__] = wins.get(winner_class.__name__, 0) + 1
+        print(f"Game {i+1}/{args.j}: Player {winner} ({winner_class.__name__}) wins")
+    end_time = time.time()
+
+    print(f"All games completed in {end_time - start_time:.2f} seconds.")
+    for name, count in sorted(wins.items(), key=lambda item: -item[1]):
+        print(f"{name}: {count} wins")
+    if unfinished:
+        print(f"Unfinished games: {unfinished}")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3.12
+
+from simulation.loadgen import LoadGenerator
+from server.outbound import POLICIES, BLOCK, OUTBOX_SIZE
+from server.table import TABLE_SIZE
+from proto.transport import DEFAULT_UNIX_PATH
+from loguru import logger
+import argparse
+import sys
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-p', type=int, default=12345, help='Port number (default: 12345)')
+    parser.add_argument('-a', type=str, default='localhost', help='Address (default: localhost)')
+    parser.add_argument('-c', choices=['threads', 'asyncio'], default='threads', help="Server concurrency: one thread per connection or a single asyncio event loop (default: threads)")
+    parser.add_argument('-x', choices=['tcp', 'unix'], default='tcp', help="Transport: 'tcp' or 'unix' sockets (default: tcp)")
+    parser.add_argument('-u', type=str, default=DEFAULT_UNIX_PATH, help=f'Socket file of the unix transport (default: {DEFAULT_UNIX_PATH})')
+    parser.add_argument('-w', choices=POLICIES, default=BLOCK, help="When a client's outbound queue is full: 'block' the sender for a while or 'drop' the client (default: block)")
+    parser.add_argument('-k', type=int, default=OUTBOX_SIZE, help=f'Maximum number of writes queued for a client (default: {OUTBOX_SIZE})')
+    parser.add_argument('-t', type=int, default=10, help='Number of tables (default: 10)')
+    parser.add_argument('-n', type=int, default=TABLE_SIZE, help=f'Clients per table, root included (default: {TABLE_SIZE})')
+    parser.add_argument('-r', type=float, default=1000, help='Messages sent per second, over all the tables (default: 1000)')
+    parser.add_argument('-d', type=float, default=10.0, help='Time spent sending, in seconds (default: 10)')
+    parser.add_argument('-g', type=int, default=1, help='Number of load generator processes (default: 1)')
+    parser.add_argument('-s', type=int, default=None, help='Seed of the traffic (default: random)')
+    args = parser.parse_args()
+
+    logger.remove()  # Remove default logger
+    logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>", colorize=True)
+
+    generator = LoadGenerator(args.t, args.n, args.r, args.d, args.g, args.s)
+    print(f"Loading the {args.c} server over {args.x}: {args.t} tables of {args.n} clients, {args.r:g} msgs/sec for {args.d:g} s")
+    report = generator.run(args.c, args.x, args.a, args.p, args.u, args.w, args.k)
+
+    outbound = report["outbound"]
+    print(f"Sent:       {report['sent'] / args.d:10.0f} msgs/sec ({report['sent']} messages)")
+    print(f"Delivered:  {report['received'] / args.d:10.0f} msgs/sec ({report['received']} of {report['expected']} deliveries)")
+    print(f"Routing:    {report['route']}")
+    print(f"Delivery:   {report['delivery']}")
+    print(f"Server CPU: {report['cpu']:.2f} s, {report['cpu'] / report['wall']:.0%} of a core, {report['cpu'] / max(report['sent'], 1) * 1e6:.1f} µs per message")
+    print(f"Outbound:   max depth {outbound['max_depth']}, {outbound['blocked']} blocked sends")
+    print(f"Dropped:    {outbound['dropped']} connections dropped by the server, {report['closed']} closed")
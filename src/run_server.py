@@ -1,13 +1,24 @@
 #!/usr/bin/env python3.12
 
-from server.coup_server import CoupServer
+from server.coup_server import CoupServer, AsyncCoupServer
+from server.outbound import Outbound, POLICIES, BLOCK, OUTBOX_SIZE
 from client.coup_client import CoupClient
 from client.root import Root
+from client.bots import BOTS
+from proto.transport import TRANSPORTS, DEFAULT_UNIX_PATH, make_transport
+from terminal.terminal import NullTerminal
+from utils.latency import latency
+from utils.hotlog import hotlog
 from loguru import logger
 import argparse
+import random
+import threading
 import sys, os
 
 
+BOTS_DELAY = 0.5  # Time given to the root to connect before the in-process bots, so it gets ID 0
+
+
 if __name__ == "__main__":
     
     parser = argparse.ArgumentParser()
@@ -15,6 +26,20 @@ if __name__ == "__main__":
     parser.add_argument('-a', type=str, default='localhost', help='Address (default: localhost)')
     parser.add_argument('-m', choices=['manual', 'auto'], default='manual', help="Mode of operation: 'manual' or 'auto' (default: manual)")
     parser.add_argument('-v', action='store_false', help='Verbose mode (default: True)')
+    parser.add_argument('-s', type=int, default=None, help='Seed for the game randomness (default: random)')
+    parser.add_argument('-r', action='store_true', help='Only start the root, connected to a server that is already running (default: False)')
+    parser.add_argument('-c', choices=['threads', 'asyncio'], default='threads', help="Server concurrency: one thread per connection or a single asyncio event loop (default: threads)")
+    parser.add_argument('-t', type=str, nargs='?', const='', default=None, help='Table joined by the root, auto-assigned if no name is given (default: the default table)')
+    parser.add_argument('-e', action='store_true', help='Run the root on a single-thread selector loop (default: False)')
+    parser.add_argument('-f', choices=['text', 'binary'], default='text', help="Wire format used by the root: 'text' or 'binary' (default: text)")
+    parser.add_argument('-x', choices=TRANSPORTS, default='tcp', help="Transport: 'tcp', 'unix' sockets or in-process 'socketpair' (default: tcp)")
+    parser.add_argument('-u', type=str, default=DEFAULT_UNIX_PATH, help=f'Socket file of the unix transport (default: {DEFAULT_UNIX_PATH})')
+    parser.add_argument('-w', choices=POLICIES, default=BLOCK, help="When a client's outbound queue is full: 'block' the sender for a while or 'drop' the client (default: block)")
+    parser.add_argument('-k', type=int, default=OUTBOX_SIZE, help=f'Maximum number of writes queued for a client (default: {OUTBOX_SIZE})')
+    parser.add_argument('-l', action='store_true', help='Record per-hop latency histograms, logged at the end of each game (default: False)')
+    parser.add_argument('-n', type=int, default=1, help='Number of games played back to back over the same connections (default: 1)')
+    parser.add_argument('-q', action='store_true', help='Quiet mode: skip the per-message logs, keep warnings, errors and game events (default: False)')
+    parser.add_argument('-b', type=str, nargs='*', default=[], choices=BOTS.keys(), help='Bots run in this process, required by the socketpair transport (default: none)')
     args = parser.parse_args()
     
     # Remove default logger
@@ -28,26 +53,47 @@ if __name__ == "__main__":
     # Configure File logging
     if not os.path.exists("../log"):
         os.makedirs("../log")
-    open("../log/server.log", "w").close()  # Clear log file
-    logger.add(f"../log/server.log", level="TRACE", format="<green>{time:YYYY:MM:DD at HH:mm:ss:SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | <level>{message}</level>")
+    log_name = "server" if not args.r else f"root_{args.t or os.getpid()}"  # Roots of other tables keep their own logs
+    open(f"../log/{log_name}.log", "w").close()  # Clear log file
+    logger.add(f"../log/{log_name}.log", level="TRACE", format="<green>{time:YYYY:MM:DD at HH:mm:ss:SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | <level>{message}</level>")
 
     # Configure Short game summary logging
-    open("../log/game_summary.log", "w").close()  # Clear log file
-    logger.add(f"../log/game_summary.log", level="SUCCESS", format="<level>{message}</level>", filter=lambda record: "Player" in record["message"] and "OK" not in record["message"])
+    summary_name = "game_summary" if not args.r else f"game_summary_{args.t or os.getpid()}"
+    open(f"../log/{summary_name}.log", "w").close()  # Clear log file
+    logger.add(f"../log/{summary_name}.log", level="SUCCESS", format="<level>{message}</level>", filter=lambda record: "Player" in record["message"] and "OK" not in record["message"])
 
-    # Create server instance and start
-    server = CoupServer(args.a, args.p)
+    if args.l:
+        latency.enable()
+    if args.q:
+        hotlog.quiet()
+
+    # Create server instance and start, unless the root joins a server that is already running
+    transport = make_transport(args.x, args.a, args.p, args.u)
+    if args.r:
+        server = None
+    else:
+        server_class = AsyncCoupServer if args.c == 'asyncio' else CoupServer
+        server = server_class(args.a, args.p, transport=transport, outbound=Outbound(args.w, args.k))
 
     # Create client
-    player = Root(args.m)
-    client = CoupClient(args.a, args.p, player)
+    player = Root(args.m, rng=random.Random(args.s), series=args.n)
+    client = CoupClient(args.a, args.p, player, args.f == 'binary', args.t, args.e, transport)
+
+    # Create the in-process bots, each on its own thread
+    bots = []
+    for name in args.b:
+        bot = CoupClient(args.a, args.p, BOTS[name](NullTerminal()), args.f == 'binary', args.t, args.e, transport)
+        bots.append(threading.Thread(target=bot.run, daemon=True))
 
     try:
-        server.start()
+        if server is not None:
+            server.start()
+        if bots:
+            threading.Timer(BOTS_DELAY, lambda: [bot.start() for bot in bots]).start()
         client.run()
-        server.shutdown()
     except KeyboardInterrupt:
-        server.shutdown()
+        pass
     except:
-        server.shutdown()
-        client.signal = False
\ No newline at end of file
+        client.signal = False
+    if server is not None:
+        server.shutdown()
\ No newline at end of file
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3.12
+
+from simulation.tournament import Tournament
+from client.bots import BOTS
+from client.game.core import MIN_PLAYERS, MAX_PLAYERS
+from loguru import logger
+import argparse
+import time
+import sys
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-j', type=int, default=1000, help='Number of games to run (default: 1000)')
+    parser.add_argument('-b', type=str, nargs='+', default=['RandomBot', 'HonestBot', 'TestBot'], help='Bots taking part in the tournament (default: RandomBot HonestBot TestBot)', choices=BOTS.keys())
+    parser.add_argument('-n', type=int, default=MAX_PLAYERS, help=f'Players per game (default: {MAX_PLAYERS})', choices=range(MIN_PLAYERS, MAX_PLAYERS + 1))
+    parser.add_argument('-w', type=int, default=None, help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('-s', type=int, default=None, help='Seed of the tournament (default: random)')
+    args = parser.parse_args()
+
+    logger.remove()  # Remove default logger
+    logger.add(sys.stderr, level="WARNING", format="<level>{message}</level>", colorize=True)
+
+    tournament = Tournament(args.b, args.n, args.w, args.s)
+
+    start_time = time.time()
+    tournament.run(args.j)
+    end_time = time.time()
+
+    print(f"{args.j} games completed in {end_time - start_time:.2f} seconds.")
+    print(f"{'Bot':<12} {'Games':>8} {'Wins':>8} {'Win rate':>9}")
+    for name, games, wins, rate in tournament.ranking():
+        print(f"{name:<12} {games:>8} {wins:>8} {rate:>9.2%}")
+    if tournament.unfinished:
+        print(f"Unfinished games: {tournament.unfinished}")
@@ -0,0 +1,242 @@
+from .registry import ConnectionRegistry
+from .outbound import Outbound, BLOCK
+from utils.latency import latency
+from proto.framing import FrameDecoder
+from proto.transport import Transport, TCPTransport
+import asyncio
+import socket
+import threading
+from loguru import logger
+
+
+BACKLOG = 512  # Maximum number of pending connections
+STARTUP_TIMEOUT = 5.0  # Maximum time start() waits for the server to be listening
+SHUTDOWN_TIMEOUT = 5.0  # Maximum time the server waits for the client tasks when shutting down
+
+
+# Client class, new instance created for each connected client
+class AsyncClient:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, address, id, name, server: "AsyncServer"):
+        self.reader = reader
+        self.writer = writer
+        self.address = address
+        self.id = id
+        self.name = name
+        self.signal = True
+        self.server = server  # Reference to the server to forward received messages
+        self.binary = False  # Whether the client negotiated binary frames
+        self.decoder = FrameDecoder(negotiate=True)  # Splits the data received from the client into frames
+        self.table = None  # Table the client is seated at, if the server has tables
+        self.outbox: asyncio.Queue[tuple[bytes, float]] = asyncio.Queue(server.outbound.size)  # Data waiting to be written to the client, with the time it was queued
+        self.backlog: list[tuple[bytes, float]] = []  # Queued data that found the outbox full, under the block policy
+        self.write_task: asyncio.Task | None = None  # Drains the outbox
+
+    def __str__(self):
+        return str(self.id) + " " + str(self.address)
+
+    def send(self, data: bytes):
+        """
+        Queue data to be written to the client by its write task.
+        Raises OSError if the connection is closed, or if the queue is full and the client was dropped.
+        """
+        if self.writer.is_closing():
+            raise OSError(f"Connection to client {self.id} is closed.")
+        item = (data, latency.start())
+        if self.backlog:
+            self.backlog.append(item)  # Keep the order of the writes
+            return
+        outbound = self.server.outbound
+        try:
+            self.outbox.put_nowait(item)
+        except asyncio.QueueFull:
+            if outbound.policy == BLOCK:
+                # The loop can't wait here, the sender waits for the backlog once its data is routed
+                outbound.record_block()
+                self.backlog.append(item)
+                self.server.congested.add(self)
+                return
+            self.drop()
+            raise OSError(f"Outbound queue of client {self.id} is full.")
+        outbound.record_depth(self.outbox.qsize())
+
+    def depth(self) -> int:
+        """Number of writes waiting in the outbox and the backlog."""
+        return self.outbox.qsize() + len(self.backlog)
+
+    def drop(self):
+        """Disconnect the client because it does not keep up. The receiving loop then handles the disconnection."""
+        logger.warning(f"Dropping client {self.id}: outbound queue is full.")
+        self.server.outbound.record_drop()
+        self.backlog.clear()
+        self.close()
+
+    def close(self):
+        """Shut the connection down. The receiving loop sees it closing and handles the disconnection."""
+        self.writer.transport.abort()
+
+    async def catch_up(self):
+        """Move the backlog into the outbox, waiting for room."""
+        while self.backlog:
+            await self.outbox.put(self.backlog.pop(0))
+
+    async def write(self):
+        """Write the queued data to the connection, coalescing the writes queued meanwhile."""
+        try:
+            while True:
+                chunks = [await self.outbox.get()]
+                while not self.outbox.empty():
+                    chunks.append(self.outbox.get_nowait())
+                self.writer.writelines(data for data, _ in chunks)  # Scatter/gather write where the loop supports it
+                await self.writer.drain()
+                if latency.enabled:
+                    for _, queued in chunks:
+                        latency.stop("server.queue", queued)
+        except OSError:
+            self.writer.transport.abort()
+
+    async def run(self):
+        self.write_task = asyncio.create_task(self.write())
+        try:
+            while self.signal:
+                data = await self.reader.read(self.decoder.read_size)
+                if not data:
+                    break
+                self.decoder.adapt(len(data))
+                # Pass the received data to the server for routing
+                self.server.route_message(self, data)
+                if self.server.congested:
+                    await self.server.wait_congested()
+        except OSError:
+            pass
+
+        logger.info(f"Client {self.id} has disconnected")
+        self.signal = False
+        if self.server.broadcast_disconnection:
+            logger.info("Broadcasting disconnection message.")
+            self.server.route_message(self, self.server.disconnection_message.encode("utf-8"))
+        self.server.remove_client(self)
+        self.write_task.cancel()
+        self.writer.close()
+
+
+class AsyncServer(threading.Thread):
+    """
+    Server that serves every connection from a single asyncio event loop, running on its own thread.
+
+    Same interface as Server, but a connection costs a stream pair instead of a thread, so a single
+    server can keep hundreds of clients connected.
+    """
+
+    def __init__(self, host="localhost", port=12345, transport: Transport | None = None, outbound: Outbound | None = None):
+        threading.Thread.__init__(self)
+        self.host = host
+        self.port = port
+        self.transport = TCPTransport(host, port) if transport is None else transport  # Creates the listening socket
+        self.outbound = Outbound() if outbound is None else outbound  # Outbound queue settings and counters
+        self.congested: set[AsyncClient] = set()  # Clients with a backlog, under the block policy
+        self.signal = True
+        self.connections = ConnectionRegistry()  # Connected clients, indexed by ID
+        self.broadcast_disconnection = False
+        self.disconnection_message = ""
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.stopped: asyncio.Event | None = None
+        self.listening = threading.Event()  # Set once the server accepts connections (or failed to)
+        self.handlers: set[asyncio.Task] = set()  # Tasks serving the connected clients
+
+    def start(self):
+        """Start the event loop thread and wait until the server is listening, so clients can connect right away."""
+        super().start()
+        self.listening.wait(STARTUP_TIMEOUT)
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        finally:
+            self.listening.set()
+
+    async def serve(self):
+        """Listen for connections until the server is shut down."""
+        self.loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        listener = self.transport.listen(BACKLOG)
+        listener.settimeout(0)
+        self.loop.add_reader(listener.fileno(), self.accept_pending, listener)
+        logger.success(f"Server listening on {self.transport}")
+        self.listening.set()
+
+        try:
+            if self.signal:
+                await self.stopped.wait()
+        finally:
+            self.loop.remove_reader(listener.fileno())
+            listener.close()
+            self.transport.close()
+
+        for client in self.connections:
+            client.signal = False
+            client.writer.close()
+        # Let every client task see its connection closing before the loop goes away
+        if self.handlers:
+            await asyncio.wait(self.handlers, timeout=SHUTDOWN_TIMEOUT)
+        logger.info(f"Outbound queues: {self.outbound.stats(self.connections)}")
+        latency.dump()
+
+    def accept_pending(self, listener):
+        """Accept the pending connections, each served by its own task. Called when the listener is readable."""
+        while True:
+            try:
+                sock, address = listener.accept()
+            except OSError:
+                return  # No connection left (BlockingIOError) or listener closed
+            self.handlers.add(self.loop.create_task(self.accept(sock, address)))
+
+    async def accept(self, sock: socket.socket, address):
+        """Register a new connection and serve it until it disconnects."""
+        try:
+            reader, writer = await asyncio.open_connection(sock=sock)
+            new_client = AsyncClient(reader, writer, address, None, "Name", self)
+            self.add_client(new_client)
+            logger.success(f"New connection at ID {new_client}")
+            await new_client.run()
+        finally:
+            self.handlers.discard(asyncio.current_task())
+
+    async def wait_congested(self):
+        """Make the sender wait until the clients with a backlog caught up. Clients that don't in time are dropped."""
+        while self.congested:
+            client = self.congested.pop()
+            try:
+                await asyncio.wait_for(client.catch_up(), self.outbound.timeout)
+            except asyncio.TimeoutError:
+                client.drop()
+
+    def route_message(self, sender: AsyncClient, message: bytes):
+        """Broadcast a message from the sender to all other connected clients."""
+        logger.info(f"Broadcasting from ID {sender.id}: {message.decode('utf-8')}")
+        for client in self.connections:
+            if client.id != sender.id:  # Do not send the message back to the sender
+                try:
+                    client.send(message)
+                except OSError:
+                    self.remove_client(client)
+
+    def add_client(self, client: AsyncClient):
+        """Helper method to add a new client to the server's connection registry, under the first available ID."""
+        client.id = self.connections.add(client)
+
+    def remove_client(self, client: AsyncClient):
+        """Helper method to remove a client from the server's connection registry."""
+        if self.connections.remove(client):
+            logger.info(f"Client {client.address} removed from server.")
+
+    def shutdown(self):
+        """Gracefully shut down the server and all client connections."""
+        logger.info("Server shutting down...")
+
+        # Stop the event loop, which closes the listening socket and the client connections
+        self.signal = False
+        if self.loop is not None and self.stopped is not None:
+            self.loop.call_soon_threadsafe(self.stopped.set)
+        self.join()
+
+        logger.info("Server terminated.")
@@ -1,102 +1,299 @@
 from .server import Server, Client
-from proto.network_proto import network_proto, NetworkMessage
-from proto.network_proto import ALL, SINGLE, EXCEPT, DISCONNECT
+from .async_server import AsyncServer, AsyncClient
+from proto.network_proto import network_proto, NetworkMessage, split_frame, origin_header
+from proto.network_proto import ALL, SINGLE, EXCEPT, JOIN, DISCONNECT
+from proto.framing import TEXT_TERM
+from proto import binary_proto
+from proto.transport import Transport
+from .table import Table, DEFAULT_TABLE, TABLE_SIZE
+from .outbound import Outbound
+from utils.latency import latency
+from utils.hotlog import hotlog
 from loguru import logger
+import threading
 
 
 DEFAULT_ADDR = True  # Use default address for messages
 ROOT_ADDR = 0
 
-class CoupServer(Server):
-    def __init__(self, host="localhost", port=12345):
-        super().__init__(host, port)
+
+class Envelope:
+    """
+    Game message forwarded by the server, stamped with the address of its sender.
+
+    Routing only reads the message header. The game message is kept as received, and the data sent to the
+    recipients is built once per wire format and shared by all of them, so the game message is only decoded when
+    a recipient doesn't use the sender's format (or when it is logged).
+    """
+
+    __slots__ = ("origin", "payload", "binary", "text_data", "binary_data")
+
+    def __init__(self, origin: int, payload: bytes | memoryview, binary: bool):
+        """
+        __init__ method for Envelope class.
+
+        Arguments:
+            origin {int} -- address of the sender
+            payload {bytes | memoryview} -- game message, in the sender's format
+            binary {bool} -- whether the payload is a binary payload or UTF-8 text
+        """
+        self.origin = origin
+        self.payload = payload
+        self.binary = binary
+        self.text_data: bytes | None = None  # Forwarded text message, once built
+        self.binary_data: bytes | None = None  # Forwarded binary frame, once built
+
+    def __str__(self):
+        return self.message()
+
+    def message(self) -> str:
+        """
+        Returns the decoded game message.
+
+        Raises:
+            SyntaxError: If the binary payload is not valid.
+            UnicodeDecodeError: If the text payload is not valid UTF-8.
+        """
+        if self.binary:
+            return binary_proto.decode_game(bytes(self.payload))
+        return str(self.payload, "utf-8")
+
+    def encode(self, binary: bool) -> bytes:
+        """
+        Returns the data forwarded to a recipient in the given format.
+
+        Arguments:
+            binary {bool} -- whether the recipient uses binary frames
+
+        Raises:
+            SyntaxError: If the game message has to be converted and is not valid.
+            UnicodeDecodeError: If the game message has to be converted and is not valid UTF-8.
+        """
+        if binary:
+            if self.binary_data is None:
+                payload = self.payload if self.binary else binary_proto.encode_game(self.message())
+                self.binary_data = binary_proto.forward_frame(self.origin, payload)
+            return self.binary_data
+        if self.text_data is None:
+            payload = self.message().encode("utf-8") if self.binary else self.payload
+            self.text_data = origin_header(self.origin) + payload + TEXT_TERM
+        return self.text_data
+
+class CoupRouting:
+    """
+    Routing rules of the Coup server, shared by the threaded and the asyncio servers.
+
+    Connections only need an id, the binary mode attributes, a table and a send(data) method.
+
+    Clients are seated at the default table when they connect, so a server without JOIN messages hosts a single game.
+    A JOIN message sent right after connecting moves the client to a named table, or to the first auto-assigned
+    table with free seats. Each table has its own root (ID 0) and ID space, and messages never cross tables.
+    """
+
+    def __init__(self, host="localhost", port=12345, table_size=TABLE_SIZE, transport: Transport | None = None,
+                 outbound: Outbound | None = None):
+        super().__init__(host, port, transport, outbound)
+        self.tables: dict[str, Table] = {DEFAULT_TABLE: Table(DEFAULT_TABLE)}
+        self.table_size = table_size  # Seats of an auto-assigned table
+        self.auto_tables = 0  # Count the auto-assigned tables created
+        self.tables_lock = threading.Lock()  # Serializes seating and table closing across client threads
         self.broadcast_disconnection = True
         self.disconnection_message = network_proto.SINGLE(ROOT_ADDR, DISCONNECT)
+        self.disconnection_data = self.disconnection_message.encode("utf-8")  # Routed as text, even for binary clients
 
-    def route_message(self, sender: Client, net_msg: bytes):
-        """Route a message based on its format."""
-        net_msg_str = net_msg.decode("utf-8")
+    def route_message(self, sender: Client | AsyncClient, net_msg: bytes | memoryview):
+        """
+        Route the messages received from a client, based on their format.
 
-        logger.info(f"Received message from ID {sender.id}: {net_msg_str.replace("\n", "\\n")}")
-        
-        # If the message is not addressed, address it to root
-        try:
-            nets = NetworkMessage.from_string(net_msg_str)
-        except SyntaxError:
-            logger.warning("Invalid message format.")
+        The data is split into frames by the client's decoder, so messages split across reads are routed once complete.
+        The data may hold several messages (e.g. a batch written by the root). They are all routed in one pass and
+        the messages addressed to each client are coalesced into a single write.
+        """
+        start = latency.start()
+        outgoing: dict[Client | AsyncClient, list[bytes]] = {}
+        if net_msg == self.disconnection_data:
+            # Generated by the server, always as a whole text message
+            self.route_text(sender, [bytes(net_msg).rstrip(b"\n")], outgoing)
+            self.flush(outgoing)
             return
-        
-        for net in nets:
-            
-            if net.msg is None:
-                logger.warning("Empty message.")
+
+        decoder = sender.decoder
+        decoder.feed(net_msg)
+        binary = decoder.binary
+        if binary:
+            self.route_frames(sender, decoder.frames(), outgoing)
+        else:
+            self.route_text(sender, decoder.frames(), outgoing)
+
+        if decoder.binary and not binary:
+            # The client sent the binary preamble, answer it before sending any frame
+            logger.info(f"Client {sender.id} switched to binary frames")
+            try:
+                sender.send(binary_proto.BINARY_HELLO)
+                sender.binary = True
+            except OSError:
+                sender.close()
+            else:
+                self.route_frames(sender, decoder.frames(), outgoing)
+        self.flush(outgoing)
+        latency.stop("server.route", start)
+
+    def route_text(self, sender: Client | AsyncClient, frames: list[bytes], outgoing: dict):
+        """Route complete text messages. Only the headers are parsed, except for JOIN messages."""
+        for frame in frames:
+            try:
+                net_type, addr, payload = split_frame(frame)
+                if net_type == JOIN:
+                    net = NetworkMessage.cached(frame.decode("utf-8"))
+            except (SyntaxError, UnicodeDecodeError):
+                logger.warning("Invalid message format.")
                 continue
 
-            if net.msg_type == SINGLE:
-                # Direct message to a specific client
-                if net.addr is None:
-                    logger.warning("No address specified for single message.")
-                else:
-                    self.send_to_client(sender, net.msg, int(net.addr))
-                    
-            elif net.msg_type == EXCEPT:
-                # Broadcast to everyone except sender and the client with the specified ID
-                if net.addr is None:
-                    logger.warning("No address specified for except message.")
-                else:
-                    self.broadcast_except(sender, net.msg, int(net.addr))
-                    
-            elif net.msg_type == ALL:
-                # Broadcast to everyone except sender
-                self.broadcast_except(sender, net.msg, int(sender.id))
-            
-        
-    def broadcast_except(self, sender: Client, message: str, exclude_client_id: int):
-        """Broadcast the message to all clients except the sender and optionally exclude a specific client."""
-        logger.info(f"Broadcasting from ID {sender.id}: {message}")
-        
-        # Add origin address to the message
+            if net_type == JOIN:
+                self.join_table(sender, net.table)
+            else:
+                self.route_envelope(sender, net_type, addr, Envelope(sender.id, payload, False), outgoing)
+
+    def route_frames(self, sender: Client | AsyncClient, frames: list[bytes], outgoing: dict):
+        """Route complete binary frames. Only the headers are parsed, except for JOIN frames."""
+        for frame in frames:
+            try:
+                net_type, addr, payload = binary_proto.split_frame(frame)
+                if net_type == JOIN:
+                    table = binary_proto.decode_game(bytes(payload))
+            except SyntaxError:
+                logger.warning("Invalid frame format.")
+                continue
+
+            if net_type == JOIN:
+                self.join_table(sender, table or None)
+            else:
+                self.route_envelope(sender, net_type, addr, Envelope(sender.id, payload, True), outgoing)
+
+    def route_envelope(self, sender: Client | AsyncClient, net_type: str, addr: int | None, envelope: Envelope,
+                       outgoing: dict):
+        """Route a game message to its recipients, based on its network message type."""
+        if hotlog.enabled:
+            logger.info("Received {} from ID {}: {}", net_type, sender.id, envelope)
+        if net_type == SINGLE:
+            # Direct message to a specific client
+            self.send_to_client(sender, envelope, addr, outgoing)
+        elif net_type == EXCEPT:
+            # Broadcast to everyone except sender and the client with the specified ID
+            self.broadcast_except(sender, envelope, addr, outgoing)
+        elif net_type == ALL:
+            # Broadcast to everyone except sender
+            self.broadcast_except(sender, envelope, int(sender.id), outgoing)
+
+    def add_client(self, client: Client | AsyncClient):
+        """Add a new client to the server, seated at the default table."""
+        super().add_client(client)
+        with self.tables_lock:
+            self.tables[DEFAULT_TABLE].seat(client)
+
+    def remove_client(self, client: Client | AsyncClient):
+        """
+        Remove a client from the server and from its table. Tables left empty are closed.
+        Called once the disconnection of the client was routed, the routing methods only close the connections they
+        fail to write to.
+        """
+        super().remove_client(client)
+        with self.tables_lock:
+            table = client.table
+            if table is not None:
+                table.leave(client)
+                client.table = None
+                if len(table.connections) == 0 and table.name != DEFAULT_TABLE and self.tables.get(table.name) is table:
+                    logger.info(f"Table {table.name} closed.")
+                    del self.tables[table.name]
+
+    def join_table(self, client: Client | AsyncClient, name: str | None):
+        """Move a client from the default table to the named table, or to an auto-assigned table if no name is given."""
+        if client.table is not None and client.table.name != DEFAULT_TABLE:
+            logger.warning(f"Client {client.id} is already seated at table {client.table.name}.")
+            return
+
+        with self.tables_lock:
+            if name is None:
+                table = next((table for table in self.tables.values() if table.size is not None and not table.is_full()), None)
+                if table is None:
+                    self.auto_tables += 1
+                    table = Table(f"table-{self.auto_tables}", self.table_size)
+                    self.tables[table.name] = table
+            else:
+                table = self.tables.get(name)
+                if table is None:
+                    table = Table(name)
+                    self.tables[name] = table
+
+            if client.table is not None:
+                client.table.leave(client)
+            table.seat(client)
+        logger.success(f"Client {client.address} joined table {table.name} with ID {client.id}")
+
+    def deliver(self, client: Client | AsyncClient, envelope: Envelope, outgoing: dict | None = None):
+        """
+        Send a game message to a client, stamped with its origin address, in the client's format.
+        If outgoing is given, the data is added to the client's pending writes instead of being sent.
+        """
         try:
-            net_msg = network_proto.SINGLE(sender.id, message)
-        except SyntaxError:
-            logger.warning("Invalid message format.")
+            data = envelope.encode(client.binary)
+        except (SyntaxError, UnicodeDecodeError):
+            logger.warning(f"Message from ID {envelope.origin} can't be converted for client {client.id}.")
             return
+        if outgoing is None:
+            client.send(data)
+        else:
+            outgoing.setdefault(client, []).append(data)
+
+    def flush(self, outgoing: dict):
+        """Send the pending writes, a single write per client."""
+        for client, chunks in outgoing.items():
+            try:
+                client.send(b"".join(chunks))
+            except OSError:
+                client.close()
         
-        # Broadcast
-        for client in self.connections:
+    def broadcast_except(self, sender: Client | AsyncClient, envelope: Envelope, exclude_client_id: int, outgoing: dict | None = None):
+        """Broadcast the message to all clients except the sender and optionally exclude a specific client."""
+        if hotlog.enabled:
+            logger.info("Broadcasting from ID {}: {}", sender.id, envelope)
+        
+        # Broadcast to the sender's table, with the origin address added to the message
+        for client in sender.table.connections:
             if client.id != sender.id and client.id != exclude_client_id:
                 try:
-                    client.socket.sendall(net_msg.encode("utf-8"))
+                    self.deliver(client, envelope, outgoing)
                 except OSError:
-                    self.remove_client(client)
+                    client.close()
 
-    def send_to_client(self, sender: Client, message: str, client_id: int):
+    def send_to_client(self, sender: Client | AsyncClient, envelope: Envelope, client_id: int, outgoing: dict | None = None):
         """Send a message to a specific client identified by client_id."""
-        logger.info(f"Sending message to client {client_id} from ID {sender.id}: {message}")
+        if hotlog.enabled:
+            logger.info("Sending message to client {} from ID {}: {}", client_id, sender.id, envelope)
         
         # Check if client is addressing itself
         if client_id == sender.id:
             logger.warning("Client addressed itself.")
             return
         
-        # Add origin address to the message
-        try:
-            net_msg = network_proto.SINGLE(sender.id, message)
-        except SyntaxError:
-            logger.warning("Invalid message format.")
+        # Find the client with the specified ID at the sender's table and send the message with the origin address added
+        client = sender.table.connections.get(client_id)
+        if client is None:
+            logger.warning(f"Client with ID {client_id} not found.")
             return
-        
-        # Find the client with the specified ID
-        for client in self.connections:
-            if client.id != sender.id and client.id == client_id:
-                try:
-                    client.socket.sendall(net_msg.encode("utf-8"))
-                except OSError:
-                    self.remove_client(client)
-                return
-        
-        # Client not found
-        logger.warning(f"Client with ID {client_id} not found.")
+        try:
+            self.deliver(client, envelope, outgoing)
+        except OSError:
+            client.close()
+
+
+class CoupServer(CoupRouting, Server):
+    """Coup server with one thread per connection."""
+
+
+class AsyncCoupServer(CoupRouting, AsyncServer):
+    """Coup server that serves every connection from a single asyncio event loop."""
 
 
 def main():
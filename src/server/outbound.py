@@ -0,0 +1,62 @@
+import threading
+
+
+DROP = "drop"  # Disconnect a client whose outbound queue is full
+BLOCK = "block"  # Make the sender wait for room in a full outbound queue, then disconnect the client on timeout
+POLICIES = (DROP, BLOCK)
+OUTBOX_SIZE = 1024  # Default maximum number of writes queued for a client
+BLOCK_TIMEOUT = 5.0  # Default maximum time a sender waits for room in a full outbound queue
+
+
+class Outbound:
+    """
+    Settings of the per-client outbound queues of a server, and counters of how they were used.
+
+    Each connection queues the data sent to it and a writer drains the queue, so routing never waits on a slow
+    socket. When a queue is full, the policy decides what happens to the client.
+    """
+
+    def __init__(self, policy: str = BLOCK, size: int = OUTBOX_SIZE, timeout: float = BLOCK_TIMEOUT):
+        """
+        __init__ method for Outbound class.
+
+        Keyword Arguments:
+            policy {str} -- what to do when a queue is full, one of POLICIES (default: BLOCK)
+            size {int} -- maximum number of writes queued for a client (default: OUTBOX_SIZE)
+            timeout {float} -- maximum time a sender waits for room under the BLOCK policy (default: BLOCK_TIMEOUT)
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown outbound policy: {policy}")
+        self.policy = policy
+        self.size = size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.dropped = 0  # Clients disconnected because their queue was full
+        self.blocked = 0  # Sends that found a full queue and had to wait
+        self.max_depth = 0  # Deepest queue seen
+
+    def record_depth(self, depth: int):
+        if depth > self.max_depth:
+            with self.lock:
+                self.max_depth = max(self.max_depth, depth)
+
+    def record_block(self):
+        with self.lock:
+            self.blocked += 1
+
+    def record_drop(self):
+        with self.lock:
+            self.dropped += 1
+
+    def stats(self, connections) -> dict[str, int]:
+        """
+        Returns the current queue depth and the counters.
+
+        Arguments:
+            connections {Iterable} -- connected clients, with a depth() method
+
+        Returns:
+            dict[str, int] -- queued writes, deepest queue seen, blocked sends and dropped clients
+        """
+        return {"queued": sum(client.depth() for client in connections), "max_depth": self.max_depth,
+                "blocked": self.blocked, "dropped": self.dropped}
@@ -0,0 +1,75 @@
+import heapq
+import threading
+
+
+class ConnectionRegistry:
+    """
+    Connections indexed by ID.
+
+    Changes are made under a lock and replace the index and the snapshot instead of mutating them (copy-on-write),
+    so lookups and iteration never lock and never see a connection list that is being changed by another thread.
+
+    IDs are recycled: a new connection gets the smallest ID that is not in use.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_id: dict[int, object] = {}  # Connections indexed by ID
+        self.ids: dict[object, int] = {}  # ID of each connection
+        self.snapshot: tuple = ()  # Connections in the order they were added
+        self.free_ids: list[int] = []  # Heap of released IDs lower than next_id
+        self.next_id = 0  # Lowest ID never handed out
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def __iter__(self):
+        return iter(self.snapshot)
+
+    def __contains__(self, client) -> bool:
+        return client in self.ids
+
+    def add(self, client) -> int:
+        """
+        Registers a connection under the smallest free ID.
+
+        Arguments:
+            client {object} -- connection
+
+        Returns:
+            int -- ID given to the connection
+        """
+        with self.lock:
+            if self.free_ids:
+                id = heapq.heappop(self.free_ids)
+            else:
+                id = self.next_id
+                self.next_id += 1
+            self.by_id = {**self.by_id, id: client}
+            self.ids = {**self.ids, client: id}
+            self.snapshot = self.snapshot + (client,)
+            return id
+
+    def remove(self, client) -> bool:
+        """
+        Unregisters a connection and releases its ID.
+
+        Arguments:
+            client {object} -- connection
+
+        Returns:
+            bool -- True if the connection was registered
+        """
+        with self.lock:
+            id = self.ids.get(client)
+            if id is None:
+                return False
+            self.by_id = {key: value for key, value in self.by_id.items() if key != id}
+            self.ids = {key: value for key, value in self.ids.items() if key is not client}
+            self.snapshot = tuple(value for value in self.snapshot if value is not client)
+            heapq.heappush(self.free_ids, id)
+            return True
+
+    def get(self, id: int):
+        """Returns the connection with the given ID, None if there is none."""
+        return self.by_id.get(id)
@@ -1,3 +1,9 @@
+from .registry import ConnectionRegistry
+from .outbound import Outbound, BLOCK
+from utils.latency import latency
+from proto.framing import FrameDecoder
+from proto.transport import Transport, TCPTransport
+import queue
 import socket
 import threading
 from loguru import logger
@@ -5,10 +11,38 @@ from loguru import logger
 
 CLIENT_TIMEOUT = 1.0  # Timeout for client socket
 SERVER_TIMEOUT = 1.0  # Timeout for server socket
-MAX_CONNECTIONS = 6  # Maximum number of connections
+BACKLOG = 512  # Maximum number of pending connections
+IOV_MAX = 1024  # Maximum number of buffers written by a single sendmsg call
 DEFAULT_ADDR = True  # Use default address for messages
 
 
+def send_buffers(sock: socket.socket, buffers: list[bytes]):
+    """
+    Writes buffers to a socket, in order, with scatter/gather sendmsg so they are not joined first.
+    Falls back to joining them into a single sendall where sendmsg is not available (e.g. on Windows).
+
+    Arguments:
+        sock {socket} -- connected socket
+        buffers {list[bytes]} -- data to write
+
+    Raises:
+        OSError: If the connection fails.
+    """
+    if not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(buffers))
+        return
+    views = [memoryview(buffer) for buffer in buffers if buffer]
+    first = 0
+    while first < len(views):
+        sent = sock.sendmsg(views[first:first + IOV_MAX])
+        # Skip what was written, the last buffer may have been written in part
+        while sent and sent >= len(views[first]):
+            sent -= len(views[first])
+            first += 1
+        if sent:
+            views[first] = views[first][sent:]
+
+
 # Client class, new instance created for each connected client
 class Client(threading.Thread):
     def __init__(self, socket: socket.socket, address, id, name, signal, server: "Server"):
@@ -19,15 +53,81 @@ class Client(threading.Thread):
         self.name = name
         self.signal = signal
         self.server = server  # Reference to the server to forward received messages
+        self.binary = False  # Whether the client negotiated binary frames
+        self.decoder = FrameDecoder(negotiate=True)  # Splits the data received from the client into frames
+        self.table = None  # Table the client is seated at, if the server has tables
+        self.outbox = queue.Queue(server.outbound.size)  # Data waiting to be written to the client, with the time it was queued
+        self.writer = threading.Thread(target=self.write, daemon=True)  # Drains the outbox
         self.socket.settimeout(CLIENT_TIMEOUT)  # Set a short timeout (1 second) for recv()
 
     def __str__(self):
         return str(self.id) + " " + str(self.address)
 
+    def send(self, data: bytes):
+        """
+        Queue data to be written to the client by its writer thread.
+        Raises OSError if the connection is closed, or if the queue is full and the client was dropped.
+        """
+        if not self.signal:
+            raise OSError(f"Connection to client {self.id} is closed.")
+        outbound = self.server.outbound
+        item = (data, latency.start())
+        try:
+            self.outbox.put_nowait(item)
+        except queue.Full:
+            if outbound.policy == BLOCK:
+                outbound.record_block()
+                try:
+                    self.outbox.put(item, timeout=outbound.timeout)
+                    return
+                except queue.Full:
+                    pass
+            self.drop()
+            raise OSError(f"Outbound queue of client {self.id} is full.")
+        outbound.record_depth(self.outbox.qsize())
+
+    def depth(self) -> int:
+        """Number of writes waiting in the outbox."""
+        return self.outbox.qsize()
+
+    def drop(self):
+        """Disconnect the client because it does not keep up. The receiving loop then handles the disconnection."""
+        logger.warning(f"Dropping client {self.id}: outbound queue is full.")
+        self.server.outbound.record_drop()
+        self.close()
+
+    def close(self):
+        """Shut the connection down. The receiving loop sees it closing and handles the disconnection."""
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def write(self):
+        """Writes the queued data to the socket, coalescing the writes queued meanwhile."""
+        while self.signal:
+            try:
+                chunks = [self.outbox.get(timeout=CLIENT_TIMEOUT)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    chunks.append(self.outbox.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                send_buffers(self.socket, [data for data, _ in chunks])
+            except OSError:
+                self.close()
+            if latency.enabled:
+                for _, queued in chunks:
+                    latency.stop("server.queue", queued)
+
     def run(self):
+        self.writer.start()
         while self.signal:
             try:
-                data = self.socket.recv(256)
+                data = self.decoder.receive(self.socket)
                 if data:
                     # Pass the received data to the server for broadcasting
                     self.server.route_message(self, data)
@@ -49,28 +149,28 @@ class Client(threading.Thread):
                     self.server.route_message(self, self.server.disconnection_message.encode("utf-8"))
                 self.server.remove_client(self)
                 break
+        self.writer.join()
 
 
 
 class Server(threading.Thread):
-    def __init__(self, host="localhost", port=12345):
+    def __init__(self, host="localhost", port=12345, transport: Transport | None = None, outbound: Outbound | None = None):
         threading.Thread.__init__(self)
         self.host = host
         self.port = port
+        self.transport = TCPTransport(host, port) if transport is None else transport  # Creates the listening socket
+        self.outbound = Outbound() if outbound is None else outbound  # Outbound queue settings and counters
         self.socket = None
         self.signal = True
-        self.connections: list[Client] = []  # Store connected clients
-        self.total_connections = 0  # Count the total connections
+        self.connections = ConnectionRegistry()  # Connected clients, indexed by ID
         self.broadcast_disconnection = False
         self.disconnection_message = ""
 
     def setup_socket(self):
         """Setup the server socket, bind, and listen for connections."""
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.bind((self.host, self.port))
-        self.socket.listen(MAX_CONNECTIONS)
+        self.socket = self.transport.listen(BACKLOG)
         self.socket.settimeout(SERVER_TIMEOUT)  # Add a timeout so the accept loop can regularly check for shutdown
-        logger.success(f"Server listening on {self.host}:{self.port}")
+        logger.success(f"Server listening on {self.transport}")
 
     def run(self):
         self.setup_socket()
@@ -82,29 +182,30 @@ class Server(threading.Thread):
                     self.signal = False
                     break
                 sock, address = self.socket.accept()
-                # TODO: assign the first available client id 
-                new_client = Client(sock, address, self.total_connections, "Name", True, self)
-                self.connections.append(new_client)
+                new_client = Client(sock, address, None, "Name", True, self)
+                self.add_client(new_client)
                 new_client.start()
                 logger.success(f"New connection at ID {new_client}")
-                self.total_connections += 1
             except OSError:
                 continue
 
-    def route_message(self, sender: Client, message: bytes):
+    def route_message(self, sender: Client, message: bytes | memoryview):
         """Broadcast a message from the sender to all other connected clients."""
-        logger.info(f"Broadcasting from ID {sender.id}: {message.decode('utf-8')}")
+        logger.info(f"Broadcasting from ID {sender.id}: {bytes(message).decode('utf-8')}")
         for client in self.connections:
             if client.id != sender.id:  # Do not send the message back to the sender
                 try:
-                    client.socket.sendall(message)
+                    client.send(bytes(message))  # The received data is only valid until the next read
                 except OSError:
                     self.remove_client(client)
 
+    def add_client(self, client: Client):
+        """Helper method to add a new client to the server's connection registry, under the first available ID."""
+        client.id = self.connections.add(client)
+
     def remove_client(self, client: Client):
-        """Helper method to remove a client from the server's connection list."""
-        if client in self.connections:
-            self.connections.remove(client)
+        """Helper method to remove a client from the server's connection registry."""
+        if self.connections.remove(client):
             logger.info(f"Client {client.address} removed from server.")
 
     def shutdown(self):
@@ -118,11 +219,14 @@ class Server(threading.Thread):
         # Signal all threads to finish
         self.signal = False
         self.join()
+        self.transport.close()
 
         for client in self.connections:
             client.signal = False
             client.join()
 
+        logger.info(f"Outbound queues: {self.outbound.stats(self.connections)}")
+        latency.dump()
         logger.info("Server terminated.")
 
 
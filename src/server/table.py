@@ -0,0 +1,46 @@
+from .registry import ConnectionRegistry
+from client.game.core import MAX_PLAYERS
+
+
+DEFAULT_TABLE = "default"  # Table of the clients that never join one
+TABLE_SIZE = MAX_PLAYERS + 1  # Seats of an auto-assigned table (root and players)
+
+
+class Table:
+    """
+    Group of clients playing the same game.
+
+    Each table has its own ID space: the first client seated gets ID 0 (the root) and the next ones
+    get the smallest free ID, so the IDs of clients that left are reused. Messages are only routed between
+    clients of the same table.
+    """
+
+    def __init__(self, name: str, size: int | None = None):
+        """
+        __init__ method for Table class.
+
+        Arguments:
+            name {str} -- name of the table
+
+        Keyword Arguments:
+            size {int | None} -- number of seats, None for no limit (default: None)
+        """
+        self.name = name
+        self.size = size
+        self.connections = ConnectionRegistry()  # Clients seated at the table, indexed by ID
+
+    def __str__(self):
+        return f"{self.name} ({len(self.connections)} clients)"
+
+    def is_full(self) -> bool:
+        """Returns whether every seat of the table is taken."""
+        return self.size is not None and len(self.connections) >= self.size
+
+    def seat(self, client):
+        """Seats a client at the table, giving it the smallest free ID of the table."""
+        client.id = self.connections.add(client)
+        client.table = self
+
+    def leave(self, client):
+        """Removes a client from the table, releasing its ID."""
+        self.connections.remove(client)
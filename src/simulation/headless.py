@@ -0,0 +1,237 @@
+from client.root import Root
+from client.player import InformedPlayer
+from client.game.core import MIN_PLAYERS, MAX_PLAYERS
+from terminal.terminal import NullTerminal
+from utils.hotlog import hotlog
+from collections import deque
+import random
+from loguru import logger
+
+
+ROOT_ADDR = 0
+MAX_MESSAGES = 100000  # Maximum number of delivered messages before a game is considered stuck
+
+
+class Mailbox:
+    """
+    Replacement for a player's checkout queue.
+
+    Every message the player puts in the mailbox is handed straight to the game loop,
+    addressed to the root, the same way the server would route it.
+    """
+
+    def __init__(self, game: "HeadlessGame", addr: int):
+        self.game = game
+        self.addr = addr
+
+    def put(self, message: str):
+        self.game.post(ROOT_ADDR, self.addr, message)
+
+
+class HeadlessRoot(Root):
+    """
+    Root player that delivers its messages in memory instead of putting network envelopes in its checkout.
+    """
+
+    def __init__(self, game: "HeadlessGame", num_players: int, rng: random.Random):
+        super().__init__("auto", NullTerminal(), num_players, rng)
+        self.game = game
+
+    def _send_single(self, game_msg: str, dest: str):
+        if hotlog.enabled:
+            logger.info("Sent to player {}: {}", dest, game_msg)
+        self.game.post(int(dest), ROOT_ADDR, game_msg)
+
+    def _send_all(self, game_msg: str):
+        if hotlog.enabled:
+            logger.info("Sent to ALL players: {}", game_msg)
+        self.game.broadcast(game_msg, ROOT_ADDR)
+
+    def _send_except(self, game_msg: str, exclude: str):
+        if hotlog.enabled:
+            logger.info("Sent to all except player {}: {}", exclude, game_msg)
+        self.game.broadcast(game_msg, int(exclude))
+
+
+class HeadlessSnapshot:
+    """
+    State of a headless game, taken by HeadlessGame.snapshot() and brought back by HeadlessGame.restore().
+
+    The snapshot owns its copies of the root, the bots and the messages waiting to be delivered,
+    so it can be restored any number of times, into the game it was taken from or into another one.
+    """
+
+    __slots__ = ("root", "bots", "queue", "delivered", "transcript")
+
+
+class HeadlessGame:
+    """
+    Plays a full game of Coup inside a single process.
+
+    The root and the bots are wired together with direct method calls, so no server, socket or thread is needed.
+    Messages are delivered in the order they are sent, with the same addressing rules as the server:
+    the root is always ID 0 and the bots get IDs 1 to N in the order they are given.
+
+    Every random decision is taken from generators derived from a single seed, so a game played twice with the
+    same seed and the same bots produces the same transcript.
+    """
+
+    def __init__(self, bots: list[type[InformedPlayer]], seed: int | None = None, record: bool = False):
+        """
+        __init__ method for HeadlessGame class.
+
+        Arguments:
+            bots {list[type[InformedPlayer]]} -- bot classes that will play the game, one per seat
+
+        Keyword Arguments:
+            seed {int | None} -- seed of the game, None for a random game (default: None)
+            record {bool} -- keep the transcript of all delivered messages (default: False)
+        """
+        if not MIN_PLAYERS <= len(bots) <= MAX_PLAYERS:
+            raise ValueError(f"A game needs between {MIN_PLAYERS} and {MAX_PLAYERS} players.")
+
+        self.seed = seed
+        rng = random.Random(seed)
+        self.queue: deque[tuple[int, int, str]] = deque()
+        """Messages waiting to be delivered, as (destination, origin, message)."""
+        self.transcript: list[str] | None = [] if record else None
+        """Delivered messages, as "origin>destination: message". None if the game is not recorded."""
+        self.root = HeadlessRoot(self, len(bots), random.Random(rng.getrandbits(64)))
+        self.bots: dict[int, InformedPlayer] = {}
+        """Bots in the game, indexed by their ID."""
+        self.delivered = 0
+        """Number of messages delivered so far."""
+        self.winner: str | None = None
+        """ID of the winning player, None if the game did not finish."""
+
+        # Connect the bots, in order, as the server would
+        for addr, bot_class in enumerate(bots, start=1):
+            bot = bot_class(NullTerminal(), random.Random(rng.getrandbits(64)))
+            self.connect(addr, bot)
+
+    def connect(self, addr: int, bot: InformedPlayer):
+        """
+        Registers a bot and forwards the messages it sent before being connected (i.e. HELLO).
+
+        Arguments:
+            addr {int} -- bot ID
+            bot {InformedPlayer} -- bot instance
+        """
+        pending = bot.checkout
+        bot.checkout = Mailbox(self, addr)
+        self.bots[addr] = bot
+        while not pending.empty():
+            bot.checkout.put(pending.get_nowait())
+
+    def post(self, dest: int, orig: int, message: str):
+        """
+        Queues a message for delivery.
+
+        Arguments:
+            dest {int} -- destination ID
+            orig {int} -- origin ID
+            message {str} -- game message
+        """
+        self.queue.append((dest, orig, message))
+
+    def broadcast(self, message: str, exclude: int):
+        """
+        Queues a message for every bot except the given one.
+
+        Arguments:
+            message {str} -- game message
+            exclude {int} -- ID of the bot that won't receive the message
+        """
+        for addr in self.bots:
+            if addr != exclude:
+                self.queue.append((addr, ROOT_ADDR, message))
+
+    def step(self) -> bool:
+        """
+        Delivers the next message, e.g. to stop a game at a given point and take a snapshot.
+
+        Returns:
+            bool -- True if a message was delivered, False if there was no message left.
+        """
+        if not self.queue:
+            return False
+        dest, orig, message = self.queue.popleft()
+        self.delivered += 1
+        if self.transcript is not None:
+            self.transcript.append(f"{orig}>{dest}: {message}")
+        if dest == ROOT_ADDR:
+            self.root.receive_from(str(orig), message)
+        elif dest in self.bots:
+            self.bots[dest].receive(message)
+        return True
+
+    def run(self) -> str | None:
+        """
+        Plays the game until there are no more messages to deliver.
+
+        Returns:
+            str | None -- ID of the winning player, None if the game did not finish.
+        """
+        while self.queue:
+            if self.delivered >= MAX_MESSAGES:
+                logger.error(f"Game stopped after {MAX_MESSAGES} messages.")
+                return None
+            self.step()
+
+        if self.root.sm.current_state.name != "END":
+            logger.error(f"Game stalled in state {self.root.sm.current_state.name}.")
+            return None
+
+        alive = [player.id for player in self.root.players.values() if player.alive]
+        self.winner = alive[0] if len(alive) == 1 else None
+        return self.winner
+
+    def snapshot(self) -> HeadlessSnapshot:
+        """
+        Takes a snapshot of the game: the root, a copy of every bot and the messages waiting to be delivered.
+
+        Returns:
+            HeadlessSnapshot -- snapshot, to be passed to restore()
+        """
+        snapshot = HeadlessSnapshot()
+        snapshot.root = self.root.snapshot()
+        snapshot.bots = {addr: bot.fork() for addr, bot in self.bots.items()}
+        snapshot.queue = tuple(self.queue)
+        snapshot.delivered = self.delivered
+        snapshot.transcript = None if self.transcript is None else self.transcript.copy()
+        return snapshot
+
+    def restore(self, snapshot: HeadlessSnapshot, seed: int | None = None):
+        """
+        Brings the game back to a snapshot, to play a continuation of the game it was taken from.
+        The snapshot is left untouched, so one game can be forked into many continuations.
+
+        Arguments:
+            snapshot {HeadlessSnapshot} -- snapshot taken by snapshot(), on this game or on another one
+
+        Keyword Arguments:
+            seed {int | None} -- seed of the continuation, None to make the same decisions as the original game (default: None)
+        """
+        self.root.restore(snapshot.root)
+        self.bots = {}
+        for addr, bot in snapshot.bots.items():
+            bot = bot.fork()
+            bot.checkout = Mailbox(self, addr)
+            self.bots[addr] = bot
+        self.queue = deque(snapshot.queue)
+        self.delivered = snapshot.delivered
+        self.transcript = None if snapshot.transcript is None else snapshot.transcript.copy()
+        self.winner = None
+        if seed is not None:
+            # Same derivation as a new game, so a continuation is reproducible from its seed
+            self.seed = seed
+            rng = random.Random(seed)
+            self.root.rng.seed(rng.getrandbits(64))
+            for bot in self.bots.values():
+                bot.rng.seed(rng.getrandbits(64))
+
+    def winner_class(self) -> type[InformedPlayer] | None:
+        """Returns the class of the winning bot, None if there is no winner."""
+        if self.winner is None:
+            return None
+        return type(self.bots[int(self.winner)])
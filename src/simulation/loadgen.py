@@ -0,0 +1,279 @@
+from server.coup_server import CoupServer, AsyncCoupServer
+from server.outbound import Outbound, BLOCK, OUTBOX_SIZE
+from server.table import TABLE_SIZE
+from proto.network_proto import trusted_network_proto
+from proto.framing import FrameDecoder
+from proto.transport import Transport, make_transport, DEFAULT_UNIX_PATH
+from utils.latency import latency, Histogram
+from utils.hotlog import hotlog
+import multiprocessing
+import threading
+import selectors
+import random
+import socket
+import time
+
+
+ROOT_ADDR = 0
+JOIN_DELAY = 0.5  # Time given to the JOIN messages to be routed, so the roots get ID 0 before the players join
+READY_TIMEOUT = 10.0  # Maximum time waiting for the server to listen and the clients to connect
+MAX_BURST = 64  # Maximum number of messages sent between two reads, when the generator is behind schedule
+DRAIN_TIME = 0.5  # Time without data after which the clients stop waiting for the last deliveries
+
+# Traffic of a table, as the number of messages of each kind per 10 messages: the players reply to the root
+# (SINGLE to ID 0) and the root broadcasts to every player (ALL), to all but one (EXCEPT) or talks to one (SINGLE)
+MIX = {"reply": 6, "all": 2, "except": 1, "single": 1}
+
+
+def expected_deliveries(kind: str, table_size: int) -> int:
+    """
+    Returns the number of clients that receive a message of the given kind.
+
+    Arguments:
+        kind {str} -- one of the MIX kinds
+        table_size {int} -- number of clients at the table, root included
+
+    Returns:
+        int -- number of deliveries
+    """
+    if kind == "all":
+        return table_size - 1
+    if kind == "except":
+        return table_size - 2
+    return 1
+
+
+def connect(transport: Transport) -> socket.socket:
+    """Connects to the server, retrying until it listens or READY_TIMEOUT is over."""
+    deadline = time.perf_counter() + READY_TIMEOUT
+    while True:
+        try:
+            return transport.connect()
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def serve(server_class: type, transport: Transport, outbound: Outbound, conn):
+    """
+    Runs the server under load. Runs inside the server process.
+
+    The process waits for "start", then reports the CPU time used and the routing latency once it receives "stop".
+
+    Arguments:
+        server_class {type} -- CoupServer or AsyncCoupServer
+        transport {Transport} -- listening transport
+        outbound {Outbound} -- outbound queue settings
+        conn {Connection} -- pipe to the load generator
+    """
+    latency.enable()
+    hotlog.quiet()  # Measure the routing, not the logging
+    server = server_class(transport=transport, outbound=outbound)
+    server.broadcast_disconnection = False  # There is no game to tell when the clients leave
+    server.start()
+
+    conn.recv()
+    latency.dump(reset=True)  # Only keep the routing done under load
+    cpu, wall = time.process_time(), time.perf_counter()
+    conn.recv()
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+    report = {"cpu": cpu, "wall": wall, "route": latency.histograms.get("server.route", Histogram()),
+              "outbound": outbound.stats(server.connections)}
+    server.shutdown()
+    conn.send(report)
+
+
+def drive(transport: Transport, names: list[str], table_size: int, rate: float, duration: float, seed: int | None,
+          barrier, results):
+    """
+    Plays the synthetic clients of some tables. Runs inside a load generator process.
+
+    Every client of a table is a plain socket: the first one joins as the root, the others as players. Once every
+    generator is connected, messages are sent at _rate_ for _duration_ seconds, following MIX. Each message carries
+    the time it was sent, so the receivers record the delivery latency.
+
+    Arguments:
+        transport {Transport} -- transport of the server
+        names {list[str]} -- names of the tables
+        table_size {int} -- clients per table, root included
+        rate {float} -- messages sent per second by this generator
+        duration {float} -- time spent sending, in seconds
+        seed {int | None} -- seed of the traffic
+        barrier {Barrier} -- synchronizes the start of the generators
+        results {Queue} -- receives the report of the generator
+    """
+    rng = random.Random(seed)
+    selector = selectors.DefaultSelector()
+    tables: list[list[socket.socket]] = [[] for _ in names]
+    decoders: dict[socket.socket, FrameDecoder] = {}
+    try:
+        # Seat the roots, then the players
+        for seats in (1, table_size - 1):
+            for name, clients in zip(names, tables):
+                for _ in range(seats):
+                    sock = connect(transport)
+                    sock.sendall(trusted_network_proto.JOIN(name).encode("utf-8"))
+                    clients.append(sock)
+                    decoders[sock] = FrameDecoder()
+                    selector.register(sock, selectors.EVENT_READ)
+            time.sleep(JOIN_DELAY)
+        barrier.wait(READY_TIMEOUT)
+    except (OSError, threading.BrokenBarrierError):
+        barrier.abort()
+        raise
+
+    delivery = Histogram()
+    kinds, weights = list(MIX), list(MIX.values())
+    sent = expected = received = closed = 0
+
+    def receive(timeout: float):
+        nonlocal received, closed
+        events = selector.select(timeout)
+        now = time.perf_counter_ns()
+        for key, _ in events:
+            sock = key.fileobj
+            decoder = decoders[sock]
+            try:
+                data = decoder.receive(sock)
+            except OSError:
+                data = b""
+            if not data:
+                selector.unregister(sock)
+                closed += 1
+                continue
+            decoder.feed(data)
+            for frame in decoder.frames():
+                stamp = frame.rpartition(b"PING ")[2]
+                if stamp.isdigit():
+                    received += 1
+                    delivery.add((now - int(stamp)) / 1e9)
+        return len(events)
+
+    begin = time.perf_counter()
+    end = begin + duration
+    while (now := time.perf_counter()) < end:
+        for _ in range(min(int((now - begin) * rate) - sent, MAX_BURST)):
+            clients = rng.choice(tables)
+            kind = rng.choices(kinds, weights)[0]
+            player = rng.randrange(1, table_size)
+            message = f"PING {time.perf_counter_ns()}"
+            if kind == "reply":
+                sock, data = clients[player], trusted_network_proto.SINGLE(ROOT_ADDR, message)
+            elif kind == "all":
+                sock, data = clients[ROOT_ADDR], trusted_network_proto.ALL(message)
+            elif kind == "except":
+                sock, data = clients[ROOT_ADDR], trusted_network_proto.EXCEPT(player, message)
+            else:
+                sock, data = clients[ROOT_ADDR], trusted_network_proto.SINGLE(player, message)
+            try:
+                sock.sendall(data.encode("utf-8"))
+            except OSError:
+                continue  # Dropped by the server, counted when the socket is read
+            sent += 1
+            expected += expected_deliveries(kind, table_size)
+        receive(max(begin + (sent + 1) / rate - time.perf_counter(), 0))
+
+    # Wait for the messages still on their way
+    while received < expected and receive(DRAIN_TIME):
+        pass
+    for clients in tables:
+        for sock in clients:
+            sock.close()
+    results.put({"sent": sent, "expected": expected, "received": received, "closed": closed, "delivery": delivery})
+
+
+class LoadGenerator:
+    """
+    Measures how much traffic a Coup server carries.
+
+    The server runs in its own process and the synthetic clients in one or more generator processes, all on this
+    host. Each table is a root and players that send messages at a target rate, without playing a game, so the
+    server does nothing but routing. The report merges what the server measured (CPU time, routing latency,
+    outbound queues) and what the clients measured (messages sent and delivered, delivery latency).
+    """
+
+    def __init__(self, tables: int, table_size: int = TABLE_SIZE, rate: float = 1000, duration: float = 10.0,
+                 processes: int = 1, seed: int | None = None):
+        """
+        __init__ method for LoadGenerator class.
+
+        Arguments:
+            tables {int} -- number of tables
+
+        Keyword Arguments:
+            table_size {int} -- clients per table, root included (default: TABLE_SIZE)
+            rate {float} -- messages sent per second, over all the tables (default: 1000)
+            duration {float} -- time spent sending, in seconds (default: 10.0)
+            processes {int} -- number of generator processes (default: 1)
+            seed {int | None} -- seed of the traffic (default: None)
+        """
+        if table_size < 3:
+            raise ValueError("A table needs a root and at least 2 players.")
+        self.tables = tables
+        self.table_size = table_size
+        self.rate = rate
+        self.duration = duration
+        self.processes = min(processes, tables)
+        self.seed = seed
+
+    def run(self, concurrency: str = "threads", transport: str = "tcp", host="localhost", port=12345,
+            path=DEFAULT_UNIX_PATH, policy: str = BLOCK, size: int = OUTBOX_SIZE) -> dict:
+        """
+        Starts a server, loads it and stops it.
+
+        Keyword Arguments:
+            concurrency {str} -- 'threads' or 'asyncio' server (default: 'threads')
+            transport {str} -- 'tcp' or 'unix' (default: 'tcp')
+            host {str} -- address of the tcp transport (default: "localhost")
+            port {int} -- port of the tcp transport (default: 12345)
+            path {str} -- socket file of the unix transport (default: DEFAULT_UNIX_PATH)
+            policy {str} -- policy of the full outbound queues (default: BLOCK)
+            size {int} -- size of the outbound queues (default: OUTBOX_SIZE)
+
+        Returns:
+            dict -- sent, expected, received and closed counts, delivery and route histograms, server cpu and wall
+                time, and outbound queue stats
+
+        Raises:
+            RuntimeError: If the generators could not connect to the server.
+        """
+        transport = make_transport(transport, host, port, path)
+        server_class = AsyncCoupServer if concurrency == "asyncio" else CoupServer
+        conn, server_conn = multiprocessing.Pipe()
+        server = multiprocessing.Process(target=serve, args=(server_class, transport, Outbound(policy, size), server_conn))
+        server.start()
+
+        names = [f"load-{i}" for i in range(self.tables)]
+        barrier = multiprocessing.Barrier(self.processes + 1)
+        results = multiprocessing.Queue()
+        rng = random.Random(self.seed)
+        generators = [multiprocessing.Process(target=drive, args=(transport, names[i::self.processes], self.table_size,
+                                                                  self.rate / self.processes, self.duration,
+                                                                  rng.getrandbits(64), barrier, results))
+                      for i in range(self.processes)]
+        for generator in generators:
+            generator.start()
+
+        try:
+            barrier.wait(READY_TIMEOUT * 2 + JOIN_DELAY * 2)
+        except threading.BrokenBarrierError:
+            for process in generators + [server]:
+                process.terminate()
+            raise RuntimeError("The load generators could not connect to the server.")
+
+        conn.send("start")
+        reports = [results.get() for _ in generators]
+        conn.send("stop")
+        report = conn.recv()
+        for process in generators + [server]:
+            process.join()
+
+        delivery = Histogram()
+        for generator_report in reports:
+            delivery.merge(generator_report.pop("delivery"))
+            for key, value in generator_report.items():
+                report[key] = report.get(key, 0) + value
+        report["delivery"] = delivery
+        return report
@@ -0,0 +1,131 @@
+from .headless import HeadlessGame
+from client.bots import BOTS
+from client.game.core import MAX_PLAYERS
+from utils.hotlog import hotlog
+import multiprocessing
+import random
+from loguru import logger
+
+
+CHUNK_SIZE = 16  # Number of games sent to a worker at once
+
+
+def pick_lineup(spec: list[str], size: int, rng: random.Random) -> list[str]:
+    """
+    Picks the bots that will play a game.
+
+    If the spec has exactly _size_ bots, it is used as is, only the seats are shuffled.
+    If it has more, _size_ of them are drawn without repetition. If it has fewer, every bot of the spec
+    plays, and the remaining seats are drawn from the spec with repetition.
+
+    Arguments:
+        spec {list[str]} -- names of the bots that can be picked
+        size {int} -- number of players in the game
+        rng {Random} -- random number generator used to draw the bots
+
+    Returns:
+        list[str] -- names of the bots, one per seat
+    """
+    if size <= len(spec):
+        return rng.sample(spec, size)
+    lineup = spec + rng.choices(spec, k=size - len(spec))
+    rng.shuffle(lineup)
+    return lineup
+
+
+def play_game(task: tuple[list[str], int, int | None]) -> tuple[list[str], str | None]:
+    """
+    Plays one headless game. Runs inside a worker process.
+
+    Arguments:
+        task {tuple[list[str], int, int | None]} -- matchup spec, number of players and game seed
+
+    Returns:
+        tuple[list[str], str | None] -- bot names that played and the name of the winner (None if there was no winner)
+    """
+    spec, size, seed = task
+    rng = random.Random(seed)
+    lineup = pick_lineup(spec, size, rng)
+    game = HeadlessGame([BOTS[name] for name in lineup], rng.getrandbits(64))
+    game.run()
+    winner = game.winner_class()
+    return lineup, winner.__name__ if winner is not None else None
+
+
+def _init_worker():
+    logger.remove()  # Games in the workers are silent
+    hotlog.quiet()
+
+
+class Tournament:
+    """
+    Runs many headless games in parallel, one game per worker task, and merges the results per bot class.
+    """
+
+    def __init__(self, spec: list[str], size: int = MAX_PLAYERS, processes: int | None = None, seed: int | None = None):
+        """
+        __init__ method for Tournament class.
+
+        Arguments:
+            spec {list[str]} -- names of the bots taking part in the tournament
+
+        Keyword Arguments:
+            size {int} -- number of players per game (default: MAX_PLAYERS)
+            processes {int | None} -- number of worker processes (default: number of CPUs)
+            seed {int | None} -- seed of the tournament, game i is played with seed + i (default: None)
+        """
+        for name in spec:
+            if name not in BOTS:
+                raise ValueError(f"Unknown bot: {name}")
+        self.spec = spec
+        self.size = size
+        self.processes = processes
+        self.seed = seed
+        self.played = 0
+        """Number of games played so far."""
+        self.games: dict[str, int] = {name: 0 for name in spec}
+        """Number of games played by each bot class (a class is counted once per seat)."""
+        self.wins: dict[str, int] = {name: 0 for name in spec}
+        """Number of games won by each bot class."""
+        self.unfinished = 0
+        """Number of games without a winner."""
+
+    def run(self, games: int):
+        """
+        Plays _games_ games and accumulates the results.
+
+        Arguments:
+            games {int} -- number of games to play
+        """
+        tasks = [(self.spec, self.size, self.game_seed(self.played + i)) for i in range(games)]
+        self.played += games
+        with multiprocessing.Pool(self.processes, initializer=_init_worker) as pool:
+            for lineup, winner in pool.imap_unordered(play_game, tasks, CHUNK_SIZE):
+                self.add_result(lineup, winner)
+
+    def game_seed(self, index: int) -> int | None:
+        """Returns the seed of the game with the given index, None if the tournament is not seeded."""
+        return None if self.seed is None else self.seed + index
+
+    def add_result(self, lineup: list[str], winner: str | None):
+        """Merges the result of one game."""
+        for name in lineup:
+            self.games[name] += 1
+        if winner is None:
+            self.unfinished += 1
+        else:
+            self.wins[winner] += 1
+
+    def win_rate(self, name: str) -> float:
+        """Returns the number of wins per game played by a bot class."""
+        return self.wins[name] / self.games[name] if self.games[name] else 0.0
+
+    def ranking(self) -> list[tuple[str, int, int, float]]:
+        """
+        Returns the bot classes ordered by win rate.
+
+        Returns:
+            list[tuple[str, int, int, float]] -- (name, games, wins, win rate) for each bot class
+        """
+        names = sorted(self.games, key=self.win_rate, reverse=True)
+        return [(name, self.games[name], self.wins[name], self.win_rate(name)) for name in names]
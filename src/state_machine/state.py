@@ -1,5 +1,9 @@
 from typing import Callable, Dict, List, Optional, Tuple
 
+
+MAX_STEPS = 64  # Default maximum number of transitions taken by a single run()
+
+
 class State:
     """ 
     Represents a state in a state machine. 
@@ -8,7 +12,8 @@ class State:
     The entry and exit actions default to no action and can be overridden by passing a function to the constructor.
     """
     
-    def __init__(self, name: str, entry_action: Optional[Callable[[], None]] = None, exit_action: Optional[Callable[[], None]] = None):
+    def __init__(self, name: str, entry_action: Optional[Callable[[], None]] = None, exit_action: Optional[Callable[[], None]] = None,
+                 flags: int = 0):
         """
         __init__ method for State class.
 
@@ -18,10 +23,13 @@ class State:
         Keyword Arguments:
             entry_action {() -> None} -- Entry action (default: empty function)
             exit_action {() -> None} -- Exit action (default: empty function)
+            flags {int} -- Bit flags defined by the owner of the state machine, e.g. the family of the state (default: 0)
         """
         self.name: str = name
         self.entry_action = entry_action or self._no_action
         self.exit_action = exit_action or self._no_action
+        self.flags: int = flags
+        self.id: int = -1  # Index of the state in its compiled state machine, -1 until compiled
 
     def _no_action(self) -> None:
         pass
@@ -35,6 +43,10 @@ class StateMachine:
     
     The state machine has a current state and a dictionary of states and transitions.
     The state machine can add states, add transitions between states, set the current state, and update the state machine.
+
+    Once every state and transition is added, compile() gives each state an integer ID and turns the transitions
+    into a dispatch table indexed by state ID, so update() doesn't look anything up by name. Adding a state or a
+    transition afterwards falls back to the string tables until the machine is compiled again.
     """
     
     def __init__(self, initial_state: State):
@@ -47,8 +59,11 @@ class StateMachine:
         
         self.states: Dict[str, State] = {}
         self.transitions: Dict[str, List[Tuple[str, Callable[[], bool]]]] = {}
+        self.initial_state: State = initial_state
         self.current_state: State = initial_state
         self.previous_state: Optional[State] = None
+        self.by_id: List[State] = []  # Compiled states, indexed by ID
+        self.dispatch: Optional[List[List[Tuple[State, Callable[[], bool]]]]] = None  # Compiled transitions, indexed by state ID
 
     def add_state(self, state: State) -> None:
         """
@@ -59,6 +74,7 @@ class StateMachine:
         """
         
         self.states[state.name] = state
+        self.dispatch = None
 
     def add_transition(self, from_state: str, to_state: str, condition) -> None:
         """
@@ -73,6 +89,30 @@ class StateMachine:
         if from_state not in self.transitions:
             self.transitions[from_state] = []
         self.transitions[from_state].append((to_state, condition))
+        self.dispatch = None
+
+    def compile(self) -> None:
+        """
+        Gives each state an integer ID and builds the dispatch table of the transitions.
+
+        Raises:
+            ValueError: If a transition leads to a state that does not exist in the state machine.
+        """
+        states = dict(self.states)
+        states.setdefault(self.initial_state.name, self.initial_state)
+        self.by_id = list(states.values())
+        for state_id, state in enumerate(self.by_id):
+            state.id = state_id
+
+        dispatch = []
+        for state in self.by_id:
+            transitions = []
+            for (next_state, condition) in self.transitions.get(state.name, []):
+                if next_state not in states:
+                    raise ValueError(f"State {next_state} does not exist in the state machine")
+                transitions.append((states[next_state], condition))
+            dispatch.append(transitions)
+        self.dispatch = dispatch
 
     def set_state(self, state_name: str) -> None:
         """
@@ -86,22 +126,64 @@ class StateMachine:
             ValueError: If the state name does not exist in the state machine.
         """
         if state_name in self.states:
-            self.previous_state = self.current_state
-            self.current_state.exit_action()
-            self.current_state = self.states[state_name]
-            self.current_state.entry_action()
+            self.enter(self.states[state_name])
         else:
             raise ValueError(f"State {state_name} does not exist in the state machine")
 
-    def update(self) -> None:
+    def enter(self, state: State) -> None:
+        """
+        Makes a state of the state machine the current state, executing the exit and entry actions.
+
+        Arguments:
+            state {State} -- The new current state.
+        """
+        self.previous_state = self.current_state
+        self.current_state.exit_action()
+        self.current_state = state
+        state.entry_action()
+
+    def reset(self) -> None:
+        """
+        Returns the state machine to its initial state, without executing any entry or exit action.
+        """
+        self.previous_state = None
+        self.current_state = self.initial_state
+
+    def update(self) -> bool:
         """
         Updates the state of the state machine based on the transitions defined.
+        Takes the first transition of the current state whose condition holds, if any.
+
+        Returns:
+            bool -- True if a transition was taken.
         """
-        if self.current_state.name in self.transitions:
+        if self.dispatch is not None:
+            for (next_state, condition) in self.dispatch[self.current_state.id]:
+                if condition():
+                    self.enter(next_state)
+                    return True
+        elif self.current_state.name in self.transitions:
             for (next_state, condition) in self.transitions[self.current_state.name]:
                 if condition():
                     self.set_state(next_state)
-                    break
+                    return True
+        return False
+
+    def run(self, guard: Optional[Callable[[], bool]] = None, max_steps: int = MAX_STEPS) -> int:
+        """
+        Keeps updating the state machine until it settles: no transition holds, or the guard is False.
+
+        Keyword Arguments:
+            guard {() -> bool} -- Checked before each update, e.g. whether the machine waits for an event (default: always True)
+            max_steps {int} -- Maximum number of transitions, in case conditions that always hold form a loop (default: MAX_STEPS)
+
+        Returns:
+            int -- Number of transitions taken. max_steps means the machine did not settle.
+        """
+        steps = 0
+        while steps < max_steps and (guard is None or guard()) and self.update():
+            steps += 1
+        return steps
 
 
 if __name__ == "__main__":
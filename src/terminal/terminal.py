@@ -25,5 +25,20 @@ class Terminal(threading.Thread):
         except:
             logger.error(f"Error in Terminal")
             self.signal = False
+        # Wake up an event loop watching the queue, so it notices the terminal closed
+        wake = getattr(self.fifo, "wake", None)
+        if wake is not None:
+            wake()
         
         
+
+
+class NullTerminal:
+    """
+    Terminal placeholder for players that are not attached to a console.
+
+    No thread is started and nothing is read, so it can be given to players that are
+    driven entirely by code (e.g. bots in a headless game).
+    """
+    def __init__(self):
+        self.signal = True
@@ -1,5 +1,40 @@
 import unittest
-from proto.game_proto import game_proto, GameMessage
+from proto.game_proto import game_proto, trusted_game_proto, GameMessage
+from proto.network_proto import NetworkMessage, split_frame
+from proto.protobase import MessageCache
+from proto import binary_proto
+from proto.framing import FrameDecoder, MIN_READ_SIZE
+from client.game.state_machine import PlayerSim, PlayerState, clone_players
+from client.game.deck import CourtDeck
+from simulation.headless import HeadlessGame
+from client.bots import BOTS
+from state_machine.state import State, StateMachine
+from client.root import Root, state_family, S_SETUP, S_ACTION, S_BLOCK, S_CHOOSE
+from terminal.terminal import NullTerminal
+from server.table import Table
+from server.registry import ConnectionRegistry
+from server.server import Client as ServerClient, send_buffers
+from server.coup_server import Envelope, CoupServer, AsyncCoupServer
+from server.outbound import Outbound, DROP, BLOCK
+from client.client import WakeupQueue
+from client.coup_client import CoupClient
+from proto.transport import PairTransport, UnixTransport
+from utils.latency import Histogram, Latency
+from utils.hotlog import hotlog
+from simulation.loadgen import expected_deliveries, connect, MIX
+from simulation.tournament import Tournament, pick_lineup
+import selectors
+import random
+from loguru import logger
+import os, socket, tempfile, time
+
+def drain(checkout) -> list[str]:
+    """Returns the messages waiting in a checkout queue, emptying it."""
+    messages = []
+    while not checkout.empty():
+        messages.append(checkout.get_nowait())
+    return messages
+
 
 class TestGameProto(unittest.TestCase):
 
@@ -22,6 +57,17 @@ class TestGameProto(unittest.TestCase):
         except Exception as e:
             self.fail(f"Serialization failed: {e}")
 
+    def test_serialize_trusted(self):
+        self.assertEqual(trusted_game_proto.ACT("2", "A", "3"), "ACT 2 A 3")
+        self.assertEqual(trusted_game_proto.DECK("C"), "DECK C")
+        self.assertEqual(game_proto.serialize("ACT", {"ID1": 0, "action": "tax"}, trusted=True), "ACT 0 tax")
+        with self.assertRaises(SyntaxError):
+            trusted_game_proto.serialize("CHAL", {})
+        with self.assertRaises(SyntaxError):
+            game_proto.serialize("ACT", {"ID1": "1", "action": None}, trusted=True)
+        with self.assertRaises(SyntaxError):
+            trusted_game_proto.serialize("FOO", {})
+
     def test_parse_act(self):
         try:
             msg = "ACT 0 T"
@@ -68,7 +114,572 @@ class TestGameProto(unittest.TestCase):
         self.assertEqual(msg.args, {"ID1": "0", "action": "T"})
         self.assertEqual(msg.ID1, "0")
         self.assertEqual(msg.action, "T")
+
+    def test_cached_message(self):
+        msg = GameMessage.cached("COINS 3 5")
+        self.assertIs(GameMessage.cached("COINS 3 5"), msg)
+        self.assertEqual(msg.coins, "5")
+        with self.assertRaises(AttributeError):
+            msg.coins = "6"
+        net = NetworkMessage.cached("SINGLE@0@ACT 2 T")
+        self.assertIs(NetworkMessage.cached("SINGLE@0@ACT 2 T"), net)
+        self.assertEqual(net.msg, "ACT 2 T")
+
+    def test_cached_invalid_message(self):
+        with self.assertRaises(SyntaxError):
+            GameMessage.cached("ACT 0")
+
+    def test_message_cache_bound(self):
+        cache = MessageCache(2)
+        for msg in ("OK", "CHAL 1", "OK", "CHAL 2"):
+            cache.get(msg, GameMessage)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(list(cache.messages), ["OK", "CHAL 2"])
         
 
+class TestBinaryProto(unittest.TestCase):
+
+    def test_game_payload_roundtrip(self):
+        for msg in ("ACT 2 A 3", "OK", "DECK", "DECK B C", "COINS 1 12", "ACT 007 T", "COINS 1 300", "DISCONNECT"):
+            self.assertEqual(binary_proto.decode_game(binary_proto.encode_game(msg)), msg)
+        self.assertEqual(len(binary_proto.encode_game("ACT 2 A 3")), 4)
+        self.assertEqual(binary_proto.encode_game("DISCONNECT")[0], binary_proto.RAW)
+
+    def test_frame_decoder(self):
+        data = binary_proto.encode_text("SINGLE@0@ACT 2 T\nALL@DEAD 3\n")
+        decoder = FrameDecoder(binary=True)
+        frames = []
+        for i in range(len(data)):
+            decoder.feed(data[i:i + 1])
+            frames += decoder.frames()
+        self.assertEqual([binary_proto.decode_text(frame) for frame in frames], ["SINGLE@0@ACT 2 T", "ALL@DEAD 3"])
+        with self.assertRaises(SyntaxError):
+            binary_proto.decode(b"\x00\x03\x09\x00\x00")
+
+    def test_frame_decoder_negotiation(self):
+        decoder = FrameDecoder(negotiate=True)
+        decoder.feed(b"JOIN@alpha\nSINGLE@0@O")
+        self.assertEqual(decoder.frames(), [b"JOIN@alpha"])
+        decoder.feed(b"K\n" + binary_proto.BINARY_HELLO + binary_proto.encode_text("ALL@OK\n"))
+        self.assertEqual(decoder.frames(), [b"SINGLE@0@OK"])
+        self.assertTrue(decoder.binary)
+        self.assertEqual([binary_proto.decode_text(frame) for frame in decoder.frames()], ["ALL@OK"])
+        self.assertEqual(decoder.buffer, b"")
+
+        decoder.adapt(MIN_READ_SIZE)
+        self.assertEqual(decoder.read_size, 2 * MIN_READ_SIZE)
+        decoder.adapt(1)
+        self.assertEqual(decoder.read_size, MIN_READ_SIZE)
+
+    def test_split_frame(self):
+        parsed = [split_frame(frame) for frame in (b"SINGLE@0@OK", b"ALL@DEAD 3", b"JOIN")]
+        self.assertEqual([(net_type, addr, bytes(payload)) for net_type, addr, payload in parsed],
+                         [("SINGLE", 0, b"OK"), ("ALL", None, b"DEAD 3"), ("JOIN", None, b"")])
+        for frame in (b"ALL@", b"SINGLE@x@OK", b"SINGLE@1", b"OK@1@OK"):
+            with self.assertRaises(SyntaxError):
+                split_frame(frame)
+
+        net_type, addr, payload = binary_proto.split_frame(binary_proto.encode("EXCEPT", 3, "DEAD 3"))
+        self.assertEqual((net_type, addr), ("EXCEPT", 3))
+        self.assertEqual(binary_proto.forward_frame(2, payload), binary_proto.encode("SINGLE", 2, "DEAD 3"))
+
+    def test_envelope(self):
+        envelope = Envelope(2, memoryview(b"xACT 2 T")[1:], False)
+        self.assertEqual(envelope.encode(False), b"SINGLE@2@ACT 2 T\n")
+        self.assertIs(envelope.encode(False), envelope.encode(False))
+        self.assertEqual(envelope.encode(True), binary_proto.encode("SINGLE", 2, "ACT 2 T"))
+        envelope = Envelope(1, binary_proto.encode_game("LOSE 1 C"), True)
+        self.assertEqual(envelope.encode(False), b"SINGLE@1@LOSE 1 C\n")
+        with self.assertRaises(SyntaxError):
+            Envelope(1, b"\xfe", True).encode(False)
+
+    def test_binary_client(self):
+        # Game messages go from the frames to the players and back without their text form
+        root = Root("auto", NullTerminal(), 2)
+        client = CoupClient("localhost", 0, root, binary=True)
+        client.frame_receiver(binary_proto.encode("SINGLE", 1, "HELLO"))
+        self.assertEqual(drain(root.checkout), ["SINGLE@1@PLAYER 1\n"])
+        self.assertEqual(binary_proto.encode_text("SINGLE@1@PLAYER 1\nALL@START\n"),
+                         binary_proto.encode("SINGLE", 1, "PLAYER 1") + binary_proto.encode("ALL", 0, "START"))
+
+        bot = BOTS["TestBot"](NullTerminal(), random.Random(0))
+        client = CoupClient("localhost", 0, bot, binary=True)
+        client.frame_receiver(binary_proto.encode("SINGLE", 0, "PLAYER 2"))
+        self.assertEqual(bot.id, "2")
+        client.socket, peer = socket.socketpair()
+        try:
+            client.send_move("OK")
+            self.assertEqual(peer.recv(64), binary_proto.encode("SINGLE", 0, "OK"))
+        finally:
+            client.socket.close()
+            peer.close()
+
+
+class TestTable(unittest.TestCase):
+
+    class Connection:
+        id = None
+        table = None
+
+    def test_table_ids(self):
+        tables = [Table("alpha", 3), Table("beta")]
+        seated = [self.Connection() for _ in range(4)]
+        for i, client in enumerate(seated):
+            tables[i % 2].seat(client)
+        self.assertEqual([client.id for client in seated], [0, 0, 1, 1])
+        self.assertIs(seated[2].table, tables[0])
+        self.assertFalse(tables[0].is_full())
+        tables[0].seat(self.Connection())
+        self.assertTrue(tables[0].is_full())
+        tables[0].leave(seated[2])
+        self.assertFalse(tables[0].is_full())
+        self.assertFalse(tables[1].is_full())
+
+    def test_registry_recycles_ids(self):
+        registry = ConnectionRegistry()
+        clients = [self.Connection() for _ in range(4)]
+        self.assertEqual([registry.add(client) for client in clients], [0, 1, 2, 3])
+        snapshot = list(registry)
+        self.assertTrue(registry.remove(clients[2]))
+        self.assertTrue(registry.remove(clients[1]))
+        self.assertFalse(registry.remove(clients[1]))
+        self.assertEqual(snapshot, clients)
+        self.assertEqual(list(registry), [clients[0], clients[3]])
+        self.assertIsNone(registry.get(1))
+        self.assertEqual(registry.add(self.Connection()), 1)
+        self.assertIs(registry.get(3), clients[3])
+
+
+class TestRoot(unittest.TestCase):
+
+    def test_batched_envelopes(self):
+        root = Root("auto", NullTerminal(), 2)
+        root.receive("SINGLE@1@HELLO\nSINGLE@2@HELLO")
+        self.assertEqual(root.checkout.get_nowait(), "SINGLE@1@PLAYER 1\nSINGLE@2@PLAYER 2\n")
+        self.assertTrue(root.checkout.empty())
+        self.assertIsNone(root.batch)
+
+    def test_reply_tracking(self):
+        root = Root("auto", NullTerminal(), 3)
+        root.receive("SINGLE@1@HELLO\nSINGLE@3@HELLO")
+        self.assertEqual(root.waiting, 0b1010)
+        self.assertFalse(root.all_players_replied())
+        root.receive("SINGLE@1@OK")
+        self.assertEqual(root.waiting, 0b1000)
+        root.receive("SINGLE@3@DISCONNECT")
+        self.assertTrue(root.all_players_replied())
+        self.assertEqual(root.sm.current_state.flags, S_SETUP)
+        self.assertEqual([state_family(name) for name in ("TAX", "STEAL_BLOCK", "EXCHANGE_CHOOSE", "TURN")],
+                         [S_ACTION, S_BLOCK, S_CHOOSE, 0])
+
+    def test_series_in_manual_mode(self):
+        root = Root("manual", NullTerminal())
+        root.series = 3
+        root.receive("SINGLE@1@HELLO\nSINGLE@2@HELLO")
+        root.setup_decks()
+        root.end_game()
+        self.assertIn("ALL@RESET\n", drain(root.checkout))
+        root.setup_decks()
+        root.receive("SINGLE@2@DISCONNECT")
+        root.end_game()
+        self.assertIn("ALL@EXIT\n", drain(root.checkout))
+
+    def test_quiet_logging(self):
+        messages = []
+        sink = logger.add(lambda message: messages.append(message.record["message"]), level="TRACE")
+        try:
+            root = Root("auto", NullTerminal(), 2)
+            root.receive("SINGLE@1@HELLO")
+            self.assertIn("Player 1: HELLO", messages)
+            self.assertIn("Sent to player 1: PLAYER 1", messages)
+            messages.clear()
+            hotlog.quiet()
+            root.receive("SINGLE@2@HELLO")
+            self.assertNotIn("Player 2: HELLO", messages)
+            self.assertNotIn("Sent to player 2: PLAYER 2", messages)
+            self.assertEqual(root.checkout.get_nowait(), "SINGLE@1@PLAYER 1\n")
+            self.assertEqual(root.checkout.get_nowait(), "SINGLE@2@PLAYER 2\n")
+        finally:
+            hotlog.enabled = True
+            logger.remove(sink)
+
+
+class TestStateMachine(unittest.TestCase):
+
+    def test_run_to_quiescence(self):
+        entered = []
+        sm = StateMachine(State("A"))
+        for name in "BCD":
+            sm.add_state(State(name, lambda name=name: entered.append(name)))
+        sm.add_transition("A", "B", lambda: True)
+        sm.add_transition("B", "C", lambda: True)
+        sm.add_transition("C", "D", lambda: False)
+        sm.compile()
+        self.assertEqual([state.id for state in sm.by_id], [0, 1, 2, 3])
+        self.assertEqual(sm.run(), 2)
+        self.assertEqual(entered, ["B", "C"])
+        self.assertEqual(sm.run(), 0)
+
+        sm.reset()
+        self.assertEqual(sm.run(guard=lambda: sm.current_state.name != "B"), 1)
+        self.assertEqual(sm.current_state.name, "B")
+
+        sm.add_transition("C", "B", lambda: True)
+        self.assertIsNone(sm.dispatch)
+        self.assertEqual(sm.run(max_steps=10), 10)
+
+        sm.add_transition("D", "E", lambda: True)
+        with self.assertRaises(ValueError):
+            sm.compile()
+
+
+class TestWakeupQueue(unittest.TestCase):
+
+    def test_put_wakes_selector(self):
+        outbox = WakeupQueue()
+        with selectors.DefaultSelector() as selector:
+            selector.register(outbox.reader, selectors.EVENT_READ)
+            self.assertEqual(selector.select(0), [])
+            outbox.put("HELLO")
+            outbox.put("OK")
+            self.assertEqual(len(selector.select(0)), 1)
+            outbox.clear_wakeups()
+            self.assertEqual(selector.select(0), [])
+        self.assertEqual([outbox.get_nowait(), outbox.get_nowait()], ["HELLO", "OK"])
+        outbox.close()
+
+
+class TestOutbound(unittest.TestCase):
+
+    class Server:
+        def __init__(self, outbound):
+            self.outbound = outbound
+
+    def full_client(self, outbound):
+        local, remote = socket.socketpair()
+        client = ServerClient(local, "socketpair", 1, "Name", True, self.Server(outbound))
+        client.send(b"OK\n")
+        client.send(b"OK\n")
+        with self.assertRaises(OSError):
+            client.send(b"OK\n")
+        self.assertEqual(remote.recv(16), b"")  # Dropped clients are disconnected
+        local.close()
+        remote.close()
+        return client
+
+    def test_drop_policy(self):
+        outbound = Outbound(DROP, size=2)
+        client = self.full_client(outbound)
+        self.assertEqual(outbound.stats([client]), {"queued": 2, "max_depth": 2, "blocked": 0, "dropped": 1})
+
+    def test_block_policy(self):
+        outbound = Outbound(BLOCK, size=2, timeout=0.01)
+        client = self.full_client(outbound)
+        self.assertEqual((outbound.blocked, outbound.dropped), (1, 1))
+
+
+class TestTransport(unittest.TestCase):
+
+    def test_send_buffers(self):
+        class ShortWrites:
+            """Socket that writes 3 bytes per call."""
+            def __init__(self):
+                self.data = b""
+            def sendmsg(self, buffers):
+                data = b"".join(buffers)[:3]
+                self.data += data
+                return len(data)
+
+        sock = ShortWrites()
+        send_buffers(sock, [b"SINGLE@1@", b"", memoryview(b"OK\nALL@DEAD 3\n")[:3], b"x"])
+        self.assertEqual(sock.data, b"SINGLE@1@OK\nx")
+
+    def check_transport(self, transport):
+        listener = transport.listen(1)
+        listener.settimeout(1)
+        client = transport.connect()
+        server, _ = listener.accept()
+        client.sendall(b"HELLO\n")
+        self.assertEqual(server.recv(16), b"HELLO\n")
+        for sock in (client, server, listener):
+            sock.close()
+        transport.close()
+
+    def test_socketpair(self):
+        transport = PairTransport()
+        self.check_transport(transport)
+        with self.assertRaises(OSError):
+            transport.listener.accept()
+
+    def test_unix(self):
+        with tempfile.TemporaryDirectory() as directory:
+            transport = UnixTransport(os.path.join(directory, "coup.sock"))
+            self.check_transport(transport)
+            self.assertFalse(os.path.exists(transport.path))
+
+
+class TestCoupServer(unittest.TestCase):
+    """Routing of the threaded and the asyncio servers, which must behave the same."""
+
+    def route(self, server_class: type) -> list[list[str]]:
+        """Plays a short exchange between a root and two players, and returns the lines each of them received."""
+        with tempfile.TemporaryDirectory() as directory:
+            server = server_class(transport=UnixTransport(os.path.join(directory, "coup.sock")))
+            server.start()
+            clients = []
+            try:
+                for _ in range(3):  # Root (ID 0), then players 1 and 2
+                    clients.append(connect(server.transport))
+                    clients[-1].settimeout(5)
+                    self.wait_for(lambda: len(server.connections) == len(clients))
+                root, first, second = clients
+                root.sendall(b"SINGLE@1@PLAYER 1\nALL@START\nEXCEPT@2@COINS 1 3\nSINGLE@2@PLAYER 2\n")
+                first.sendall(b"SINGLE@0@OK\n")
+                received = [self.receive(root, 1), self.receive(first, 3), self.receive(second, 2)]
+                first.close()
+                received[0] += self.receive(root, 1)
+            finally:
+                for client in clients:
+                    client.close()
+                server.shutdown()
+        return received
+
+    def wait_for(self, condition):
+        deadline = time.perf_counter() + 5
+        while not condition():
+            self.assertLess(time.perf_counter(), deadline)
+            time.sleep(0.01)
+
+    def receive(self, sock: socket.socket, lines: int) -> list[str]:
+        data = b""
+        while data.count(b"\n") < lines:
+            chunk = sock.recv(4096)
+            self.assertTrue(chunk)
+            data += chunk
+        return data.decode("utf-8").splitlines()
+
+    def test_routing(self):
+        expected = [["SINGLE@1@OK", "SINGLE@1@DISCONNECT"],
+                    ["SINGLE@0@PLAYER 1", "SINGLE@0@START", "SINGLE@0@COINS 1 3"],
+                    ["SINGLE@0@START", "SINGLE@0@PLAYER 2"]]
+        self.assertEqual(self.route(CoupServer), expected)
+        self.assertEqual(self.route(AsyncCoupServer), expected)
+
+
+class TestLatency(unittest.TestCase):
+
+    def test_histogram_percentiles(self):
+        histogram = Histogram()
+        for ms in range(1, 101):
+            histogram.add(ms / 1000)
+        self.assertEqual(histogram.count, 100)
+        self.assertAlmostEqual(histogram.percentile(50), 0.050, delta=0.050 * 0.05)
+        self.assertAlmostEqual(histogram.percentile(99), 0.099, delta=0.099 * 0.05)
+        self.assertEqual(histogram.percentile(100), 0.100)
+
+    def test_merge(self):
+        histogram, other = Histogram(), Histogram()
+        histogram.add(0.001)
+        other.add(0.002)
+        other.add(0.004)
+        histogram.merge(other)
+        self.assertEqual(histogram.count, 3)
+        self.assertAlmostEqual(histogram.total, 0.007)
+        self.assertEqual(histogram.max, 0.004)
+        self.assertEqual(sum(histogram.buckets.values()), 3)
+
+    def test_load_deliveries(self):
+        self.assertEqual([expected_deliveries(kind, 7) for kind in MIX], [1, 6, 5, 1])
+
+    def test_disabled_by_default(self):
+        latency = Latency()
+        start = latency.start()
+        self.assertEqual(start, 0.0)
+        latency.stop("hop", start)
+        self.assertEqual(latency.histograms, {})
+        latency.record("hop", 0.001)
+        self.assertIn("Latency hop: n=1", latency.dump(reset=True))
+        self.assertEqual(latency.histograms, {})
+
+
+class TestHeadlessGame(unittest.TestCase):
+
+    def setUp(self):
+        self.bots = [BOTS["RandomBot"], BOTS["HonestBot"], BOTS["TestBot"], BOTS["RandomBot"]]
+
+    def test_game_ends(self):
+        game = HeadlessGame([BOTS["TestBot"]] * 3, seed=1)
+        winner = game.run()
+        self.assertIsNotNone(winner)
+        self.assertEqual(game.root.sm.current_state.name, "END")
+        self.assertIs(game.winner_class(), BOTS["TestBot"])
+        self.assertEqual([player.id for player in game.root.players.values() if player.alive], [winner])
+
+    def test_stalled_game(self):
+        game = HeadlessGame([BOTS["TestBot"]] * 3, seed=1)
+        del game.bots[3]  # Bot 3 never gets its messages, so it never replies
+        self.assertIsNone(game.run())
+        self.assertNotEqual(game.root.sm.current_state.name, "END")
+        self.assertIsNone(game.winner_class())
+
+    def test_seeded_games_are_identical(self):
+        first = HeadlessGame(self.bots, seed=42, record=True)
+        second = HeadlessGame(self.bots, seed=42, record=True)
+        first.run()
+        second.run()
+        self.assertEqual(first.transcript, second.transcript)
+        self.assertEqual(first.winner, second.winner)
+
+    def test_root_snapshot(self):
+        game = HeadlessGame(self.bots, seed=5, record=True)
+        game.run()
+        # Transcript lines are "origin>destination: message"
+        lines = [(line.split(">", 1)[0], *line.split(">", 1)[1].split(": ", 1)) for line in game.transcript]
+        inputs = [(orig, message) for orig, dest, message in lines if dest == "0"]
+        outputs = [(int(dest), 0, message) for orig, dest, message in lines if orig == "0"]
+        middle = len(inputs) // 2
+
+        replay = HeadlessGame(self.bots, seed=5)
+        replay.queue.clear()
+        for orig, message in inputs[:middle]:
+            replay.root.receive_from(orig, message)
+        snapshot = replay.root.snapshot()
+        replay.queue.clear()
+        # Play the rest of the game on the replay, then on a fork of it
+        fork = HeadlessGame(self.bots, seed=6)
+        fork.queue.clear()
+        fork.root.restore(snapshot)
+        sent = []
+        for root, queue in ((replay.root, replay.queue), (fork.root, fork.queue)):
+            for orig, message in inputs[middle:]:
+                root.receive_from(orig, message)
+            self.assertEqual(root.sm.current_state.name, "END")
+            sent.append(list(queue))
+        self.assertEqual(sent[0], sent[1])
+        self.assertEqual(sent[0], outputs[-len(sent[0]):])
+
+        replay.root.restore(snapshot)
+        self.assertEqual(replay.root.waiting, snapshot.waiting)
+        self.assertEqual(len(replay.root.deck), len(snapshot.deck))
+        self.assertIsNot(replay.root.players, snapshot.players)
+
+    def test_fork_game(self):
+        game = HeadlessGame(self.bots, seed=5, record=True)
+        for _ in range(200):
+            game.step()
+        snapshot = game.snapshot()
+        winner = game.run()
+        transcript = game.transcript
+        self.assertIsNotNone(winner)
+
+        # The same continuation, on the game itself and on another game
+        for fork in (game, HeadlessGame(self.bots, seed=6, record=True)):
+            fork.restore(snapshot)
+            self.assertEqual(fork.delivered, 200)
+            self.assertEqual(fork.run(), winner)
+            self.assertEqual(fork.transcript, transcript)
+            self.assertEqual([type(bot) for bot in fork.bots.values()], self.bots)
+
+        # Other continuations only share the beginning of the game
+        endings = set()
+        for seed in range(10):
+            fork = HeadlessGame(self.bots, record=True)
+            fork.restore(snapshot, seed)
+            fork.run()
+            self.assertEqual(fork.transcript[:200], transcript[:200])
+            endings.add(tuple(fork.transcript[200:]))
+        self.assertGreater(len(endings), 1)
+
+    def test_invalid_number_of_players(self):
+        with self.assertRaises(ValueError):
+            HeadlessGame(self.bots[:1])
+
+    def test_series_over_same_players(self):
+        game = HeadlessGame([BOTS["TestBot"]] * 3, seed=1, record=True)
+        game.root.series = 3
+        self.assertIsNotNone(game.run())
+        self.assertEqual(game.root.games_played, 3)
+        self.assertEqual(sum(line.endswith(": RESET") for line in game.transcript), 2 * 3)
+        self.assertEqual(sum(line.endswith(": EXIT") for line in game.transcript), 3)
+        self.assertEqual(sorted(bot.id for bot in game.bots.values()), ["1", "2", "3"])
+
+
+class TestTournament(unittest.TestCase):
+
+    def test_pick_lineup(self):
+        rng = random.Random(0)
+        for _ in range(100):
+            lineup = pick_lineup(["RandomBot", "HonestBot"], 5, rng)
+            self.assertEqual(len(lineup), 5)
+            self.assertEqual(set(lineup), {"RandomBot", "HonestBot"})
+        spec = ["RandomBot", "HonestBot", "TestBot", "CoupBot"]
+        lineup = pick_lineup(spec, 3, rng)
+        self.assertEqual(len(set(lineup)), 3)
+        self.assertEqual(sorted(pick_lineup(spec, 4, rng)), sorted(spec))
+
+    def test_add_result(self):
+        tournament = Tournament(["RandomBot", "HonestBot"], size=3)
+        tournament.add_result(["RandomBot", "RandomBot", "HonestBot"], "RandomBot")
+        tournament.add_result(["HonestBot", "HonestBot", "RandomBot"], None)
+        self.assertEqual(tournament.games, {"RandomBot": 3, "HonestBot": 3})
+        self.assertEqual(tournament.wins, {"RandomBot": 1, "HonestBot": 0})
+        self.assertEqual(tournament.unfinished, 1)
+        self.assertEqual(tournament.ranking()[0], ("RandomBot", 3, 1, 1 / 3))
+
+
+class TestGameState(unittest.TestCase):
+
+    def test_clone_players(self):
+        players: dict[str, PlayerSim] = {}
+        players["1"] = PlayerSim("1", players)
+        players["2"] = PlayerSim("2", players)
+        players["1"].deck = ["A", "B"]
+        clones = clone_players(players)
+        clones["1"].deck.remove("A")
+        clones["2"].alive = False
+        self.assertEqual(players["1"].deck, ["A", "B"])
+        self.assertTrue(players["2"].alive)
+        self.assertIs(clones["1"].players, clones)
+
+    def test_move_table(self):
+        players: dict[str, PlayerSim] = {}
+        for id in ("1", "2", "3"):
+            players[id] = PlayerSim(id, players)
+        players["3"].alive = False
+        players["1"].coins = 7
+        players["1"].set_state(PlayerState.R_MY_TURN)
+        self.assertIn("ACT 1 C 2", players["1"].possible_messages)
+        self.assertIn("ACT 1 A 2", players["1"].possible_messages)
+        self.assertNotIn("ACT 1 S 3", players["1"].possible_messages)
+        
+        # Same coin bracket and targets share the cached table
+        moves = players["1"].possible_messages
+        players["1"].coins = 8
+        players["1"].set_state(PlayerState.R_MY_TURN)
+        self.assertIs(players["1"].possible_messages, moves)
+
+    def test_deck_copy(self):
+        deck = CourtDeck()
+        copy = deck.copy()
+        copy.put("A")
+        self.assertEqual(len(deck), 15)
+        self.assertEqual(len(copy), 16)
+
+    def test_deck_sample(self):
+        deck = CourtDeck()
+        deck.remove("D")
+        self.assertEqual(deck.count("D"), 2)
+        self.assertEqual(sum(deck.composition().values()), len(deck))
+        cards = deck.sample(14, random.Random(0))
+        self.assertEqual(sorted(cards), sorted(card for card, count in deck.composition().items() for _ in range(count)))
+        self.assertEqual(len(deck), 14)
+        self.assertRaises(ValueError, deck.sample, 15, random.Random(0))
+        deck.remove("D")
+        deck.remove("D")
+        self.assertNotIn("D", deck)
+        self.assertRaises(ValueError, deck.remove, "D")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,19 @@
+class HotLog:
+    """
+    Switch for the per-message log calls of the server, the root and the bots.
+
+    These calls run for every message routed, sent or handled, so each of them is guarded by `if hotlog.enabled:`,
+    and they pass their arguments to loguru instead of formatting them, so nothing is formatted unless a sink takes
+    their level. Quiet mode (-q) turns them off for the whole process: warnings, errors, game events and results
+    are still logged.
+    """
+
+    def __init__(self):
+        self.enabled = True
+
+    def quiet(self):
+        """Skips the per-message log calls from now on."""
+        self.enabled = False
+
+
+hotlog = HotLog()  # Switch of the process, shared by the server, the root and the bots
@@ -0,0 +1,141 @@
+from loguru import logger
+import atexit
+import math
+import signal
+import threading
+import time
+
+
+BUCKETS_PER_OCTAVE = 16  # Histogram resolution: bucket bounds grow by 2 ** (1 / 16), about 4% per bucket
+MIN_LATENCY = 1e-7  # Latencies below 0.1 µs share the first bucket
+PERCENTILES = (50, 95, 99)  # Percentiles written by dump()
+
+
+class Histogram:
+    """
+    Latency histogram with logarithmic buckets.
+
+    Recording is O(1) and the memory used doesn't grow with the number of samples. Percentiles are read from the
+    buckets, so they are upper bounds accurate to one bucket.
+    """
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets: dict[int, int] = {}  # Number of samples in each bucket
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        bucket = math.ceil(math.log2(max(seconds, MIN_LATENCY) / MIN_LATENCY) * BUCKETS_PER_OCTAVE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "Histogram"):
+        """Adds the samples of another histogram, e.g. recorded by another process."""
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """
+        Returns the latency below which p% of the samples fall, in seconds.
+
+        Arguments:
+            p {float} -- percentile, between 0 and 100
+
+        Returns:
+            float -- upper bound of the bucket holding the percentile, 0.0 if the histogram is empty
+        """
+        rank = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(MIN_LATENCY * 2 ** (bucket / BUCKETS_PER_OCTAVE), self.max)
+        return self.max
+
+    def __str__(self):
+        percentiles = " ".join(f"p{p}={self.percentile(p) * 1000:.3f}ms" for p in PERCENTILES)
+        return f"n={self.count} mean={self.total / max(self.count, 1) * 1000:.3f}ms {percentiles} max={self.max * 1000:.3f}ms"
+
+
+class Latency:
+    """
+    Per-hop latency histograms of the process.
+
+    Disabled by default: start() then returns 0.0 and stop() returns right away, so instrumented code only pays
+    for two function calls. Once enabled, each hop (e.g. "server.route") gets its own histogram. The root dumps
+    the histograms at the end of each game, the other processes when they exit.
+
+    Usage:
+        start = latency.start()
+        ...
+        latency.stop("hop", start)
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms: dict[str, Histogram] = {}
+        self.lock = threading.Lock()  # Hops are recorded by several threads (e.g. the server connections)
+
+    def enable(self):
+        """
+        Starts recording. The histograms are dumped when the process exits, and on request with SIGUSR1 (e.g. kill -USR1 PID)
+        when enabled from the main thread of a POSIX process.
+        """
+        if not self.enabled:
+            self.enabled = True
+            atexit.register(self.dump)
+            if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+                # Dump from another thread, the interrupted one may hold the logger's lock
+                signal.signal(signal.SIGUSR1, lambda signum, frame: threading.Thread(target=self.dump).start())
+
+    def start(self) -> float:
+        """Returns the start time of a hop, 0.0 when disabled."""
+        return time.perf_counter() if self.enabled else 0.0
+
+    def stop(self, hop: str, start: float):
+        """
+        Records the time elapsed since start() under the given hop. Does nothing if start is 0.0 (disabled).
+
+        Arguments:
+            hop {str} -- name of the hop
+            start {float} -- value returned by start()
+        """
+        if start:
+            self.record(hop, time.perf_counter() - start)
+
+    def record(self, hop: str, seconds: float):
+        with self.lock:
+            histogram = self.histograms.get(hop)
+            if histogram is None:
+                histogram = self.histograms[hop] = Histogram()
+            histogram.add(seconds)
+
+    def dump(self, reset: bool = False) -> str:
+        """
+        Logs the histograms, one line per hop.
+
+        Keyword Arguments:
+            reset {bool} -- clear the histograms afterwards, so the next dump only covers what follows (default: False)
+
+        Returns:
+            str -- dumped lines
+        """
+        with self.lock:
+            lines = [f"Latency {hop}: {histogram}" for hop, histogram in sorted(self.histograms.items())]
+            if reset:
+                self.histograms = {}
+        for line in lines:
+            logger.info(line)
+        return "\n".join(lines)
+
+
+latency = Latency()  # Histograms of the process, shared by the server, the root and the bots